@@ -0,0 +1,190 @@
+# app/chat_view.py
+
+import threading
+
+import flet as ft
+
+from config.settings import CHAT_MAX_MOUNTED, CHAT_PAGE_SIZE
+
+# How close (in pixels) to either end of the list counts as "at" that end.
+SCROLL_EDGE = 200
+
+
+class ChatView:
+    """
+    Chat history on a ListView that keeps only a window of messages mounted.
+
+    Every message shown is recorded in `source` (a list, or anything with
+    len(), slicing, append() and item assignment), and only the newest `max_mounted` of them
+    have controls. Scrolling to the top mounts the next `page_size` older
+    messages from `source`, rendered by `render(item)` without entry
+    animations; once the user is back at the bottom, the window is trimmed
+    again. Update cost therefore stays flat however long the session gets.
+
+    The ListView is reversed (newest message at index 0, anchored to the
+    bottom), so adding older messages above, or dropping them, never moves
+    what's on screen, and new messages stay in view without auto_scroll.
+    """
+
+    def __init__(self, render, source=None, max_mounted=CHAT_MAX_MOUNTED, page_size=CHAT_PAGE_SIZE):
+        self.render = render
+        self.source = source if source is not None else []
+        self.max_mounted = max_mounted
+        self.page_size = page_size
+
+        self.list_view = ft.ListView(
+            expand=True,
+            spacing=10,
+            reverse=True,
+            on_scroll=self._on_scroll,
+        )
+        # Mounted controls, oldest first, as (is_message, control); the
+        # ListView holds the same controls newest first.
+        self._mounted = []
+        self._start = len(self.source)  # source index of the oldest mounted message
+        self._reserved = {}  # id(control) -> source index of a message still being written
+        self._at_bottom = True
+        self._lock = threading.RLock()
+
+    @property
+    def control(self):
+        return self.list_view
+
+    @property
+    def mounted_messages(self):
+        with self._lock:
+            return sum(1 for is_message, _ in self._mounted if is_message)
+
+    def add_message(self, item, control=None):
+        """
+        Records `item` (a dict with role, content and time) and shows it at
+        the bottom, as `control` if given (e.g. an animated bubble), else as
+        render(item). A control already shown with add_control (a bubble
+        that was streamed in) stays where it is. Returns the control.
+        """
+        with self._lock:
+            if control is None:
+                control = self.render(item)
+            self.source.append(item)
+            for i, (_, mounted) in enumerate(self._mounted):
+                if mounted is control:
+                    self._mounted[i] = (True, control)
+                    break
+            else:
+                self._push(True, control)
+            if self._at_bottom:
+                self._trim()
+        return control
+
+    def reserve_message(self, item, control):
+        """
+        Shows `control` for a message that is still being produced (a bubble
+        streaming in) and records `item` as its placeholder in `source` right
+        away, so messages added meanwhile are stored after it, as on screen.
+        finish_message() fills the placeholder in.
+        """
+        with self._lock:
+            self._reserved[id(control)] = len(self.source)
+            self.source.append(item)
+            self._push(True, control)
+            if self._at_bottom:
+                self._trim()
+        return control
+
+    def finish_message(self, control, item):
+        """
+        Replaces the placeholder recorded by reserve_message() for `control`
+        with the finished `item`. Does nothing if the view was detached
+        meanwhile: the placeholder belongs to a session no longer shown.
+        """
+        with self._lock:
+            index = self._reserved.pop(id(control), None)
+            if index is not None:
+                self.source[index] = item
+
+    def add_control(self, control):
+        """
+        Shows a control that is not part of the history (typing indicator, buttons).
+        """
+        with self._lock:
+            self._push(False, control)
+
+    def remove_control(self, control):
+        with self._lock:
+            for i, (_, mounted) in enumerate(self._mounted):
+                if mounted is control:
+                    del self._mounted[i]
+                    self.list_view.controls.remove(control)
+                    return
+
+    def show_latest(self):
+        """
+        Remounts just the newest page of `source` (e.g. after loading a saved session).
+        """
+        with self._lock:
+            self._mounted = []
+            self.list_view.controls.clear()
+            self._start = len(self.source)
+            self._at_bottom = True
+            self.load_older()
+
+    def detach(self):
+        """
+        Keeps the rows on screen but stops treating them as part of `source`,
+        e.g. after `source` moved on to a new session. They are trimmed
+        away as new messages come in.
+        """
+        with self._lock:
+            self._mounted = [(False, control) for _, control in self._mounted]
+            self._start = len(self.source)
+            self._reserved.clear()
+
+    def load_older(self):
+        """
+        Mounts up to `page_size` messages older than the oldest one shown.
+        Returns how many were added.
+        """
+        with self._lock:
+            stop = self._start
+            start = max(0, stop - self.page_size)
+            if start == stop:
+                return 0
+            rows = [self.render(item) for item in self.source[start:stop]]
+            self._mounted[:0] = [(True, row) for row in rows]
+            self.list_view.controls.extend(reversed(rows))
+            self._start = start
+            return len(rows)
+
+    def update(self):
+        self.list_view.update()
+
+    # ------------------------------------------------------------------
+    def _push(self, is_message, control):
+        self._mounted.append((is_message, control))
+        self.list_view.controls.insert(0, control)
+
+    def _trim(self):
+        excess = self.mounted_messages - self.max_mounted
+        while excess > 0 and self._mounted:
+            is_message, control = self._mounted.pop(0)
+            self.list_view.controls.pop()
+            if is_message:
+                self._start += 1
+                excess -= 1
+
+    def _on_scroll(self, e):
+        # Only act once a scroll gesture settles (event_type is a plain string
+        # in older Flet releases and an enum in newer ones).
+        if getattr(e.event_type, "value", e.event_type) != "end":
+            return
+        with self._lock:
+            self._at_bottom = e.pixels <= SCROLL_EDGE
+            if e.pixels >= e.max_scroll_extent - SCROLL_EDGE:
+                changed = self.load_older() > 0
+            elif self._at_bottom and self.mounted_messages > self.max_mounted:
+                self._trim()
+                changed = True
+            else:
+                changed = False
+        if changed:
+            self.update()
@@ -1,21 +1,71 @@
 # flet_app.py
 
-import flet as ft
-import threading
-import time
-import datetime
-import os
-import sys
-import subprocess
+from config.settings import STARTUP_REPORT, STARTUP_REPORT_PATH
+from utils.startup_timing import StartupReport
+
+# Started before the other imports so they show up in the report.
+startup_report = StartupReport()
+if STARTUP_REPORT:
+    startup_report.start()
+
+import flet as ft  # noqa: E402
+import atexit  # noqa: E402
+import base64  # noqa: E402
+import logging  # noqa: E402
+import threading  # noqa: E402
+import time  # noqa: E402
+import datetime  # noqa: E402
+import os  # noqa: E402
+import sys  # noqa: E402
+import subprocess  # noqa: E402
+
+# Heavy dependencies (OpenAI SDK, pandas, chromadb, pdfplumber, reportlab...)
+# are imported by the code that uses them, on first use.
+from core.agent_manager import AgentManager  # noqa: E402
+from app.chat_view import ChatView  # noqa: E402
+from app.request_queue import QueueFull, RequestQueue  # noqa: E402
+from storage.conversation_store import ConversationStore, SessionHistory  # noqa: E402
+from storage.pdf_export import export_history  # noqa: E402
+from utils.tracing import get_tracer  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+# Set up by start_services(). Conversations are kept on disk and the app
+# reopens the most recent one; conversation_history holds the turns sent to
+# the model (shared with the agents), display_history the messages shown.
+conversation_store = None
+conversation_history = None
+display_history = None
+agent_manager = None
+# Answers messages (and loads files) on a few worker threads, in order for each page.
+request_queue = None
 
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import LETTER
-
-from storage.file_handler import read_file
-from services.ai_service import ask_chatgpt
-
-conversation_history = []
 doc_text = None
+_services_lock = threading.Lock()
+
+
+def start_services():
+    """
+    Opens the conversation store and starts the agents and the request
+    queue, once. Not done at import time: worker processes started with
+    "spawn" (PDF extraction) re-import the main module, and must not open
+    the store or start threads of their own.
+    """
+    global conversation_store, conversation_history, display_history, agent_manager, request_queue
+    with _services_lock:
+        if conversation_store is not None:
+            return
+        with startup_report.phase("open conversation store"):
+            store = ConversationStore()
+            atexit.register(store.close)
+            session_id = store.latest_session() or store.new_session()
+        conversation_history = SessionHistory(store, session_id)
+        display_history = SessionHistory(store, session_id, channel="display")
+        with startup_report.phase("create AgentManager"):
+            agent_manager = AgentManager(conversation_history)
+        with startup_report.phase("start request queue"):
+            request_queue = RequestQueue()
+        conversation_store = store
 
 
 # -----------------------------------------------------------------
@@ -47,8 +97,13 @@ def avatar(is_user=False):
     )
 
 
-def make_chat_bubble(text, is_user=False):
-    time_str = datetime.datetime.now().strftime("%H:%M")
+def make_chat_bubble(text, is_user=False, animate=True, time_str=None):
+    """
+    Returns (row, bubble, main_text, time_text). With animate=True the bubble
+    starts hidden and fades in once its opacity/offset are set; rows rebuilt
+    from history pass animate=False and are drawn in place.
+    """
+    time_str = time_str or datetime.datetime.now().strftime("%H:%M")
     text_color = ft.Colors.WHITE
     main_text = ft.Text(text, selectable=True, color=text_color)
     time_text = ft.Text(time_str, size=10, color="#CCCCCC", italic=True)
@@ -61,11 +116,12 @@ def make_chat_bubble(text, is_user=False):
         bgcolor=bubble_color(is_user),
         border_radius=10,
         width=500,
-        opacity=0.0,
-        offset=ft.Offset(0, 0.04),
-        animate_opacity=ft.Animation(800, ft.AnimationCurve.EASE_OUT),
-        animate_offset=ft.Animation(800, ft.AnimationCurve.EASE_OUT),
     )
+    if animate:
+        bubble.opacity = 0.0
+        bubble.offset = ft.Offset(0, 0.04)
+        bubble.animate_opacity = ft.Animation(800, ft.AnimationCurve.EASE_OUT)
+        bubble.animate_offset = ft.Animation(800, ft.AnimationCurve.EASE_OUT)
 
     row = ft.Row(
         controls=[avatar(is_user), bubble] if not is_user else [bubble, avatar(is_user)],
@@ -74,10 +130,33 @@ def make_chat_bubble(text, is_user=False):
     return row, bubble, main_text, time_text
 
 
-def show_user_bubble(page, chat_column, text):
+def history_item(role, text, image=None):
+    item = {"role": role, "content": text, "time": datetime.datetime.now().strftime("%H:%M")}
+    if image is not None:
+        item["image"] = base64.b64encode(image).decode("ascii")
+    return item
+
+
+def render_history_item(item):
+    """
+    Rebuilds the row for a message scrolled back into view (no animation).
+    """
+    row, bubble, main_text, time_text = make_chat_bubble(
+        item["content"], is_user=item["role"] == "user", animate=False, time_str=item.get("time")
+    )
+    if item.get("image") is not None:
+        bubble.content.controls.insert(1, image_control(item["image"]))
+    return row
+
+
+def image_control(image_b64):
+    return ft.Image(src_base64=image_b64, width=480, fit=ft.ImageFit.CONTAIN)
+
+
+def show_user_bubble(page, chat_view, text):
     row, bubble, main_text, time_text = make_chat_bubble(text, is_user=True)
-    chat_column.controls.append(row)
-    chat_column.update()
+    chat_view.add_message(history_item("user", text), row)
+    chat_view.update()
     time.sleep(0.05)
     bubble.opacity = 1.0
     bubble.offset = ft.Offset(0, 0)
@@ -88,134 +167,341 @@ CHUNK_SIZE = 3
 TYPING_DELAY = 0.01
 
 
-def show_assistant_bubble_typing(page, chat_column, full_text):
-    row, bubble, main_text, time_text = make_chat_bubble("", is_user=False)
-    chat_column.controls.append(row)
-    chat_column.update()
+def show_assistant_bubble_typing(page, chat_view, full_text):
+    with get_tracer().span("render", chars=len(full_text)):
+        row, bubble, main_text, time_text = make_chat_bubble("", is_user=False)
+        chat_view.add_message(history_item("assistant", full_text), row)
+        chat_view.update()
+
+        time.sleep(0.05)
+        bubble.opacity = 1.0
+        bubble.offset = ft.Offset(0, 0)
+        bubble.update()
+
+        typed = ""
+        for i in range(0, len(full_text), CHUNK_SIZE):
+            typed += full_text[i: i + CHUNK_SIZE]
+            main_text.value = typed
+            bubble.update()
+            time.sleep(TYPING_DELAY)
+        time_text.value = datetime.datetime.now().strftime("%H:%M")
+        bubble.update()
+
+
+# Minimum time between UI refreshes while tokens stream in.
+STREAM_UPDATE_INTERVAL = 0.03
+
+
+def show_assistant_bubble_stream(page, chat_view, deltas, on_first_delta=None):
+    """
+    Renders an assistant bubble that grows as `deltas` (an iterator of text
+    pieces) arrives. The bubble is created when the first piece shows up;
+    `on_first_delta` runs just before that (e.g. to drop a typing indicator).
+    Returns the full text.
+    """
+    parts = []
+    bubble = main_text = time_text = None
+    last_update = 0.0
+
+    for delta in deltas:
+        parts.append(delta)
+        if bubble is None:
+            if on_first_delta:
+                on_first_delta()
+            row, bubble, main_text, time_text = make_chat_bubble("", is_user=False)
+            bubble.opacity = 1.0
+            bubble.offset = ft.Offset(0, 0)
+            # Holds the message's place in the history while it streams in.
+            chat_view.reserve_message(history_item("assistant", ""), row)
+            chat_view.update()
+
+        now = time.monotonic()
+        if now - last_update >= STREAM_UPDATE_INTERVAL:
+            main_text.value = "".join(parts)
+            bubble.update()
+            last_update = now
+
+    full_text = "".join(parts).strip()
+    if bubble is None:
+        if on_first_delta:
+            on_first_delta()
+        if full_text:
+            show_assistant_bubble_typing(page, chat_view, full_text)
+        return full_text
+
+    main_text.value = full_text
+    time_text.value = datetime.datetime.now().strftime("%H:%M")
+    chat_view.finish_message(row, history_item("assistant", full_text))
+    bubble.update()
+    return full_text
+
 
+def show_assistant_image(page, chat_view, image_bytes, caption=""):
+    row, bubble, main_text, time_text = make_chat_bubble(caption, is_user=False)
+    item = history_item("assistant", caption, image=image_bytes)
+    bubble.content.controls.insert(1, image_control(item["image"]))
+    chat_view.add_message(item, row)
+    chat_view.update()
     time.sleep(0.05)
     bubble.opacity = 1.0
     bubble.offset = ft.Offset(0, 0)
     bubble.update()
 
-    typed = ""
-    for i in range(0, len(full_text), CHUNK_SIZE):
-        typed += full_text[i: i + CHUNK_SIZE]
-        main_text.value = typed
-        bubble.update()
-        time.sleep(TYPING_DELAY)
-    time_text.value = datetime.datetime.now().strftime("%H:%M")
-    bubble.update()
+
+DOCUMENT_TYPES = (".txt", ".pdf", ".docx")
+SPREADSHEET_TYPES = (".csv", ".xlsx")
 
 
-def pick_file(e, page, chat_column):
-    global doc_text, conversation_history
+def pick_file(e, page, chat_view):
     if not e.files:
         return
     path = e.files[0].path
-    file_contents = read_file(path)
-    doc_text = file_contents
-
-    loaded_msg = (
-        f"Document loaded: {path}\n"
-        f"Doc content stored in memory.\n"
-        f"Data agent is now active."
-    )
-    show_assistant_bubble_typing(page, chat_column, loaded_msg)
-    conversation_history.append({"role": "system", "content": f"Document context:\n{doc_text}"})
+    if os.path.splitext(path)[-1].lower() not in DOCUMENT_TYPES + SPREADSHEET_TYPES:
+        show_assistant_bubble_typing(page, chat_view, f"Unsupported file type: {path}")
+        return
+    try:
+        request_queue.submit(id(page), load_file, page, chat_view, path)
+    except QueueFull:
+        show_assistant_bubble_typing(
+            page, chat_view, "Too many requests are waiting. Please try again in a moment."
+        )
 
 
-def reset_conversation(e, page, chat_column):
-    global doc_text, conversation_history
+def load_file(page, chat_view, path, cancelled):
+    """
+    Runs on a request_queue worker, so a large file never blocks the UI.
+    Documents are streamed page by page into the DocAgent's index (PDF
+    pages are extracted in parallel); spreadsheets go to the DataAgent.
+    """
+    global doc_text
+    loading_txt = ft.Text(f"Loading {os.path.basename(path)}...", italic=True, size=12, color="#666666")
+    chat_view.add_control(loading_txt)
+    chat_view.update()
+    try:
+        if os.path.splitext(path)[-1].lower() in SPREADSHEET_TYPES:
+            text = agent_manager.load_dataframe_file(path, path).summary_text()
+            agent_name = "Data agent"
+        else:
+            agent_manager.load_document_file(path, path)
+            text = agent_manager.blackboard.documents[path]
+            agent_name = "Doc agent"
+    except Exception as ex:
+        logger.exception("Could not load %s", path)
+        text = None
+        message = f"Could not load {path}: {ex}"
+    else:
+        message = f"Document loaded: {path}\nDoc content stored in memory.\n{agent_name} is now active."
+    finally:
+        chat_view.remove_control(loading_txt)
+        chat_view.update()
+    if cancelled.is_set():
+        return  # the conversation was reset meanwhile
+
+    show_assistant_bubble_typing(page, chat_view, message)
+    if text is not None:
+        doc_text = text
+        conversation_history.append({"role": "system", "content": f"Document context:\n{doc_text}"})
+
+
+def reset_conversation(e, page, chat_view):
+    global doc_text
+    request_queue.cancel(id(page))
     doc_text = None
-    conversation_history = []
-    show_assistant_bubble_typing(page, chat_column, "Memory cleared!")
+    # Clearing the shared history starts a new session; the old one stays on disk.
+    agent_manager.reset_all()
+    display_history.session_id = conversation_history.session_id
+    chat_view.detach()
+    show_assistant_bubble_typing(page, chat_view, "Memory cleared!")
 
 
-def send_message(page, chat_column, user_input):
+def send_message(page, chat_view, user_input):
     msg = user_input.value.strip()
     if not msg:
         return
     user_input.value = ""
     user_input.update()
 
-    show_user_bubble(page, chat_column, msg)
-    conversation_history.append({"role": "user", "content": msg})
+    show_user_bubble(page, chat_view, msg)
+    try:
+        request_queue.submit(id(page), answer_message, page, chat_view, msg)
+    except QueueFull:
+        show_assistant_bubble_typing(
+            page, chat_view, "Too many messages are waiting. Please try again in a moment."
+        )
+
+
+def until_cancelled(deltas, cancelled):
+    try:
+        for delta in deltas:
+            if cancelled.is_set():
+                return
+            yield delta
+    finally:
+        deltas.close()
+
 
+def answer_message(page, chat_view, msg, cancelled):
+    """
+    Runs on a request_queue worker. Messages from one page are answered one
+    at a time, in the order they were sent; `cancelled` is set on reset.
+    """
+    if cancelled.is_set():
+        return
+    # One trace per turn: routing, retrieval, completion and rendering nest under it.
+    with get_tracer().span("turn"):
+        _answer_message(page, chat_view, msg, cancelled)
+
+
+def _answer_message(page, chat_view, msg, cancelled):
     typing_txt = ft.Text("Assistant is typing...", italic=True, size=12, color="#666666")
-    chat_column.controls.append(typing_txt)
-    chat_column.update()
-
-    def run_gpt():
-        flattened = ""
-        for c in conversation_history:
-            role = c["role"]
-            content = c["content"]
-            if role == "system":
-                flattened += f"[System message]: {content}\n"
-            elif role == "user":
-                flattened += f"User: {content}\n"
-            else:
-                flattened += f"Assistant: {content}\n"
-
-        prompt = flattened + "Assistant:"
-        response = ask_chatgpt(prompt)
-
-        chat_column.controls.remove(typing_txt)
-        chat_column.update()
-        conversation_history.append({"role": "assistant", "content": response})
-        show_assistant_bubble_typing(page, chat_column, response)
-
-    threading.Thread(target=run_gpt).start()
-
-
-MAX_WIDTH_CHARS = 100
-
-
-def create_pdf_from_conversation(convo, pdf_path):
-    c = canvas.Canvas(pdf_path, pagesize=LETTER)
-    width, height = LETTER
-    text_obj = c.beginText(50, height - 50)
-    text_obj.setFont("Helvetica", 12)
-
-    import textwrap
-    for entry in convo:
-        role = entry["role"].upper()
-        content = entry["content"]
-        line_str = f"{role}: {content}"
-        wrapped_lines = textwrap.wrap(line_str, width=MAX_WIDTH_CHARS)
-        for wl in wrapped_lines:
-            text_obj.textLine(wl)
-        text_obj.textLine("")
-    c.drawText(text_obj)
-    c.showPage()
-    c.save()
-
-
-def export_chat_local(e, page, chat_column):
+    chat_view.add_control(typing_txt)
+    chat_view.update()
+
+    def remove_typing_indicator():
+        chat_view.remove_control(typing_txt)
+        chat_view.update()
+
+    active = agent_manager.active_agent
+    # (Checking for None first avoids building the DataAgent just to compare.)
+    if active is not None and active is agent_manager.data_agent and active.can_handle(msg):
+        # route_query records both turns in the shared history.
+        response = agent_manager.route_query(msg)
+        image = agent_manager.blackboard.intermediate.pop("image", None)
+        remove_typing_indicator()
+        if response is None or cancelled.is_set():
+            return  # superseded by a newer message or a reset
+        if image is not None:
+            show_assistant_image(page, chat_view, image, response)
+        else:
+            show_assistant_bubble_typing(page, chat_view, response)
+    else:
+        # Plain chat; route_query_stream records both turns once the answer is complete.
+        deltas = agent_manager.route_query_stream(msg, agent=agent_manager.general_agent)
+        show_assistant_bubble_stream(
+            page, chat_view, until_cancelled(deltas, cancelled), on_first_delta=remove_typing_indicator
+        )
+
+
+def build_debug_panel():
+    """
+    Side panel with the tracer's per-stage latencies, token counts and cache
+    hit rates, refreshed on demand, and a button that exports the recent
+    spans to temp/ as JSON lines. Returns (panel, refresh); hidden at first.
+    """
+    tracer = get_tracer()
+    metrics_text = ft.Text("", font_family="monospace", size=11, selectable=True)
+    status_text = ft.Text("", size=11, italic=True)
+
+    def refresh(_=None):
+        metrics_text.value = tracer.format() if tracer.enabled else "Tracing is off (TRACE_ENABLED=0)."
+        panel.update()
+
+    def export(_):
+        stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = tracer.export(os.path.join(os.getcwd(), "temp", f"trace_{stamp}.jsonl"))
+        status_text.value = f"Exported to {path}"
+        refresh()
+
+    def reset(_):
+        tracer.reset()
+        status_text.value = ""
+        refresh()
+
+    panel = ft.Container(
+        content=ft.Column(
+            [
+                ft.Text("Debug", weight=ft.FontWeight.BOLD),
+                ft.Row(
+                    [
+                        ft.ElevatedButton("Refresh", on_click=refresh),
+                        ft.ElevatedButton("Export (JSONL)", on_click=export),
+                        ft.ElevatedButton("Reset", on_click=reset),
+                    ],
+                    wrap=True
+                ),
+                metrics_text,
+                status_text
+            ],
+            scroll=ft.ScrollMode.AUTO,
+            spacing=10
+        ),
+        width=420,
+        padding=10,
+        bgcolor="#FAFAFA",
+        border_radius=12,
+        border=ft.border.all(1, ft.Colors.GREY_300),
+        visible=False,
+    )
+    return panel, refresh
+
+
+# Minimum time between progress bar refreshes during an export.
+EXPORT_PROGRESS_INTERVAL = 0.2
+
+
+def export_chat_local(e, page, chat_view):
+    """
+    Exports the conversation to temp/chat_history.pdf on a background thread,
+    with a progress bar. Re-exporting the same session only appends new turns.
+    """
     temp_dir = os.path.join(os.getcwd(), "temp")
     os.makedirs(temp_dir, exist_ok=True)
     pdf_path = os.path.join(temp_dir, "chat_history.pdf")
-    create_pdf_from_conversation(conversation_history, pdf_path)
-
-    def on_click_open_pdf(_):
-        open_pdf_file(pdf_path)
 
-    file_link_btn = ft.ElevatedButton("Open PDF", on_click=on_click_open_pdf)
-    chat_column.controls.append(file_link_btn)
-    chat_column.update()
+    progress_bar = ft.ProgressBar(width=400, value=0)
+    chat_view.add_control(progress_bar)
+    chat_view.update()
+    last_update = [0.0]
+
+    def on_progress(done, total):
+        now = time.monotonic()
+        if total and now - last_update[0] >= EXPORT_PROGRESS_INTERVAL:
+            progress_bar.value = done / total
+            progress_bar.update()
+            last_update[0] = now
+
+    def run_export():
+        try:
+            result = export_history(conversation_history, pdf_path, progress=on_progress)
+        except Exception as ex:
+            chat_view.remove_control(progress_bar)
+            show_assistant_bubble_typing(page, chat_view, f"Export failed: {ex}")
+            return
+        chat_view.remove_control(progress_bar)
+
+        def on_click_open_pdf(_):
+            open_pdf_file(pdf_path)
+
+        file_link_btn = ft.ElevatedButton("Open PDF", on_click=on_click_open_pdf)
+        chat_view.add_control(file_link_btn)
+        chat_view.update()
+
+        what = f"{result['added']} new messages appended" if result["appended"] else "Chat exported"
+        show_assistant_bubble_typing(
+            page,
+            chat_view,
+            f"{what} to {pdf_path}\nClick 'Open PDF' button above."
+        )
 
-    show_assistant_bubble_typing(
-        page,
-        chat_column,
-        f"Chat exported to {pdf_path}\nClick 'Open PDF' button above."
-    )
+    threading.Thread(target=run_export, name="pdf-export", daemon=True).start()
 
 
 # ----------------------------------------------------------------------------
 # Main "Flet app" function that sets up the page UI, including the logos
 # ----------------------------------------------------------------------------
 def main(page: ft.Page):
+    start_services()
+    with startup_report.phase("build window"):
+        build_window(page)
+
+    if STARTUP_REPORT and startup_report.total is None:
+        startup_report.finish()
+        logger.info("Startup timings:\n%s", startup_report.format())
+        os.makedirs(os.path.dirname(STARTUP_REPORT_PATH) or ".", exist_ok=True)
+        startup_report.write(STARTUP_REPORT_PATH)
+
+
+def build_window(page):
     page.title = "GPT-4o Assistant"
     page.theme_mode = ft.ThemeMode.LIGHT
     page.horizontal_alignment = ft.CrossAxisAlignment.START
@@ -223,16 +509,12 @@ def main(page: ft.Page):
     # The original snippet set page.scroll = None to disable page-level scrolling
     page.scroll = None
 
-    # Chat area (scrollable)
-    chat_column = ft.Column(
-        scroll=ft.ScrollMode.ALWAYS,
-        expand=True,
-        spacing=10,
-        auto_scroll=True
-    )
+    # Chat area (scrollable, only the latest messages are mounted)
+    chat_view = ChatView(render_history_item, source=display_history)
+    chat_view.show_latest()
 
     chat_frame = ft.Container(
-        content=chat_column,
+        content=chat_view.control,
         bgcolor="#FFFFFF",
         border_radius=12,
         padding=20,
@@ -307,12 +589,12 @@ def main(page: ft.Page):
         bgcolor="#FAFAFA",
         color="#111111",
         border_color="#CCCCCC",
-        on_submit=lambda e: send_message(page, chat_column, user_input),
+        on_submit=lambda e: send_message(page, chat_view, user_input),
     )
 
     send_button = ft.ElevatedButton(
         "Send",
-        on_click=lambda e: send_message(page, chat_column, user_input)
+        on_click=lambda e: send_message(page, chat_view, user_input)
     )
 
     theme_toggle = ft.IconButton(
@@ -322,14 +604,14 @@ def main(page: ft.Page):
     )
     reset_button = ft.ElevatedButton(
         "Reset Memory",
-        on_click=lambda e: reset_conversation(e, page, chat_column)
+        on_click=lambda e: reset_conversation(e, page, chat_view)
     )
     export_button = ft.ElevatedButton(
         "Export (PDF)",
-        on_click=lambda e: export_chat_local(e, page, chat_column)
+        on_click=lambda e: export_chat_local(e, page, chat_view)
     )
 
-    file_picker = ft.FilePicker(on_result=lambda e: pick_file(e, page, chat_column))
+    file_picker = ft.FilePicker(on_result=lambda e: pick_file(e, page, chat_view))
     load_button = ft.ElevatedButton(
         "Load File",
         on_click=lambda e: file_picker.pick_files()
@@ -337,6 +619,19 @@ def main(page: ft.Page):
 
     page.overlay.append(file_picker)
 
+    queue_label = ft.Text("Pending messages: 0", size=12, italic=True)
+
+    debug_panel, refresh_debug_panel = build_debug_panel()
+
+    def toggle_debug_panel(e):
+        debug_panel.visible = not debug_panel.visible
+        if debug_panel.visible:
+            refresh_debug_panel()
+        else:
+            debug_panel.update()
+
+    debug_button = ft.ElevatedButton("Debug Panel", on_click=toggle_debug_panel)
+
     # We'll use a Column with "SPACE_BETWEEN", so the controls appear at the top
     # and the logo is at the bottom. "expand=True" ensures the side panel fills
     # the vertical space of the page, letting us dock the logo at the bottom.
@@ -348,7 +643,9 @@ def main(page: ft.Page):
                     theme_toggle,
                     reset_button,
                     export_button,
-                    load_button
+                    load_button,
+                    debug_button,
+                    queue_label
                 ],
                 spacing=20
             ),
@@ -382,13 +679,20 @@ def main(page: ft.Page):
     layout_row = ft.Row(
         [
             side_panel_container,
-            main_chat_area
+            main_chat_area,
+            debug_panel
         ],
         expand=True
     )
 
     page.add(layout_row)
 
+    def update_queue_label(depth):
+        queue_label.value = f"Pending messages: {depth}"
+        queue_label.update()
+
+    request_queue.on_depth_change = update_queue_label
+
     page.on_theme_change = lambda _: update_theme_icon()
     update_theme_icon()
     set_theme_background()
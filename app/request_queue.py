@@ -0,0 +1,142 @@
+# app/request_queue.py
+
+import logging
+import threading
+from collections import deque
+
+from config.settings import CHAT_WORKERS, CHAT_QUEUE_MAX
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    pass
+
+
+class _Job:
+    __slots__ = ("fn", "args", "cancelled")
+
+    def __init__(self, fn, args):
+        self.fn = fn
+        self.args = args
+        self.cancelled = threading.Event()
+
+
+class RequestQueue:
+    """
+    Runs chat requests on a fixed pool of worker threads.
+
+    Jobs are submitted under a key (one per conversation). Jobs with the
+    same key run one at a time, in submission order, so answers can't
+    interleave; different keys run in parallel on up to `workers` threads.
+    At most `max_pending` jobs wait at once; beyond that submit() raises
+    QueueFull. cancel() drops a key's waiting jobs and sets the `cancelled`
+    event handed to its running job, which should stop at the next check.
+
+    `on_depth_change(depth)` is called (from whichever thread changed it)
+    with the number of waiting plus running jobs.
+    """
+
+    def __init__(self, workers=CHAT_WORKERS, max_pending=CHAT_QUEUE_MAX, on_depth_change=None):
+        self.max_pending = max_pending
+        self.on_depth_change = on_depth_change
+
+        self._cond = threading.Condition()
+        self._pending = {}   # key -> deque of waiting jobs
+        self._ready = deque()  # keys with waiting jobs and none running
+        self._running = {}   # key -> running job
+        self._size = 0
+        self._closed = False
+
+        self._threads = [
+            threading.Thread(target=self._work, name=f"chat-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def depth(self):
+        with self._cond:
+            return self._size + len(self._running)
+
+    def submit(self, key, fn, *args):
+        """
+        Queues fn(*args, cancelled) to run after the jobs already queued under
+        `key`, and returns `cancelled` (a threading.Event).
+        """
+        job = _Job(fn, args)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("RequestQueue is shut down.")
+            if self._size >= self.max_pending:
+                raise QueueFull(f"{self._size} requests are already waiting.")
+            self._pending.setdefault(key, deque()).append(job)
+            self._size += 1
+            if key not in self._running and key not in self._ready:
+                self._ready.append(key)
+                self._cond.notify()
+        self._report_depth()
+        return job.cancelled
+
+    def cancel(self, key):
+        """
+        Drops the jobs waiting under `key` and signals its running job.
+        """
+        with self._cond:
+            dropped = self._pending.pop(key, ())
+            self._size -= len(dropped)
+            if key in self._ready:
+                self._ready.remove(key)
+            running = self._running.get(key)
+        for job in dropped:
+            job.cancelled.set()
+        if running is not None:
+            running.cancelled.set()
+        self._report_depth()
+
+    def shutdown(self, wait=True):
+        with self._cond:
+            self._closed = True
+            keys = list(self._pending) + list(self._running)
+            self._cond.notify_all()
+        for key in keys:
+            self.cancel(key)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    # ------------------------------------------------------------------
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._ready and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                key = self._ready.popleft()
+                jobs = self._pending[key]
+                job = jobs.popleft()
+                if not jobs:
+                    del self._pending[key]
+                self._size -= 1
+                self._running[key] = job
+
+            try:
+                job.fn(*job.args, job.cancelled)
+            except Exception:
+                logger.exception("Chat request failed")
+            finally:
+                with self._cond:
+                    del self._running[key]
+                    if key in self._pending:
+                        self._ready.append(key)
+                        self._cond.notify()
+                self._report_depth()
+
+    def _report_depth(self):
+        if self.on_depth_change is not None:
+            try:
+                self.on_depth_change(self.depth)
+            except Exception:
+                logger.exception("Queue depth callback failed")
@@ -0,0 +1,99 @@
+# chatbot_desktop/benchmarks/bench_embeddings.py
+"""
+Compares per-chunk embedding calls with the batched, concurrent path
+against a local stand-in for the OpenAI embeddings endpoint.
+
+Run from the project root:
+    python -m benchmarks.bench_embeddings --chunks 600 --latency-ms 40
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DIMENSION = 1536
+
+
+def make_handler(latency_s):
+    class EmbeddingHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            inputs = body.get("input", [])
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            time.sleep(latency_s)
+
+            payload = json.dumps({
+                "object": "list",
+                "model": body.get("model"),
+                "data": [
+                    {"object": "embedding", "index": i, "embedding": [float(len(text) % 7)] * DIMENSION}
+                    for i, text in enumerate(inputs)
+                ],
+                "usage": {"prompt_tokens": 0, "total_tokens": 0},
+            }).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return EmbeddingHandler
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=600)
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.latency_ms / 1000))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # The OpenAI client picks these up when config.config builds it.
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "local-benchmark")
+    os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "embedding_cache.sqlite3")
+
+    from services import embedding_service
+    from services.embedding_service import get_embedding, get_embeddings
+
+    chunks = [f"chunk {i} " + "lorem ipsum dolor sit amet " * 60 for i in range(args.chunks)]
+
+    # Measure the network paths first, without the cache in front of them.
+    embedding_service.EMBEDDING_CACHE_ENABLED = False
+
+    start = time.perf_counter()
+    sequential = [get_embedding(chunk) for chunk in chunks]
+    sequential_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = get_embeddings(chunks)
+    batched_s = time.perf_counter() - start
+
+    assert sequential == batched, "batched results must match per-chunk results in order"
+
+    embedding_service.EMBEDDING_CACHE_ENABLED = True
+    get_embeddings(chunks)
+    start = time.perf_counter()
+    get_embeddings(chunks)
+    cached_s = time.perf_counter() - start
+    stats = embedding_service.get_cache().stats
+
+    print(f"chunks:     {args.chunks}")
+    print(f"sequential: {sequential_s:.2f}s ({args.chunks / sequential_s:.0f} chunks/s)")
+    print(f"batched:    {batched_s:.2f}s ({args.chunks / batched_s:.0f} chunks/s)")
+    print(f"cached:     {cached_s:.3f}s (cache stats: {stats})")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# chatbot_desktop/benchmarks/bench_hybrid.py
+"""
+Per-query latency of HybridRetriever after warm-up.
+
+Run from the project root:
+    python -m benchmarks.bench_hybrid --docs 2000 --queries 200
+    python -m benchmarks.bench_hybrid --no-model   # hashed n-gram embeddings instead of the model
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+
+import pandas as pd
+
+from services.embedding_providers import HashingEmbeddingProvider
+from services.hybrid_retrieval import HybridRetriever
+
+QUERIES = [
+    "Show me TSLA related entries between 2022-03-01 and 2022-04-30.",
+    "How did GM trade around 2023-01-03?",
+    "F earnings news between 2024-01-01 and 2024-06-30",
+    "BYDDF volume spike",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", default="daily_stock_prices_5y_cleaned.csv")
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--no-model", action="store_true")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv, parse_dates=["Date"])
+    sample = df.sample(n=min(args.docs, len(df)), random_state=0)
+
+    start = time.perf_counter()
+    retriever = HybridRetriever(
+        df,
+        collection_name="bench_financial_docs",
+        persist_path=tempfile.mkdtemp(),
+        provider=HashingEmbeddingProvider() if args.no_model else None,
+    )
+    retriever.add_documents(
+        ids=[f"doc-{i}" for i in range(len(sample))],
+        documents=[
+            f"{row.Company} on {row.Date:%Y-%m-%d}: opened at {row.Open:.2f}, closed at {row.Close:.2f}"
+            for row in sample.itertuples()
+        ],
+        metadatas=[{"ticker": row.Company, "date": f"{row.Date:%Y-%m-%d}"} for row in sample.itertuples()],
+    )
+    retriever.warm_up()
+    print(f"setup (index + ingest + warm-up): {time.perf_counter() - start:.2f}s")
+
+    latencies = []
+    for i in range(args.queries):
+        start = time.perf_counter()
+        retriever.query(QUERIES[i % len(QUERIES)])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies.sort()
+    print(f"queries: {len(latencies)}")
+    print(f"p50: {statistics.median(latencies):.2f} ms")
+    print(f"p95: {latencies[int(len(latencies) * 0.95) - 1]:.2f} ms")
+    print(f"max: {latencies[-1]:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# chatbot_desktop/benchmarks/bench_startup.py
+"""
+Cold-start time of the desktop app, up to the point where the window can be built.
+
+Each run imports app.flet_app in a fresh interpreter (from a scratch working
+directory, so no caches or databases are reused) with STARTUP_REPORT=1.
+
+Run from the project root:
+    python -m benchmarks.bench_startup --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+SCRIPT = """
+import sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import app.flet_app as app
+app.start_services()
+app.startup_report.finish()
+app.startup_report.write({report!r})
+print(time.perf_counter() - start)
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    root = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+    env = dict(os.environ, STARTUP_REPORT="1")
+    env.setdefault("OPENAI_API_KEY", "local-benchmark")
+
+    timings, report = [], None
+    for _ in range(args.runs):
+        workdir = tempfile.mkdtemp()
+        report_path = os.path.join(workdir, "startup_report.json")
+        out = subprocess.run(
+            [sys.executable, "-c", SCRIPT.format(root=root, report=report_path)],
+            cwd=workdir, env=env, capture_output=True, text=True, check=True,
+        )
+        timings.append(float(out.stdout.strip().splitlines()[-1]) * 1000)
+        with open(report_path, encoding="utf-8") as f:
+            report = json.load(f)
+
+    print(f"import app.flet_app: median {statistics.median(timings):.0f} ms, "
+          f"min {min(timings):.0f} ms over {len(timings)} runs")
+    for phase in report["phases"]:
+        print(f"  {phase['label']:<48} {phase['seconds'] * 1000:8.1f} ms")
+    print("slowest imports in the last run (own time):")
+    slowest = sorted(report["imports"].items(), key=lambda item: -item[1]["own"])[:args.top]
+    for name, t in slowest:
+        print(f"  {name:<48} {t['own'] * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# chatbot_desktop/benchmarks/bench_vector_index.py
+"""
+Chroma vs. the in-process NumpyVectorIndex on the same random vectors:
+time to open an existing index, single-query latency, batched queries and
+filtered queries. Embedding is left out; both get precomputed vectors.
+
+Run from the project root:
+    python -m benchmarks.bench_vector_index --rows 20000 --dim 384
+    python -m benchmarks.bench_vector_index --rows 200000 --skip-chroma
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from services.vector_index import NumpyVectorIndex
+
+INSERT_BATCH = 5000
+TICKERS = ["TSLA", "GM", "F", "BYDDF"]
+
+
+def percentiles(latencies):
+    latencies = sorted(latencies)
+    return (f"p50 {statistics.median(latencies):7.2f} ms   "
+            f"p95 {latencies[max(0, int(len(latencies) * 0.95) - 1)]:7.2f} ms")
+
+
+def timed(fn, runs):
+    latencies = []
+    for i in range(runs):
+        start = time.perf_counter()
+        fn(i)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def bench(name, open_index, vectors, queries, args):
+    ids = [f"chunk-{i}" for i in range(len(vectors))]
+    metadatas = [{"ticker": TICKERS[i % len(TICKERS)]} for i in range(len(vectors))]
+    documents = [f"document {i}" for i in range(len(vectors))]
+
+    index = open_index()
+    start = time.perf_counter()
+    for i in range(0, len(vectors), INSERT_BATCH):
+        index.upsert(ids=ids[i:i + INSERT_BATCH], embeddings=vectors[i:i + INSERT_BATCH],
+                     documents=documents[i:i + INSERT_BATCH], metadatas=metadatas[i:i + INSERT_BATCH])
+    ingest = time.perf_counter() - start
+    del index
+
+    start = time.perf_counter()
+    index = open_index()
+    index.count()
+    opened = time.perf_counter() - start
+
+    single = timed(lambda i: index.query(query_embeddings=queries[i:i + 1], n_results=args.k), len(queries))
+    batch = args.batch
+    batched = timed(lambda i: index.query(query_embeddings=queries[:batch], n_results=args.k), 5)
+    filtered = timed(lambda i: index.query(query_embeddings=queries[i:i + 1], n_results=args.k,
+                                           where={"ticker": "GM"}), len(queries))
+
+    print(f"{name}")
+    print(f"  ingest            {ingest:8.2f} s")
+    print(f"  open + count      {opened * 1000:8.1f} ms")
+    print(f"  single query      {percentiles(single)}")
+    print(f"  {batch} queries at once {statistics.median(batched):8.2f} ms "
+          f"({statistics.median(batched) / batch:.2f} ms per query)")
+    print(f"  filtered query    {percentiles(filtered)}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--skip-chroma", action="store_true")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(args.rows, args.dim)).astype(np.float32)
+    queries = rng.normal(size=(max(args.queries, args.batch), args.dim)).astype(np.float32)
+    print(f"{args.rows} rows x {args.dim} dims, top {args.k}")
+
+    numpy_path = tempfile.mkdtemp()
+    bench("numpy (memory-mapped)", lambda: NumpyVectorIndex(numpy_path), vectors, queries, args)
+
+    if not args.skip_chroma:
+        import chromadb
+        chroma_path = tempfile.mkdtemp()
+
+        def open_chroma():
+            client = chromadb.PersistentClient(path=chroma_path)
+            return client.get_or_create_collection(name="bench", metadata={"hnsw:space": "cosine"})
+
+        bench("chroma (HNSW)", open_chroma, vectors, queries, args)
+
+
+if __name__ == "__main__":
+    main()
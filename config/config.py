@@ -1,5 +1,33 @@
 # config.py
 import os
-from openai import OpenAI
+import threading
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# The OpenAI SDK takes a noticeable part of a second to import, so clients
+# are built on first use rather than when this module is imported. Their own
+# retries are off: services/api_scheduler.py retries for the whole app.
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+                _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+    return _client
+
+
+def make_async_client():
+    # AsyncOpenAI's connection pool belongs to the event loop it is first used on,
+    # so callers keep one client per loop (see services/ai_service.py).
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+
+
+def __getattr__(name):
+    # Keeps `from config.config import client` working.
+    if name == "client":
+        return get_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,3 +2,130 @@ import os
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 EMBEDDING_MODEL = "text-embedding-ada-002"
+
+# Embedding backend for document search: "openai" (EMBEDDING_MODEL), or the
+# offline "sentence-transformers" (LOCAL_EMBEDDING_MODEL) and "hashing" ones.
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openai")
+LOCAL_EMBEDDING_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+LOCAL_EMBEDDING_BATCH_SIZE = int(os.getenv("LOCAL_EMBEDDING_BATCH_SIZE", "64"))
+LOCAL_EMBEDDING_WORKERS = int(os.getenv("LOCAL_EMBEDDING_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_EMBEDDING_DIM = int(os.getenv("HASH_EMBEDDING_DIM", "512"))
+
+# Batched embedding requests: a batch is closed as soon as either limit is hit.
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))
+EMBEDDING_BATCH_MAX_TOKENS = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "100000"))
+# Number of embedding batches allowed in flight at the same time.
+EMBEDDING_MAX_CONCURRENCY = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4"))
+
+# Embedding cache: in-memory LRU in front of a SQLite file next to ./vector_db.
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "1") == "1"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./vector_db/embedding_cache.sqlite3")
+EMBEDDING_CACHE_MEMORY_ITEMS = int(os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS", "10000"))
+EMBEDDING_CACHE_MAX_ITEMS = int(os.getenv("EMBEDDING_CACHE_MAX_ITEMS", "500000"))
+
+CHAT_MODEL = "gpt-4-turbo"  # or 'gpt-3.5-turbo'
+CHAT_TEMPERATURE = 0.8
+
+# Shared OpenAI scheduler (services/api_scheduler.py): requests and tokens
+# per minute for chat and for embeddings, calls in flight at once across the
+# app, and retries with exponential backoff (seconds) for 429s, timeouts and 5xx.
+OPENAI_CHAT_RPM = int(os.getenv("OPENAI_CHAT_RPM", "500"))
+OPENAI_CHAT_TPM = int(os.getenv("OPENAI_CHAT_TPM", "30000"))
+OPENAI_EMBEDDING_RPM = int(os.getenv("OPENAI_EMBEDDING_RPM", "3000"))
+OPENAI_EMBEDDING_TPM = int(os.getenv("OPENAI_EMBEDDING_TPM", "1000000"))
+OPENAI_MAX_IN_FLIGHT = int(os.getenv("OPENAI_MAX_IN_FLIGHT", "8"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "5"))
+OPENAI_RETRY_BASE_DELAY = float(os.getenv("OPENAI_RETRY_BASE_DELAY", "1"))
+OPENAI_RETRY_MAX_DELAY = float(os.getenv("OPENAI_RETRY_MAX_DELAY", "60"))
+
+# Chat completion cache (opt-in): identical requests (model, messages,
+# temperature) are answered from SQLite for RESPONSE_CACHE_TTL seconds.
+# Requests with temperature > 0 are sampled, so they bypass the cache
+# unless RESPONSE_CACHE_ALLOW_SAMPLING is set or the caller passes cache=True.
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "0") == "1"
+RESPONSE_CACHE_ALLOW_SAMPLING = os.getenv("RESPONSE_CACHE_ALLOW_SAMPLING", "0") == "1"
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", "./data/response_cache.sqlite3")
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", str(7 * 24 * 3600)))
+RESPONSE_CACHE_MAX_ITEMS = int(os.getenv("RESPONSE_CACHE_MAX_ITEMS", "5000"))
+RESPONSE_CACHE_MEMORY_ITEMS = int(os.getenv("RESPONSE_CACHE_MEMORY_ITEMS", "256"))
+
+# Rolling conversation context: recent turns are kept verbatim up to this
+# budget; older turns are folded into a running summary.
+CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "3000"))
+CONTEXT_SUMMARY_MAX_TOKENS = int(os.getenv("CONTEXT_SUMMARY_MAX_TOKENS", "400"))
+# Turns re-read into the context window when a saved conversation is reopened.
+CONTEXT_RESUME_TURNS = int(os.getenv("CONTEXT_RESUME_TURNS", "20"))
+
+# Where VectorService keeps document chunks: "chroma" or "numpy" (an
+# in-process, memory-mapped index; see services/vector_index.py).
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+
+# DocAgent retrieval: BM25 keyword hits (LEXICAL_INDEX_PATH) and vector hits
+# are merged by reciprocal rank fusion and the best DOC_TOP_K chunks kept.
+# Either side can be turned off by setting its top-k to 0.
+LEXICAL_INDEX_PATH = os.getenv("LEXICAL_INDEX_PATH", "./vector_db/lexical_index.sqlite3")
+DOC_TOP_K = int(os.getenv("DOC_TOP_K", "3"))
+DOC_VECTOR_TOP_K = int(os.getenv("DOC_VECTOR_TOP_K", "5"))
+DOC_LEXICAL_TOP_K = int(os.getenv("DOC_LEXICAL_TOP_K", "10"))
+DOC_RRF_K = int(os.getenv("DOC_RRF_K", "60"))
+
+# Per-document manifests of ingested chunk hashes, used for incremental re-ingestion.
+# Chunks are embedded and written in batches, sent once a batch holds
+# INGEST_BATCH_SIZE chunks or INGEST_BATCH_MAX_CHARS characters, or its first
+# chunk has waited INGEST_FLUSH_SECONDS, so a slow stream still shows up early.
+INGEST_MANIFEST_DIR = os.getenv("INGEST_MANIFEST_DIR", "./vector_db/manifests")
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "256"))
+INGEST_BATCH_MAX_CHARS = int(os.getenv("INGEST_BATCH_MAX_CHARS", "200000"))
+INGEST_FLUSH_SECONDS = float(os.getenv("INGEST_FLUSH_SECONDS", "1.0"))
+
+# Parallel PDF text extraction: page ranges handed to a process pool.
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(8, os.cpu_count() or 1))))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+
+# Spreadsheet loading: CSVs above the byte threshold are read in row chunks;
+# loaded files are cached as Parquet keyed by path, mtime and size.
+SPREADSHEET_CACHE_DIR = os.getenv("SPREADSHEET_CACHE_DIR", "./temp/spreadsheet_cache")
+SPREADSHEET_CHUNKED_BYTES = int(os.getenv("SPREADSHEET_CHUNKED_BYTES", str(256 * 1024 * 1024)))
+SPREADSHEET_CHUNK_ROWS = int(os.getenv("SPREADSHEET_CHUNK_ROWS", "500000"))
+
+# Rendered chart cache (PNG bytes held in memory, LRU).
+PLOT_CACHE_ITEMS = int(os.getenv("PLOT_CACHE_ITEMS", "64"))
+# Line charts with more points than this are min/max-decimated before drawing.
+PLOT_MAX_LINE_POINTS = int(os.getenv("PLOT_MAX_LINE_POINTS", "4000"))
+
+# WebAgent fetching: pages younger than WEB_CACHE_TTL seconds are served from
+# Blackboard.web_contents; older ones are revalidated with a conditional GET.
+WEB_CACHE_TTL = int(os.getenv("WEB_CACHE_TTL", "300"))
+WEB_CACHE_MAX_AGE = int(os.getenv("WEB_CACHE_MAX_AGE", str(24 * 3600)))
+WEB_CACHE_MAX_ENTRIES = int(os.getenv("WEB_CACHE_MAX_ENTRIES", "200"))
+WEB_MAX_BYTES = int(os.getenv("WEB_MAX_BYTES", str(2 * 1024 * 1024)))
+WEB_TIMEOUT = float(os.getenv("WEB_TIMEOUT", "10"))
+# Readable page text is split into passages of this size, and the passages
+# most relevant to the question are sent to the model within the budget.
+WEB_PASSAGE_TOKENS = int(os.getenv("WEB_PASSAGE_TOKENS", "200"))
+WEB_CONTEXT_TOKENS = int(os.getenv("WEB_CONTEXT_TOKENS", "1500"))
+
+# Seconds AgentManager.route_query_async waits for an agent before giving up.
+ROUTE_TIMEOUT = float(os.getenv("ROUTE_TIMEOUT", "120"))
+
+# Chat UI: worker threads answering messages, and how many may wait in line.
+CHAT_WORKERS = int(os.getenv("CHAT_WORKERS", "2"))
+CHAT_QUEUE_MAX = int(os.getenv("CHAT_QUEUE_MAX", "20"))
+# Chat messages kept mounted in the UI, and how many older ones to add per scroll-up.
+CHAT_MAX_MOUNTED = int(os.getenv("CHAT_MAX_MOUNTED", "120"))
+CHAT_PAGE_SIZE = int(os.getenv("CHAT_PAGE_SIZE", "40"))
+
+# SQLite database holding every conversation (see storage/conversation_store.py).
+CONVERSATION_DB_PATH = os.getenv("CONVERSATION_DB_PATH", "./data/conversations.sqlite3")
+
+# Set STARTUP_REPORT=1 to time imports and service start-up; the report is
+# logged and written to STARTUP_REPORT_PATH once the window is built.
+STARTUP_REPORT = os.getenv("STARTUP_REPORT", "0") not in ("", "0", "false")
+STARTUP_REPORT_PATH = os.getenv("STARTUP_REPORT_PATH", "./temp/startup_report.json")
+
+# Per-stage tracing (utils/tracing.py): span latencies, token counts and cache
+# hit rates, shown in the app's debug panel. The last TRACE_RECENT_SPANS spans
+# are kept in memory; set TRACE_PATH to also append every span there as JSON lines.
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "1") not in ("", "0", "false")
+TRACE_PATH = os.getenv("TRACE_PATH", "")
+TRACE_RECENT_SPANS = int(os.getenv("TRACE_RECENT_SPANS", "500"))
@@ -1,30 +1,100 @@
 # chatbot_desktop/core/agent_manager.py
 
+import asyncio
+import importlib
+import threading
+
+from config.settings import ROUTE_TIMEOUT
 from storage.blackboard import Blackboard
-from core.agents.doc_agent import DocAgent
-from core.agents.data_agent import DataAgent
-from core.agents.general_agent import GeneralAgent
-from core.agents.web_agent import WebAgent
+from storage.file_handler import read_file_pages
+from utils.tracing import continue_trace, current_trace, get_tracer
+
+
+class _LazyAgent:
+    """
+    Class attribute that builds the agent (importing its module, and with it
+    pandas, chromadb, the OpenAI SDK...) on first access and then stores it
+    on the instance, so later lookups are plain attribute reads.
+    """
+
+    def __init__(self, module, class_name):
+        self.module = module
+        self.class_name = class_name
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, manager, owner=None):
+        if manager is None:
+            return self
+        with manager._agents_lock:
+            agent = manager.__dict__.get(self.name)
+            if agent is None:
+                agent_class = getattr(importlib.import_module(self.module), self.class_name)
+                agent = manager.__dict__[self.name] = agent_class(manager.blackboard)
+                context = getattr(agent, "context", None)
+                if context is not None and manager.blackboard.conversation_history:
+                    # Don't reread (and summarize) a whole reopened conversation on the first query.
+                    context.resume(manager.blackboard.conversation_history)
+        return agent
+
+
+async def _in_trace(trace, coro):
+    # Runs `coro` as part of the caller's trace on the manager's event loop.
+    with continue_trace(trace):
+        return await coro
 
 
 class AgentManager:
-    def __init__(self):
-        self.blackboard = Blackboard()
-        self.doc_agent = DocAgent(self.blackboard)
-        self.data_agent = DataAgent(self.blackboard)
-        self.web_agent = WebAgent(self.blackboard)
-        self.general_agent = GeneralAgent(self.blackboard)
+    # Agents are created the first time they are used.
+    doc_agent = _LazyAgent("core.agents.doc_agent", "DocAgent")
+    data_agent = _LazyAgent("core.agents.data_agent", "DataAgent")
+    web_agent = _LazyAgent("core.agents.web_agent", "WebAgent")
+    general_agent = _LazyAgent("core.agents.general_agent", "GeneralAgent")
+
+    def __init__(self, conversation_history=None):
+        """
+        `conversation_history` may be a SessionHistory to share a persisted
+        conversation; by default history is an in-memory list.
+        """
+        self.blackboard = Blackboard(conversation_history)
+        self._agents_lock = threading.RLock()
 
         # Active agent can be doc_agent, data_agent, or None
         self.active_agent = None
+        # HybridRetriever over the active DataFrame, created on first use
+        self._hybrid = None
+        self._hybrid_df_id = None
+        # (event loop, task) of the request currently being answered
+        self._inflight = None
+        # Event loop behind the sync route_query, started on first use
+        self._loop = None
+        self._loop_lock = threading.Lock()
 
     def load_document(self, doc_id, text):
         """
-        Stores the doc text in blackboard, sets DocAgent as active.
+        Stores the doc text in blackboard, ingests it into Chroma
+        (incrementally, if it was loaded before) and sets DocAgent as active.
         """
         self.blackboard.documents[doc_id] = text
-        # If you want to ingest into Chroma here, you can do:
-        # self.doc_agent.ingest_document(doc_id, text)
+        self.doc_agent.ingest_document(doc_id, text)
+        self.active_agent = self.doc_agent
+
+    def load_document_file(self, doc_id, file_path):
+        """
+        Like load_document, but streams the file page by page: chunking and
+        embedding start on the first pages while later ones are still being
+        extracted.
+        """
+        pages = []
+
+        def collect_pages():
+            for page_text in read_file_pages(file_path):
+                pages.append(page_text)
+                yield page_text + "\n"
+
+        self.doc_agent.ingest_document(doc_id, collect_pages())
+        self.blackboard.documents[doc_id] = "\n".join(pages)
         self.active_agent = self.doc_agent
 
     def load_dataframe(self, df_id, df):
@@ -35,36 +105,167 @@ class AgentManager:
         self.data_agent.set_active_df(df_id)
         self.active_agent = self.data_agent
 
-    def route_query(self, user_msg):
+    def load_dataframe_file(self, df_id, file_path):
         """
-        Routes user_msg to whichever agent is active, or fallback.
+        Loads a CSV/XLSX file (through the Parquet cache when possible) as a
+        DataFrame. Returns the SpreadsheetLoad, whose summary_text() comes
+        from the same single read.
         """
-        self.blackboard.conversation_history.append(
-            {"role": "user", "content": user_msg}
-        )
+        from storage.spreadsheet_loader import load_spreadsheet
+        loaded = load_spreadsheet(file_path)
+        self.load_dataframe(df_id, loaded.dataframe)
+        return loaded
+
+    def get_hybrid_retriever(self, **kwargs):
+        """
+        Returns a HybridRetriever over the active DataFrame, reusing the
+        DataAgent's index. It is built once and kept until another DataFrame
+        becomes active, so the model and collection stay warm across queries.
+        """
+        df_id = self.data_agent.active_df_id
+        if df_id is None or df_id not in self.blackboard.dataframes:
+            raise ValueError("No dataframe is currently loaded.")
+        if self._hybrid is None or self._hybrid_df_id != df_id:
+            from services.hybrid_retrieval import HybridRetriever
+            index = self.data_agent.indexes.get(df_id)
+            df = self.blackboard.dataframes[df_id]
+            self._hybrid = HybridRetriever(df, index=index, **kwargs)
+            self._hybrid_df_id = df_id
+        return self._hybrid
+
+    def hybrid_query(self, text, **kwargs):
+        """
+        Semantic + numeric query against the active DataFrame; see HybridRetriever.query.
+        """
+        return self.get_hybrid_retriever().query(text, **kwargs)
 
+    def _select_agent(self, user_msg):
         lower_msg = user_msg.lower()
         if "fetch http" in lower_msg or "scrape http" in lower_msg:
-            response = self.web_agent.handle_query(user_msg)
-
+            return self.web_agent
         elif self.active_agent:
             # If an agent is active, route to it
-            response = self.active_agent.handle_query(user_msg)
+            return self.active_agent
         else:
             # Fallback to general agent
-            response = self.general_agent.handle_query(user_msg)
+            return self.general_agent
+
+    def route_query(self, user_msg):
+        """
+        Routes user_msg to whichever agent is active, or fallback.
+        Blocking wrapper around route_query_async, run on the manager's own
+        event loop so it can be called from any thread.
+        """
+        coro = _in_trace(current_trace(), self.route_query_async(user_msg))
+        future = asyncio.run_coroutine_threadsafe(coro, self._get_loop())
+        return future.result()
+
+    async def route_query_async(self, user_msg, timeout=ROUTE_TIMEOUT):
+        """
+        Async variant of route_query. A new request cancels the one still in
+        flight, as does reset_all; the cancelled call returns None and records
+        no response. An agent that takes longer than `timeout` seconds is
+        cancelled and an error message is returned instead.
+        Steps an agent has handed to a worker thread can't be interrupted;
+        their results are discarded.
+        """
+        self.cancel_current()
+        self.blackboard.conversation_history.append(
+            {"role": "user", "content": user_msg}
+        )
+
+        with get_tracer().span("route") as span:
+            agent = self._select_agent(user_msg)
+            span.set(agent=type(agent).__name__)
+            task = asyncio.ensure_future(agent.handle_query_async(user_msg))
+            inflight = (asyncio.get_running_loop(), task)
+            self._inflight = inflight
+            try:
+                response = await asyncio.wait_for(task, timeout)
+            except asyncio.TimeoutError:
+                span.set(timed_out=True)
+                response = f"[ERROR] No response within {timeout:g} seconds."
+            except asyncio.CancelledError:
+                if asyncio.current_task().cancelling():
+                    raise  # our caller cancelled us, not a newer request
+                span.set(superseded=True)
+                return None
+            finally:
+                if self._inflight is inflight:
+                    self._inflight = None
 
         self.blackboard.conversation_history.append(
             {"role": "assistant", "content": response}
         )
         return response
 
+    def cancel_current(self):
+        """
+        Cancels the request route_query_async is currently waiting on, if any.
+        Safe to call from any thread.
+        """
+        inflight, self._inflight = self._inflight, None
+        if inflight is not None:
+            loop, task = inflight
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(task.cancel)
+
+    def _get_loop(self):
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="agent-manager-loop", daemon=True).start()
+            return self._loop
+
+    def route_query_stream(self, user_msg, agent=None):
+        """
+        Streaming variant of route_query: yields response deltas as the
+        agent produces them, and records the full response in the
+        conversation history once the stream is exhausted. `agent` answers
+        instead of the one routing would pick, if given. A reader that stops
+        early (closes the generator) records no response, like a cancelled
+        route_query_async.
+        """
+        self.cancel_current()
+        self.blackboard.conversation_history.append(
+            {"role": "user", "content": user_msg}
+        )
+
+        parts = []
+        if agent is None:
+            agent = self._select_agent(user_msg)
+        span = get_tracer().start_span("route", agent=type(agent).__name__, stream=True)
+        deltas = agent.handle_query_stream(user_msg)
+        try:
+            for delta in deltas:
+                parts.append(delta)
+                yield delta
+        except GeneratorExit:
+            span.set(cancelled=True)
+            raise
+        finally:
+            deltas.close()  # ends the agent's completion stream now, not at garbage collection
+            span.end()
+
+        self.blackboard.conversation_history.append(
+            {"role": "assistant", "content": "".join(parts).strip()}
+        )
+
     def reset_all(self):
+        self.cancel_current()
         self.blackboard.conversation_history.clear()
         self.blackboard.documents.clear()
         self.blackboard.dataframes.clear()
         self.blackboard.web_contents.clear()
         self.blackboard.intermediate.clear()
+        # Only agents that were actually created have state to drop.
+        for name in ("general_agent", "web_agent"):
+            if name in self.__dict__:
+                self.__dict__[name].context.reset()
+        if "data_agent" in self.__dict__:
+            self.data_agent.indexes.clear()
+        self._hybrid = None
+        self._hybrid_df_id = None
         self.active_agent = None
 
     def set_active_agent(self, agent_name: str):
@@ -1,5 +1,6 @@
 # chatbot_desktop/core/agents/base_agent.py
 
+import asyncio
 import logging
 from storage.blackboard import Blackboard
 
@@ -18,3 +19,19 @@ class BaseAgent:
         Subclasses must implement how queries are handled.
         """
         raise NotImplementedError("handle_query must be overridden by subclasses.")
+
+    def handle_query_stream(self, user_message: str):
+        """
+        Yields the response in pieces as they become available.
+        Agents backed by a streaming completion override this; the default
+        yields the whole handle_query result at once.
+        """
+        yield self.handle_query(user_message)
+
+    async def handle_query_async(self, user_message: str) -> str:
+        """
+        Coroutine version of handle_query, used by AgentManager.route_query_async.
+        The default runs handle_query in a worker thread; agents override it
+        to await the async OpenAI client and to run independent steps concurrently.
+        """
+        return await asyncio.to_thread(self.handle_query, user_message)
@@ -1,20 +1,44 @@
 # chatbot_desktop/core/agents/data_agent.py
 
 import pandas as pd
-import matplotlib.pyplot as plt
-from io import BytesIO
-import base64
 
 from .base_agent import BaseAgent
+from services.plot_service import PlotService
+from services.timeseries_index import TimeSeriesIndex, parse_query
+
+
+# How answer_query names an aggregation a column can't take.
+AGGREGATION_VERBS = {"mean": "average", "sum": "total", "min": "take the minimum of", "max": "take the maximum of"}
 
 
 class DataAgent(BaseAgent):
+    KEYWORDS = ("head", "describe", "plot")
+
     def __init__(self, blackboard):
         super().__init__(blackboard)
         self.active_df_id = None
+        self.plot_service = PlotService()
+        self.indexes = {}
 
-    def set_active_df(self, df_id):
+    def set_active_df(self, df_id, key_column="Company", date_column="Date"):
+        """
+        Makes df_id the active DataFrame and, if it has key/date columns,
+        builds its time series index up front so queries don't scan.
+        """
         self.active_df_id = df_id
+        df = self.blackboard.dataframes.get(df_id)
+        if df is not None and df_id not in self.indexes and {key_column, date_column} <= set(df.columns):
+            self.indexes[df_id] = TimeSeriesIndex(df, key_column, date_column)
+
+    def can_handle(self, user_msg: str) -> bool:
+        """
+        Whether user_msg looks like one of the data queries this agent answers.
+        """
+        lower_msg = user_msg.lower()
+        if any(keyword in lower_msg for keyword in self.KEYWORDS):
+            return True
+        index = self.indexes.get(self.active_df_id)
+        return index is not None and parse_query(user_msg, index) is not None
 
     def handle_query(self, user_msg: str) -> str:
         self.logger.debug("DataAgent handling query.")
@@ -31,30 +55,80 @@ class DataAgent(BaseAgent):
         elif "describe" in lower_msg:
             return str(df.describe(include="all"))
         elif "plot" in lower_msg:
-            return self.make_plot(df)
-        else:
-            return (
-                "DataAgent didn't understand your request. Try keywords like 'head', "
-                "'describe', or 'plot'."
+            return self.plot_from_message(df, user_msg)
+
+        index = self.indexes.get(self.active_df_id)
+        query = parse_query(user_msg, index) if index is not None else None
+        if query:
+            return self.answer_query(index, query)
+
+        return (
+            "DataAgent didn't understand your request. Try keywords like 'head', "
+            "'describe', 'plot', or e.g. 'mean Close and total Volume for TSLA "
+            "between 2022-03-01 and 2022-04-30'."
+        )
+
+    def answer_query(self, index: TimeSeriesIndex, query: dict) -> str:
+        unsupported = [(agg, column) for agg, column in query["aggregations"] if not index.supports(agg, column)]
+        if unsupported:
+            return "\n".join(
+                f"Can't {AGGREGATION_VERBS[agg]} column '{column}': it holds {_describe_dtype(index, column)} values."
+                for agg, column in unsupported
             )
 
-    def make_plot(self, df: pd.DataFrame) -> str:
+        start, end = query["start"], query["end"]
+        period = f"{start} to {end}" if start else "all dates"
+        lines = []
+        for key in query["keys"]:
+            row_count, results = index.aggregate(key, query["aggregations"], start, end)
+            if not row_count:
+                lines.append(f"{key} ({period}): no rows.")
+                continue
+            values = ", ".join(
+                f"{agg} {column} = {_format_number(value)}" for (agg, column), value in results.items()
+            )
+            lines.append(f"{key} ({period}, {row_count} rows): {values}")
+        return "\n".join(lines)
+
+    def plot_from_message(self, df: pd.DataFrame, user_msg: str) -> str:
+        """
+        Picks the column (first numeric one mentioned, else the first numeric
+        column) and chart type ('line' if asked for, else histogram), renders
+        it and leaves the PNG bytes in blackboard.intermediate["image"] for
+        the UI to display. Returns the caption.
+        """
         numeric_cols = df.select_dtypes(include=["float", "int"]).columns
         if len(numeric_cols) < 1:
             return "No numeric columns to plot."
 
-        # For simplicity, plot the first numeric column
-        col = numeric_cols[0]
-        plt.figure()
-        df[col].plot(kind='hist', title=f"Histogram of {col}", bins=20)
+        lower_msg = user_msg.lower()
+        col = next((c for c in numeric_cols if str(c).lower() in lower_msg), numeric_cols[0])
+        kind = "line" if "line" in lower_msg else "hist"
 
-        buf = BytesIO()
-        plt.savefig(buf, format='png')
-        plt.close()
-        buf.seek(0)
-        img_base64 = base64.b64encode(buf.read()).decode('utf-8')
+        self.blackboard.intermediate["image"] = self.make_plot(df, col, kind)
+        if kind == "line":
+            return f"Here is a line chart of '{col}':"
+        return f"Here is a histogram of '{col}':"
 
-        return (
-            f"Here is a histogram of '{col}' as a base64 image:\n"
-            f"<img src='data:image/png;base64,{img_base64}'/>"
-        )
+    def make_plot(self, df: pd.DataFrame, col=None, kind="hist") -> bytes:
+        """
+        Returns the chart of `col` (default: first numeric column) as PNG bytes.
+        """
+        if col is None:
+            col = df.select_dtypes(include=["float", "int"]).columns[0]
+        return self.plot_service.render(df, col, kind=kind)
+
+
+def _describe_dtype(index, column):
+    kind = index.column(column).dtype.kind
+    return {"M": "date", "m": "duration", "O": "text", "U": "text"}.get(kind, str(index.column(column).dtype))
+
+
+def _format_number(value):
+    if isinstance(value, (int, float)) or hasattr(value, "dtype"):
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return str(value)
+        return f"{number:,.0f}" if number.is_integer() else f"{number:,.2f}"
+    return str(value)
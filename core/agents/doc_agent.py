@@ -1,28 +1,54 @@
 # chatbot_desktop/core/agents/doc_agent.py
 
 from .base_agent import BaseAgent
+from config.settings import DOC_TOP_K, DOC_VECTOR_TOP_K, DOC_LEXICAL_TOP_K, DOC_RRF_K
+from services.api_scheduler import INTERACTIVE, request_priority
+from services.lexical_index import LexicalIndex
 from services.vector_service import VectorService
-from utils.chunker import chunk_text
+from services.ingestion_service import IngestionService
+from utils.text_ranking import reciprocal_rank_fusion
+from utils.tracing import get_tracer
 
 
 class DocAgent(BaseAgent):
     def __init__(self, blackboard):
         super().__init__(blackboard)
         self.vector_service = VectorService()
+        self.lexical_index = LexicalIndex()
+        self.ingestion = IngestionService(self.vector_service, lexical_index=self.lexical_index)
 
     def ingest_document(self, document_id, text, metadata=None):
         """
-        Chunks the doc text and stores it in Chroma
+        Chunks the doc text (a string, or an iterable of pages) on paragraph
+        and sentence boundaries and stores it in the vector store and the
+        keyword index. Chunks already stored for this document are reused;
+        removed ones are deleted.
         """
-        chunks = chunk_text(text)
-        self.vector_service.add_document(document_id, chunks, metadata)
+        stats = self.ingestion.ingest(document_id, text, metadata)
+        self.logger.debug("Ingested %s: %s", document_id, stats)
+        return stats
 
-    def query_document(self, query_text):
+    def query_document(self, query_text, top_k=DOC_TOP_K, vector_k=DOC_VECTOR_TOP_K,
+                       lexical_k=DOC_LEXICAL_TOP_K):
         """
-        Queries Chroma for relevant context
+        Finds the chunks most relevant to `query_text`: up to `vector_k`
+        nearest chunks by embedding and `lexical_k` best BM25 keyword matches
+        (exact tickers, ids, numbers) are merged by reciprocal rank fusion,
+        and the best `top_k` joined as context. A side with k=0 is skipped.
         """
-        results = self.vector_service.search(query_text, top_k=3)
-        context = "\n---\n".join(chunk for chunk, _ in results)
+        searches = []
+        if lexical_k > 0:
+            with get_tracer().span("retrieval.lexical", top_k=lexical_k):
+                searches.append(self.lexical_index.search(query_text, top_k=lexical_k))
+        if vector_k > 0:
+            # The query embedding goes ahead of any ingestion still running.
+            with request_priority(INTERACTIVE):
+                searches.append(self.vector_service.search(query_text, top_k=vector_k, with_ids=True))
+
+        chunks = {chunk_id: chunk for hits in searches for chunk_id, chunk, _ in hits}
+        rankings = [[chunk_id for chunk_id, _, _ in hits] for hits in searches]
+        fused = reciprocal_rank_fusion(rankings, k=DOC_RRF_K)[:top_k]
+        context = "\n---\n".join(chunks[chunk_id] for chunk_id, _ in fused)
         return context
 
     def handle_query(self, user_msg):
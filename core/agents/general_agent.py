@@ -1,18 +1,47 @@
 # chatbot_desktop/core/agents/general_agent.py
 
+import asyncio
+
 from .base_agent import BaseAgent
-from services.ai_service import ask_chatgpt
+from services.ai_service import ask_chatgpt, ask_chatgpt_async, ask_chatgpt_stream
+from services.context_builder import ContextBuilder
+
+
+def format_turn(c):
+    role = c["role"]
+    content = c["content"]
+    if role == "system":
+        return f"[System message]: {content}\n"
+    elif role == "user":
+        return f"User: {content}\n"
+    else:
+        return f"Assistant: {content}\n"
 
 
 class GeneralAgent(BaseAgent):
+    def __init__(self, blackboard):
+        super().__init__(blackboard)
+        self.context = ContextBuilder(format_turn=format_turn)
+
+    def build_prompt(self, user_msg):
+        history = self.blackboard.conversation_history
+        conv_text = self.context.build(history)
+        # AgentManager records the user's turn before handing it to us.
+        last = history[-1] if len(history) else None
+        if last is not None and last["role"] == "user" and last["content"] == user_msg:
+            return f"{conv_text}Assistant:"
+        return f"{conv_text}\nUser: {user_msg}\nAssistant:"
+
     def handle_query(self, user_msg):
         self.logger.debug("GeneralAgent fallback.")
+        return ask_chatgpt(self.build_prompt(user_msg))
 
-        conv_text = ""
-        for msg in self.blackboard.conversation_history:
-            role = msg["role"]
-            content = msg["content"]
-            conv_text += f"{role.capitalize()}: {content}\n"
+    def handle_query_stream(self, user_msg):
+        self.logger.debug("GeneralAgent fallback (streaming).")
+        yield from ask_chatgpt_stream(self.build_prompt(user_msg))
 
-        prompt = f"{conv_text}\nUser: {user_msg}\nAssistant:"
-        return ask_chatgpt(prompt)
+    async def handle_query_async(self, user_msg):
+        self.logger.debug("GeneralAgent fallback (async).")
+        # build_prompt may summarize older turns (a blocking completion call).
+        prompt = await asyncio.to_thread(self.build_prompt, user_msg)
+        return await ask_chatgpt_async(prompt)
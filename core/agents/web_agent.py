@@ -1,49 +1,124 @@
 # chatbot_desktop/core/agents/web_agent.py
 
-import requests
+import asyncio
+
 from .base_agent import BaseAgent
-from services.ai_service import ask_chatgpt
+from services.ai_service import ask_chatgpt, ask_chatgpt_async, ask_chatgpt_stream
+from services.context_builder import ContextBuilder
+from services.web_fetcher import QUERY_STOPWORDS, WebFetcher
+from config.settings import WEB_PASSAGE_TOKENS, WEB_CONTEXT_TOKENS
+from utils.chunker import iter_chunks
+from utils.html_text import html_to_text, looks_like_html
+from utils.text_ranking import select_passages
+from utils.tokens import count_tokens
+
+NO_URL_MESSAGE = "No URL found in your request. Try 'fetch http://...' or 'scrape https://...'"
 
 
 class WebAgent(BaseAgent):
-    def handle_query(self, user_msg):
-        self.logger.debug("WebAgent handling query!")
+    def __init__(self, blackboard):
+        super().__init__(blackboard)
+        self.context = ContextBuilder()
+        self.fetcher = WebFetcher(cache=blackboard.web_contents)
+
+    def build_prompt(self, user_msg):
+        """
+        Fetches the URL in user_msg and builds the interpretation prompt.
+        Returns (prompt, None) on success or (None, message) if there is
+        nothing to send to the model.
+        """
+        url = self.start_fetch(user_msg)
+        if not url:
+            return None, NO_URL_MESSAGE
 
+        page_text, error = self.fetch_page_text(url, user_msg)
+        if error:
+            return None, error
+        conv_text = self.context.build(self.blackboard.conversation_history)
+        return self.compose_prompt(conv_text, page_text, user_msg), None
+
+    def start_fetch(self, user_msg):
+        """
+        Notes the fetch in the history and returns the URL in user_msg, or None.
+        """
         self.blackboard.conversation_history.append(
             {"role": "system", "content": "(WebAgent fetching a URL...)"}
         )
 
         # Naive parse for 'http/https' in user_msg
-        words = user_msg.split()
-        url = None
-        for w in words:
+        for w in user_msg.split():
             if w.startswith("http://") or w.startswith("https://"):
-                url = w
-                break
-
-        if not url:
-            return "No URL found in your request. Try 'fetch http://...' or 'scrape https://...'"
+                return w
+        return None
 
+    def fetch_page_text(self, url, user_msg):
+        """
+        Returns (relevant page text, None), or (None, error message).
+        """
         try:
-            resp = requests.get(url, timeout=10)
-            if resp.status_code == 200:
-                page_text = resp.text
-                truncated = page_text[:3000]
-
-                conv_text = ""
-                for c in self.blackboard.conversation_history:
-                    role = c["role"]
-                    content = c["content"]
-                    conv_text += f"{role.capitalize()}: {content}\n"
-
-                prompt = (
-                    f"{conv_text}\n\n"
-                    f"Fetched webpage:\n{truncated}\n\n"
-                    f"User asked: {user_msg}"
-                )
-                interpretation = ask_chatgpt(prompt)
-                return interpretation
-            else:
-                return f"Failed to fetch {url}. HTTP status {resp.status_code}"
+            page = self.fetcher.fetch(url)
+            self.logger.debug("Fetched %s from %s", url, page["source"])
+            if page["status"] != 200:
+                return None, f"Failed to fetch {url}. HTTP status {page['status']}"
+            return self.relevant_text(page["text"], user_msg.replace(url, " ")), None
         except Exception as e:
-            return f"Error fetching {url}: {str(e)}"
+            return None, f"Error fetching {url}: {str(e)}"
+
+    def compose_prompt(self, conv_text, page_text, user_msg):
+        return (
+            f"{conv_text}\n\n"
+            f"Fetched webpage:\n{page_text}\n\n"
+            f"User asked: {user_msg}"
+        )
+
+    def relevant_text(self, page_text, question):
+        """
+        Reduces a fetched page to the passages most relevant to `question`,
+        within WEB_CONTEXT_TOKENS, instead of sending its first few KB
+        (which for most pages is navigation and markup).
+        """
+        if looks_like_html(page_text):
+            page_text = html_to_text(page_text)
+        try:
+            passages = list(iter_chunks(page_text, max_tokens=WEB_PASSAGE_TOKENS, overlap=0))
+        except RuntimeError:
+            # No tokenizer available: fall back to the extracted paragraphs.
+            passages = [p for p in page_text.split("\n\n") if p.strip()]
+        selected = select_passages(question, passages, WEB_CONTEXT_TOKENS, count_tokens, QUERY_STOPWORDS)
+        if not selected:
+            # Every passage is over budget on its own; keep the start of the text.
+            return page_text[: WEB_CONTEXT_TOKENS * 4]
+        return "\n\n".join(selected)
+
+    def handle_query(self, user_msg):
+        self.logger.debug("WebAgent handling query!")
+
+        prompt, message = self.build_prompt(user_msg)
+        if prompt is None:
+            return message
+        return ask_chatgpt(prompt)
+
+    def handle_query_stream(self, user_msg):
+        self.logger.debug("WebAgent handling query (streaming)!")
+
+        prompt, message = self.build_prompt(user_msg)
+        if prompt is None:
+            yield message
+            return
+        yield from ask_chatgpt_stream(prompt)
+
+    async def handle_query_async(self, user_msg):
+        self.logger.debug("WebAgent handling query (async)!")
+
+        url = self.start_fetch(user_msg)
+        if not url:
+            return NO_URL_MESSAGE
+
+        # The page download and the history summary don't depend on each other.
+        (page_text, error), conv_text = await asyncio.gather(
+            asyncio.to_thread(self.fetch_page_text, url, user_msg),
+            asyncio.to_thread(self.context.build, self.blackboard.conversation_history),
+        )
+        if error:
+            return error
+        return await ask_chatgpt_async(self.compose_prompt(conv_text, page_text, user_msg))
@@ -1,23 +1,226 @@
 # services/ai_service.py
 
-from openai import OpenAI
-from config.config import client
+import asyncio
+import threading
+import weakref
 
-client = client
+from config.config import get_client, make_async_client
+from config.settings import (
+    CHAT_MODEL,
+    CHAT_TEMPERATURE,
+    RESPONSE_CACHE_ENABLED,
+    RESPONSE_CACHE_ALLOW_SAMPLING,
+)
+from services.api_scheduler import get_scheduler
+from services.response_cache import response_key
+from utils.tokens import count_tokens
+from utils.tracing import get_tracer
 
+_async_clients = weakref.WeakKeyDictionary()  # event loop -> AsyncOpenAI
 
-def ask_chatgpt(message, system_prompt=None):
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_async_client():
+    """
+    Returns the AsyncOpenAI client for the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    async_client = _async_clients.get(loop)
+    if async_client is None:
+        async_client = _async_clients[loop] = make_async_client()
+    return async_client
+
+
+def get_response_cache():
+    """
+    Returns the process-wide ResponseCache, opened on first use.
+    """
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            from services.response_cache import ResponseCache
+            _response_cache = ResponseCache()
+    return _response_cache
+
+
+def _cache_for(messages, temperature, cache):
+    """
+    Returns (response_cache, key) if this request may be answered from the
+    cache, else (None, None). `cache` True/False forces it on or off; None
+    follows RESPONSE_CACHE_ENABLED and skips sampled (temperature > 0)
+    requests unless RESPONSE_CACHE_ALLOW_SAMPLING is set.
+    """
+    if cache is None:
+        cache = RESPONSE_CACHE_ENABLED and (temperature == 0 or RESPONSE_CACHE_ALLOW_SAMPLING)
+    if not cache:
+        return None, None
+    return get_response_cache(), response_key(CHAT_MODEL, messages, temperature=temperature)
+
+
+def _prompt_tokens(messages):
+    # Estimate drawn from the tokens-per-minute budget before the call.
+    return sum(count_tokens(m["content"], CHAT_MODEL) + 4 for m in messages)
+
+
+def _charge_completion(response, span, messages):
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        get_scheduler().charge("chat", usage.completion_tokens)
+        _record_tokens(span, usage.prompt_tokens, usage.completion_tokens)
+    else:
+        _record_tokens(span, _prompt_tokens(messages), 0)
+
+
+def _record_tokens(span, prompt, completion):
+    span.set(prompt_tokens=prompt, completion_tokens=completion)
+    get_tracer().record_tokens(CHAT_MODEL, prompt, completion)
+
+
+def _cached_response(response_cache, key, span):
+    cached = response_cache.get(key)
+    get_tracer().record_cache("response", hits=int(cached is not None), misses=int(cached is None))
+    span.set(cache_hit=cached is not None)
+    return cached
+
+
+def _build_messages(message, system_prompt=None):
     messages = []
     if system_prompt:
         messages.append({"role": "system", "content": system_prompt})
     messages.append({"role": "user", "content": message})
+    return messages
+
+
+def ask_chatgpt(message, system_prompt=None, temperature=CHAT_TEMPERATURE, cache=None):
+    """
+    Returns the completion for `message`. Identical requests may be answered
+    from the response cache (see _cache_for); errors are never cached.
+    """
+    messages = _build_messages(message, system_prompt)
+    response_cache, key = _cache_for(messages, temperature, cache)
+    with get_tracer().span("completion", model=CHAT_MODEL) as span:
+        if response_cache is not None:
+            cached = _cached_response(response_cache, key, span)
+            if cached is not None:
+                return cached
+
+        try:
+            response = get_scheduler().call(
+                get_client().chat.completions.create,
+                model=CHAT_MODEL,
+                messages=messages,
+                temperature=temperature,
+                limit="chat",
+                tokens=_prompt_tokens(messages),
+            )
+            _charge_completion(response, span, messages)
+            text = response.choices[0].message.content.strip()
+        except Exception as e:
+            span.set(error=str(e))
+            return f"[ERROR] {str(e)}"
+        if response_cache is not None:
+            response_cache.put(key, CHAT_MODEL, text)
+        return text
+
 
+async def ask_chatgpt_async(message, system_prompt=None, temperature=CHAT_TEMPERATURE, cache=None):
+    """
+    Coroutine version of ask_chatgpt. Cancelling the awaiting task aborts
+    the HTTP request.
+    """
+    messages = _build_messages(message, system_prompt)
+    response_cache, key = _cache_for(messages, temperature, cache)
+    with get_tracer().span("completion", model=CHAT_MODEL) as span:
+        if response_cache is not None:
+            cached = _cached_response(response_cache, key, span)
+            if cached is not None:
+                return cached
+
+        try:
+            response = await get_scheduler().call_async(
+                get_async_client().chat.completions.create,
+                model=CHAT_MODEL,
+                messages=messages,
+                temperature=temperature,
+                limit="chat",
+                tokens=_prompt_tokens(messages),
+            )
+            _charge_completion(response, span, messages)
+            text = response.choices[0].message.content.strip()
+        except Exception as e:
+            span.set(error=str(e))
+            return f"[ERROR] {str(e)}"
+        if response_cache is not None:
+            response_cache.put(key, CHAT_MODEL, text)
+        return text
+
+
+def ask_chatgpt_stream(message, system_prompt=None, temperature=CHAT_TEMPERATURE, cache=None):
+    """
+    Same as ask_chatgpt, but yields the completion as text deltas while the
+    model generates them. Errors are yielded as a final "[ERROR] ..." piece.
+    A cached response is yielded as a single piece; a streamed one is only
+    cached once it has been read to the end.
+    """
+    messages = _build_messages(message, system_prompt)
+    response_cache, key = _cache_for(messages, temperature, cache)
+    # Not made the current span: the caller runs between our yields.
+    span = get_tracer().start_span("completion", model=CHAT_MODEL, stream=True)
     try:
-        response = client.chat.completions.create(
-            model="gpt-4-turbo",  # or 'gpt-3.5-turbo'
-            messages=messages,
-            temperature=0.8
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        return f"[ERROR] {str(e)}"
+        if response_cache is not None:
+            cached = _cached_response(response_cache, key, span)
+            if cached is not None:
+                yield cached
+                return
+
+        pieces = []
+        try:
+            stream = get_scheduler().iterate(
+                get_client().chat.completions.create,
+                model=CHAT_MODEL,
+                messages=messages,
+                temperature=temperature,
+                stream=True,
+                limit="chat",
+                tokens=_prompt_tokens(messages),
+            )
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if not pieces:
+                        span.set(first_token_ms=span.elapsed_ms())
+                    pieces.append(delta)
+                    yield delta
+        except Exception as e:
+            span.set(error=str(e))
+            yield f"[ERROR] {str(e)}"
+            return
+        completion_tokens = count_tokens("".join(pieces), CHAT_MODEL)
+        get_scheduler().charge("chat", completion_tokens)
+        _record_tokens(span, _prompt_tokens(messages), completion_tokens)
+        if response_cache is not None and pieces:
+            response_cache.put(key, CHAT_MODEL, "".join(pieces).strip())
+    finally:
+        # Also reached when the reader stops early (closes the generator).
+        span.end()
+
+
+def summarize_conversation(previous_summary, transcript, max_tokens=400):
+    """
+    Folds `transcript` (older turns leaving the context window) into
+    `previous_summary` and returns the updated summary.
+    """
+    prompt = (
+        f"Current summary:\n{previous_summary or '(empty)'}\n\n"
+        f"New conversation turns:\n{transcript}\n\n"
+        f"Rewrite the summary so it also covers the new turns. Keep names, numbers, "
+        f"decisions and open questions. Use at most {max_tokens} tokens."
+    )
+    summary = ask_chatgpt(prompt, system_prompt="You maintain a concise running summary of a conversation.")
+    if summary.startswith("[ERROR]"):
+        return previous_summary
+    return summary
@@ -0,0 +1,353 @@
+# services/api_scheduler.py
+
+import asyncio
+import contextvars
+import email.utils
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from config.settings import (
+    OPENAI_CHAT_RPM,
+    OPENAI_CHAT_TPM,
+    OPENAI_EMBEDDING_RPM,
+    OPENAI_EMBEDDING_TPM,
+    OPENAI_MAX_IN_FLIGHT,
+    OPENAI_MAX_RETRIES,
+    OPENAI_RETRY_BASE_DELAY,
+    OPENAI_RETRY_MAX_DELAY,
+)
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first.
+INTERACTIVE = 0
+BULK = 10
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits and server errors.
+RETRY_STATUSES = frozenset({408, 409, 429, 500, 502, 503, 504})
+# How often a waiting coroutine re-checks whether it may start.
+ASYNC_POLL = 0.05
+
+_priority = contextvars.ContextVar("api_priority", default=None)
+
+
+@contextmanager
+def request_priority(priority):
+    """
+    Sets the priority of API calls made inside the block (in this thread or
+    task) that don't pass one explicitly, e.g. the query embedding of an
+    interactive search.
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority(default=INTERACTIVE):
+    """
+    The priority set by an enclosing request_priority() block, else `default`.
+    """
+    priority = _priority.get()
+    return default if priority is None else priority
+
+
+class TokenBucket:
+    """
+    Allows `per_minute` units per minute, refilled continuously, with bursts
+    of up to a minute's worth. A falsy `per_minute` means no limit.
+    """
+
+    def __init__(self, per_minute, clock=time.monotonic):
+        self.capacity = float(per_minute or 0)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def wait_time(self, amount):
+        """
+        Seconds until `amount` units are available (0 if they are now).
+        Requests larger than the bucket wait for a full bucket.
+        """
+        if not self.capacity:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.level) / self.rate)
+
+    def take(self, amount):
+        # May go below zero (charging actual usage after the fact); later callers wait it off.
+        if self.capacity:
+            self._refill()
+            self.level -= amount
+
+    def _refill(self):
+        now = self._clock()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class ApiScheduler:
+    """
+    One gate for every OpenAI call in the process.
+
+    - Calls wait in a single queue ordered by priority (INTERACTIVE chat
+      before BULK ingestion embeddings), then arrival.
+    - At most `max_in_flight` calls run at once.
+    - Each call draws from a pair of token buckets: requests per minute
+      and tokens per minute, kept per `limits` entry ("chat", "embeddings").
+    - Failures that are worth retrying (429, timeouts, connection errors,
+      5xx) are retried up to `max_retries` times with exponential backoff
+      and jitter. A Retry-After header sets the delay instead, and holds
+      back every queued call until it has passed.
+
+    The last error is re-raised once retries run out, or straight away if
+    it isn't retryable (bad request, auth, quota).
+    """
+
+    def __init__(self, limits=None, max_in_flight=OPENAI_MAX_IN_FLIGHT, max_retries=OPENAI_MAX_RETRIES,
+                 base_delay=OPENAI_RETRY_BASE_DELAY, max_delay=OPENAI_RETRY_MAX_DELAY,
+                 clock=time.monotonic, sleep=time.sleep):
+        if limits is None:
+            limits = {
+                "chat": (OPENAI_CHAT_RPM, OPENAI_CHAT_TPM),
+                "embeddings": (OPENAI_EMBEDDING_RPM, OPENAI_EMBEDDING_TPM),
+            }
+        self.buckets = {
+            name: (TokenBucket(rpm, clock), TokenBucket(tpm, clock)) for name, (rpm, tpm) in limits.items()
+        }
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stats = {"calls": 0, "retries": 0, "failures": 0, "queued_seconds": 0.0}
+
+        self._clock = clock
+        self._sleep = sleep
+        self._cond = threading.Condition()
+        self._waiting = []  # heap of (priority, sequence)
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._paused_until = 0.0
+
+    # ------------------------------------------------------------------
+    # Calls
+    # ------------------------------------------------------------------
+    def call(self, fn, *args, limit="chat", tokens=0, priority=None, **kwargs):
+        """
+        Runs fn(*args, **kwargs) once admitted, retrying as described above.
+        `tokens` is the estimated token cost drawn from the `limit` bucket.
+        """
+        for attempt in itertools.count():
+            self._acquire(priority, limit, tokens)
+            try:
+                return fn(*args, **kwargs)
+            except Exception as exc:
+                delay = self._retry_delay(exc, attempt)
+                if delay is None:
+                    raise
+            finally:
+                self._release()
+            self._sleep(delay)
+
+    async def call_async(self, fn, *args, limit="chat", tokens=0, priority=None, **kwargs):
+        """
+        call() for a coroutine function; waiting for a slot and between
+        retries doesn't block the event loop.
+        """
+        for attempt in itertools.count():
+            await self._acquire_async(priority, limit, tokens)
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as exc:
+                delay = self._retry_delay(exc, attempt)
+                if delay is None:
+                    raise
+            finally:
+                self._release()
+            await asyncio.sleep(delay)
+
+    def iterate(self, fn, *args, limit="chat", tokens=0, priority=None, **kwargs):
+        """
+        call() for a function returning an iterator (a streamed response):
+        yields its items, holding the slot until it is exhausted or closed.
+        Only opening the stream is retried, so nothing is yielded twice.
+        """
+        for attempt in itertools.count():
+            self._acquire(priority, limit, tokens)
+            try:
+                try:
+                    iterator = fn(*args, **kwargs)
+                except Exception as exc:
+                    delay = self._retry_delay(exc, attempt)
+                    if delay is None:
+                        raise
+                else:
+                    yield from iterator
+                    return
+            finally:
+                self._release()
+            self._sleep(delay)
+
+    def charge(self, limit, tokens):
+        """
+        Draws tokens only known after a call (e.g. the completion's length).
+        """
+        with self._cond:
+            self.buckets[limit][1].take(tokens)
+
+    # ------------------------------------------------------------------
+    # Retries
+    # ------------------------------------------------------------------
+    def _retry_delay(self, exc, attempt):
+        """
+        Seconds to wait before retrying after `exc`, or None to give up.
+        """
+        if attempt >= self.max_retries or not is_retryable(exc):
+            with self._cond:
+                self.stats["failures"] += 1
+            return None
+
+        backoff = min(self.max_delay, self.base_delay * 2 ** attempt)
+        server_delay = retry_after(exc)
+        if server_delay is not None:
+            delay = min(self.max_delay, server_delay) + random.uniform(0, self.base_delay)
+            with self._cond:
+                self._paused_until = max(self._paused_until, self._clock() + delay)
+        else:
+            delay = random.uniform(backoff / 2, backoff)
+
+        with self._cond:
+            self.stats["retries"] += 1
+        logger.warning("OpenAI call failed (%s); retry %d in %.1fs", exc, attempt + 1, delay)
+        return delay
+
+    # ------------------------------------------------------------------
+    # Admission
+    # ------------------------------------------------------------------
+    def _acquire(self, priority, limit, tokens):
+        started = self._clock()
+        ticket = self._enqueue(priority)
+        try:
+            with self._cond:
+                while True:
+                    wait = self._admit(ticket, limit, tokens)
+                    if wait == 0:
+                        break
+                    self._cond.wait(timeout=wait)
+        except BaseException:
+            self._abandon(ticket)
+            raise
+        self._record_wait(started)
+
+    async def _acquire_async(self, priority, limit, tokens):
+        started = self._clock()
+        ticket = self._enqueue(priority)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._admit(ticket, limit, tokens)
+                if wait == 0:
+                    break
+                await asyncio.sleep(min(wait, ASYNC_POLL) if wait is not None else ASYNC_POLL)
+        except BaseException:
+            self._abandon(ticket)
+            raise
+        self._record_wait(started)
+
+    def _enqueue(self, priority):
+        if priority is None:
+            priority = current_priority()
+        ticket = (priority, next(self._sequence))
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+        return ticket
+
+    def _admit(self, ticket, limit, tokens):
+        """
+        Starts the call if it is first in line and a slot and budget are free
+        (returns 0); otherwise returns how long to wait before trying again,
+        or None to wait until another call finishes. Caller holds self._cond.
+        """
+        if self._waiting[0] != ticket or self._in_flight >= self.max_in_flight:
+            return None
+        requests, token_bucket = self.buckets[limit]
+        wait = max(self._paused_until - self._clock(), requests.wait_time(1), token_bucket.wait_time(tokens))
+        if wait > 0:
+            return wait
+        heapq.heappop(self._waiting)
+        requests.take(1)
+        token_bucket.take(tokens)
+        self._in_flight += 1
+        self.stats["calls"] += 1
+        self._cond.notify_all()  # the next in line may be able to start too
+        return 0
+
+    def _abandon(self, ticket):
+        with self._cond:
+            if ticket in self._waiting:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+
+    def _release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def _record_wait(self, started):
+        with self._cond:
+            self.stats["queued_seconds"] += self._clock() - started
+
+
+def is_retryable(exc):
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        # A 429 for an exhausted quota won't clear up by waiting.
+        return status in RETRY_STATUSES and getattr(exc, "code", None) != "insufficient_quota"
+    # openai.APIConnectionError / APITimeoutError carry no status.
+    names = {cls.__name__ for cls in type(exc).__mro__}
+    return bool(names & {"APIConnectionError", "APITimeoutError"}) or isinstance(exc, (TimeoutError, ConnectionError))
+
+
+def retry_after(exc):
+    """
+    Seconds the server asked us to wait (Retry-After / retry-after-ms headers), or None.
+    """
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """
+    Returns the process-wide ApiScheduler.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = ApiScheduler()
+    return _scheduler
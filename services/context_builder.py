@@ -0,0 +1,114 @@
+# services/context_builder.py
+
+import threading
+from collections import deque
+
+from config.settings import CHAT_MODEL, CONTEXT_MAX_TOKENS, CONTEXT_SUMMARY_MAX_TOKENS, CONTEXT_RESUME_TURNS
+from utils.tokens import count_tokens
+
+
+def default_format_turn(msg):
+    return f"{msg['role'].capitalize()}: {msg['content']}\n"
+
+
+def default_summarize(previous_summary, transcript, max_tokens):
+    from services.ai_service import summarize_conversation
+    return summarize_conversation(previous_summary, transcript, max_tokens)
+
+
+class ContextBuilder:
+    """
+    Turns a growing conversation history (list of {"role", "content"} dicts)
+    into a bounded prompt prefix: the most recent turns verbatim, within
+    `max_tokens`, preceded by a running summary of everything older.
+
+    State is kept between calls, so each build() only formats and counts
+    the turns appended since the previous call. When the window overflows,
+    the oldest turns are folded into the summary in one go, down to
+    `low_water` of the budget, so summarization runs every few turns rather
+    than on every turn.
+    """
+
+    def __init__(self, max_tokens=CONTEXT_MAX_TOKENS, summary_max_tokens=CONTEXT_SUMMARY_MAX_TOKENS,
+                 low_water=0.75, format_turn=default_format_turn, summarize=default_summarize,
+                 token_counter=None, model=CHAT_MODEL):
+        self.max_tokens = max_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.low_water = low_water
+        self.format_turn = format_turn
+        self.summarize = summarize
+        self.token_counter = token_counter or (lambda text: count_tokens(text, model))
+
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._turns = deque()  # (text, n_tokens) for turns in the window
+        self._window_tokens = 0
+        self._seen = 0
+        self.summary = ""
+        self._prefix = ""
+
+    def build(self, history):
+        """
+        Returns the prompt prefix for `history`. Call with the same (growing)
+        list every turn; a shorter list than last time is treated as a reset.
+        """
+        with self._lock:
+            if len(history) < self._seen:
+                self.reset()
+
+            new_turns = history[self._seen:]
+            if not new_turns:
+                return self._prefix
+
+            for msg in new_turns:
+                text = self.format_turn(msg)
+                n_tokens = self.token_counter(text)
+                self._turns.append((text, n_tokens))
+                self._window_tokens += n_tokens
+            self._seen = len(history)
+
+            if self._window_tokens > self.max_tokens:
+                self._fold_oldest()
+
+            self._prefix = self._render()
+            return self._prefix
+
+    def resume(self, history, turns=CONTEXT_RESUME_TURNS):
+        """
+        Starts from the last `turns` entries of an existing (e.g. reloaded)
+        history instead of reading and summarizing all of it on the next build().
+        """
+        with self._lock:
+            self.reset()
+            self._seen = max(0, len(history) - turns)
+
+    def prompt_tokens(self):
+        """
+        Approximate size of the current prefix, in tokens.
+        """
+        summary_tokens = self.token_counter(self.summary) if self.summary else 0
+        return summary_tokens + self._window_tokens
+
+    # ------------------------------------------------------------------
+    def _fold_oldest(self):
+        target = int(self.max_tokens * self.low_water)
+        evicted = []
+        # Always keep the latest turn verbatim, even if it is over budget on its own.
+        while self._window_tokens > target and len(self._turns) > 1:
+            text, n_tokens = self._turns.popleft()
+            evicted.append(text)
+            self._window_tokens -= n_tokens
+
+        if evicted:
+            # Bound the summarizer's input; a pasted document shouldn't be resent whole.
+            transcript = "".join(evicted)[-self.max_tokens * 4:]
+            self.summary = self.summarize(self.summary, transcript, self.summary_max_tokens)
+
+    def _render(self):
+        parts = []
+        if self.summary:
+            parts.append(f"[Summary of earlier conversation]: {self.summary}\n")
+        parts.extend(text for text, _ in self._turns)
+        return "".join(parts)
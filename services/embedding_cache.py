@@ -0,0 +1,180 @@
+# services/embedding_cache.py
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from config.settings import (
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_CACHE_MEMORY_ITEMS,
+    EMBEDDING_CACHE_MAX_ITEMS,
+)
+
+# Disk hits update last_used in batches of this many keys instead of one
+# commit per lookup.
+TOUCH_BATCH = 64
+
+
+def cache_key(model, text):
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache for embeddings, keyed by (model, sha256 of the text).
+    Recently used vectors live in an in-memory LRU; everything is persisted
+    as float32 blobs in SQLite, evicting least recently used rows once the
+    table grows past `max_items`.
+
+    Vectors are held as float32 arrays in both tiers and only turned into
+    lists of floats when handed back to callers.
+    """
+
+    def __init__(self, path=EMBEDDING_CACHE_PATH, memory_items=EMBEDDING_CACHE_MEMORY_ITEMS,
+                 max_items=EMBEDDING_CACHE_MAX_ITEMS):
+        self.path = path
+        self.memory_items = memory_items
+        self.max_items = max_items
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+        self._memory = OrderedDict()  # key -> array("f")
+        self._touched = {}  # key -> last_used not yet written to disk
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " model TEXT NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+        self._conn.commit()
+
+    def get_many(self, model, texts):
+        """
+        Returns a list aligned with `texts`, holding the cached vector or None.
+        """
+        keys = [cache_key(model, text) for text in texts]
+        results = [None] * len(keys)
+        missing = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    results[i] = vector.tolist()
+                    self.stats["memory_hits"] += 1
+                else:
+                    missing.setdefault(key, []).append(i)
+
+            if missing:
+                found = self._load(list(missing))
+                now = time.time()
+                for key, vector in found.items():
+                    self._remember(key, vector)
+                    self._touched[key] = now
+                    values = vector.tolist()
+                    for i in missing[key]:
+                        results[i] = values
+                    self.stats["disk_hits"] += len(missing[key])
+                if len(self._touched) >= TOUCH_BATCH:
+                    self._save_touched()
+                    self._conn.commit()
+                self.stats["misses"] += sum(len(missing[key]) for key in missing if key not in found)
+
+        return results
+
+    def get(self, model, text):
+        return self.get_many(model, [text])[0]
+
+    def put_many(self, model, texts, vectors):
+        now = time.time()
+        rows = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = cache_key(model, text)
+                vector = array("f", vector)
+                self._remember(key, vector)
+                self._touched.pop(key, None)
+                rows.append((key, model, vector.tobytes(), now))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, vector, last_used) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._evict()
+            self._conn.commit()
+
+    def put(self, model, text, vector):
+        self.put_many(model, [text], [vector])
+
+    def hit_rate(self):
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._save_touched()
+            self._conn.commit()
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _load(self, keys):
+        found = {}
+        # Stay well under SQLite's bound-parameter limit.
+        for start in range(0, len(keys), 500):
+            batch = keys[start: start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+            )
+            for key, blob in rows:
+                vector = array("f")
+                vector.frombytes(blob)
+                found[key] = vector
+        return found
+
+    def _save_touched(self):
+        # Caller holds self._lock and commits.
+        if self._touched:
+            self._conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?",
+                                   [(used, key) for key, used in self._touched.items()])
+            self._touched.clear()
+
+    def _evict(self):
+        # Recent hits must count before picking the least recently used rows.
+        self._save_touched()
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        if count <= self.max_items:
+            return
+        # Trim to 90% so we don't evict on every single insert once full.
+        excess = count - int(self.max_items * 0.9)
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN ("
+            " SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+            (excess,),
+        )
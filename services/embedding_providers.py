@@ -0,0 +1,251 @@
+# services/embedding_providers.py
+
+import re
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+
+from config.settings import (
+    EMBEDDING_PROVIDER,
+    EMBEDDING_MODEL,
+    LOCAL_EMBEDDING_MODEL,
+    LOCAL_EMBEDDING_BATCH_SIZE,
+    LOCAL_EMBEDDING_WORKERS,
+    HASH_EMBEDDING_DIM,
+)
+
+# Output sizes of the OpenAI embedding models, so a collection's dimension is
+# known without an API call.
+OPENAI_DIMENSIONS = {
+    "text-embedding-ada-002": 1536,
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+}
+
+# Output sizes of common sentence-transformers models, so building a
+# VectorService doesn't load the model just to read its dimension.
+SENTENCE_TRANSFORMER_DIMENSIONS = {
+    "all-MiniLM-L6-v2": 384,
+    "all-MiniLM-L12-v2": 384,
+    "paraphrase-MiniLM-L6-v2": 384,
+    "paraphrase-multilingual-MiniLM-L12-v2": 384,
+    "multi-qa-MiniLM-L6-cos-v1": 384,
+    "all-distilroberta-v1": 768,
+    "all-mpnet-base-v2": 768,
+    "multi-qa-mpnet-base-dot-v1": 768,
+    "BAAI/bge-small-en-v1.5": 384,
+    "BAAI/bge-base-en-v1.5": 768,
+}
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+class EmbeddingProvider:
+    """
+    Turns texts into vectors. Subclasses set `name`, `model` and `dimension`
+    and implement embed(); metadata() describes the vectors so a collection
+    can refuse vectors from a different provider or model.
+    """
+
+    name = None
+    model = None
+    dimension = None
+
+    def embed(self, texts):
+        """
+        Returns one vector (list of floats) per text, in order.
+        """
+        raise NotImplementedError
+
+    def embed_one(self, text):
+        return self.embed([text])[0]
+
+    def metadata(self):
+        return {
+            "embedding_provider": self.name,
+            "embedding_model": self.model,
+            "embedding_dim": self.dimension,
+        }
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """
+    The OpenAI embeddings API, through embedding_service (batching, parallel
+    requests and the embedding cache).
+    """
+
+    name = "openai"
+
+    def __init__(self, model=EMBEDDING_MODEL):
+        self.model = model
+        self.dimension = OPENAI_DIMENSIONS.get(model)
+
+    def embed(self, texts):
+        from services.embedding_service import get_embeddings
+        vectors = get_embeddings(texts, model=self.model)
+        if vectors and self.dimension is None:
+            self.dimension = len(vectors[0])
+        return vectors
+
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """
+    Base for in-process backends: texts are encoded in batches of
+    `batch_size`, spread over `workers` threads (NumPy and torch release
+    the GIL for the heavy parts), and returned as L2-normalized vectors.
+    """
+
+    def __init__(self, batch_size=LOCAL_EMBEDDING_BATCH_SIZE, workers=LOCAL_EMBEDDING_WORKERS):
+        self.batch_size = batch_size
+        self.workers = workers
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def embed(self, texts):
+        return self.embed_array(texts).tolist()
+
+    def embed_array(self, texts):
+        """
+        Same as embed(), as a float32 array of shape (len(texts), dimension).
+        """
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, self.dimension or 0), dtype=np.float32)
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if len(batches) == 1 or self.workers <= 1:
+            parts = [self._encode_batch(batch) for batch in batches]
+        else:
+            parts = list(self._get_pool().map(self._encode_batch, batches))
+        return np.vstack(parts)
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="embed")
+        return self._pool
+
+    def _encode_batch(self, texts):
+        raise NotImplementedError
+
+
+class HashingEmbeddingProvider(LocalEmbeddingProvider):
+    """
+    Deterministic embeddings with no model files: word unigrams and bigrams
+    plus character trigrams of each word, hashed (CRC32, so the same on every
+    machine and run) into `dimension` signed buckets, with sublinear term
+    frequency, then L2-normalized. Similar wording gives similar vectors;
+    it doesn't know synonyms, but it is instant and fully offline.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dimension=HASH_EMBEDDING_DIM, **kwargs):
+        super().__init__(**kwargs)
+        self.dimension = dimension
+        self.model = f"hashed-ngrams-{dimension}"
+
+    def feature_hashes(self, text):
+        """
+        32-bit hashes of the text's features: words, word bigrams (combined
+        from the two word hashes) and the character trigrams of each word.
+        """
+        words = _WORD.findall(text.lower())
+        if not words:
+            return np.zeros(0, dtype=np.uint64)
+        hashed = [_word_hashes(word) for word in words]
+        unigrams = np.fromiter((h for h, _ in hashed), dtype=np.uint64, count=len(hashed))
+        bigrams = (unigrams[:-1] * _BIGRAM_MULTIPLIER + unigrams[1:]) & 0xFFFFFFFF
+        return np.concatenate([unigrams, bigrams] + [trigrams for _, trigrams in hashed])
+
+    def _encode_batch(self, texts):
+        hashes = [self.feature_hashes(text) for text in texts]
+        n = len(texts)
+        rows = np.repeat(np.arange(n, dtype=np.uint64), [len(h) for h in hashes])
+        hashes = np.concatenate(hashes) if n else np.zeros(0, dtype=np.uint64)
+        # Low bits pick the bucket, the top bit the sign (so collisions tend to cancel out).
+        buckets = rows * self.dimension + hashes % self.dimension
+        signs = np.where(hashes & 0x80000000, 1.0, -1.0)
+        counts = np.bincount(buckets.astype(np.int64), weights=signs, minlength=n * self.dimension)
+        matrix = counts.reshape(n, self.dimension)
+        matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (matrix / norms).astype(np.float32)
+
+
+_BIGRAM_MULTIPLIER = np.uint64(1000003)
+
+
+@lru_cache(maxsize=200_000)
+def _word_hashes(word):
+    # Vocabularies are small next to corpora, so each word is hashed once.
+    padded = f"<{word}>"
+    trigrams = np.fromiter(
+        (zlib.crc32(padded[i:i + 3].encode("utf-8")) for i in range(len(padded) - 2)),
+        dtype=np.uint64,
+    )
+    return zlib.crc32(word.encode("utf-8")), trigrams
+
+
+class SentenceTransformerProvider(LocalEmbeddingProvider):
+    """
+    A sentence-transformers model on the local CPU (or GPU, if torch has one).
+    The model is loaded on first use; sentence-transformers is optional and
+    only needed for this backend. `dimension` comes from
+    SENTENCE_TRANSFORMER_DIMENSIONS, and is None for other models until
+    the model has been loaded.
+    """
+
+    name = "sentence-transformers"
+
+    def __init__(self, model=LOCAL_EMBEDDING_MODEL, **kwargs):
+        super().__init__(**kwargs)
+        self.model = model
+        self.dimension = SENTENCE_TRANSFORMER_DIMENSIONS.get(model.removeprefix("sentence-transformers/"))
+        self._model = None
+        self._model_lock = threading.Lock()
+
+    def _load(self):
+        with self._model_lock:
+            if self._model is None:
+                from sentence_transformers import SentenceTransformer
+                self._model = SentenceTransformer(self.model)
+                self.dimension = self._model.get_sentence_embedding_dimension()
+        return self._model
+
+    def _encode_batch(self, texts):
+        vectors = self._load().encode(
+            texts, batch_size=len(texts), convert_to_numpy=True, normalize_embeddings=True
+        )
+        return vectors.astype(np.float32)
+
+
+PROVIDERS = {
+    "openai": OpenAIEmbeddingProvider,
+    "hashing": HashingEmbeddingProvider,
+    "sentence-transformers": SentenceTransformerProvider,
+}
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_provider(name=None, **kwargs):
+    """
+    Returns a provider by name ("openai", "hashing", "sentence-transformers").
+    Without arguments, returns the shared instance of EMBEDDING_PROVIDER.
+    """
+    global _default
+    if name is None and not kwargs:
+        with _default_lock:
+            if _default is None:
+                _default = PROVIDERS[EMBEDDING_PROVIDER]()
+        return _default
+    try:
+        provider_class = PROVIDERS[name or EMBEDDING_PROVIDER]
+    except KeyError:
+        raise ValueError(f"Unknown embedding provider {name!r}; expected one of {sorted(PROVIDERS)}")
+    return provider_class(**kwargs)
@@ -1,11 +1,160 @@
 # embedding_service.py
 
-from config.config import client
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
+from config.config import get_client
+from services.api_scheduler import BULK, current_priority, get_scheduler
+from config.settings import (
+    EMBEDDING_MODEL,
+    EMBEDDING_CACHE_ENABLED,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_BATCH_MAX_TOKENS,
+    EMBEDDING_MAX_CONCURRENCY,
+)
+from utils.tokens import count_tokens
+from utils.tracing import continue_trace, current_trace, get_tracer
 
-def get_embedding(text, model="text-embedding-ada-002"):
-    response = client.embeddings.create(
-        input=text,
-        model=model
-    )
-    return response.data[0].embedding
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    Returns the process-wide EmbeddingCache, or None when caching is disabled.
+    """
+    global _cache
+    if not EMBEDDING_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            from services.embedding_cache import EmbeddingCache
+            _cache = EmbeddingCache()
+    return _cache
+
+
+def get_embedding(text, model=EMBEDDING_MODEL):
+    cache = get_cache()
+    if cache is not None:
+        cached = cache.get(model, text)
+        get_tracer().record_cache("embedding", hits=int(cached is not None), misses=int(cached is None))
+        if cached is not None:
+            return cached
+
+    with get_tracer().span("embedding", model=model, inputs=1) as span:
+        response = get_scheduler().call(
+            get_client().embeddings.create,
+            input=text,
+            model=model,
+            limit="embeddings",
+            tokens=count_tokens(text, model),
+            priority=current_priority(BULK),
+        )
+        _record_usage(span, model, response, [text])
+    embedding = response.data[0].embedding
+    if cache is not None:
+        cache.put(model, text, embedding)
+    return embedding
+
+
+def _record_usage(span, model, response, texts):
+    usage = getattr(response, "usage", None)
+    tokens = usage.prompt_tokens if usage is not None else sum(count_tokens(text, model) for text in texts)
+    span.set(prompt_tokens=tokens)
+    get_tracer().record_tokens(model, prompt=tokens)
+
+
+def make_batches(texts, model=EMBEDDING_MODEL, batch_size=EMBEDDING_BATCH_SIZE,
+                 max_batch_tokens=EMBEDDING_BATCH_MAX_TOKENS):
+    """
+    Splits `texts` into lists of indices, each list closed once it reaches
+    `batch_size` inputs or would exceed `max_batch_tokens` tokens.
+    A single text larger than the token limit still gets its own batch.
+    """
+    batches = []
+    current, current_tokens = [], 0
+    for i, text in enumerate(texts):
+        n_tokens = count_tokens(text, model)
+        if current and (len(current) >= batch_size or current_tokens + n_tokens > max_batch_tokens):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += n_tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def embed_batch(texts, model=EMBEDDING_MODEL, priority=None):
+    """
+    Embeds several inputs with a single API request, in input order.
+    Requests go through the shared scheduler, as BULK work unless
+    `priority` (or an enclosing request_priority block) says otherwise.
+    """
+    texts = list(texts)
+    with get_tracer().span("embedding", model=model, inputs=len(texts)) as span:
+        response = get_scheduler().call(
+            get_client().embeddings.create,
+            input=texts,
+            model=model,
+            limit="embeddings",
+            tokens=sum(count_tokens(text, model) for text in texts),
+            priority=current_priority(BULK) if priority is None else priority,
+        )
+        _record_usage(span, model, response, texts)
+    # The API tags each item with its input index; don't rely on response order.
+    return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+
+
+def get_embeddings(texts, model=EMBEDDING_MODEL, batch_size=EMBEDDING_BATCH_SIZE,
+                   max_batch_tokens=EMBEDDING_BATCH_MAX_TOKENS,
+                   max_concurrency=EMBEDDING_MAX_CONCURRENCY):
+    """
+    Embeds `texts` in batches, keeping up to `max_concurrency` requests in flight.
+    Returns the embeddings in the same order as `texts`. Cached texts and
+    duplicates within `texts` are not sent to the API.
+    """
+    texts = list(texts)
+    if not texts:
+        return []
+
+    cache = get_cache()
+    embeddings = cache.get_many(model, texts) if cache is not None else [None] * len(texts)
+    if cache is not None:
+        misses = embeddings.count(None)
+        get_tracer().record_cache("embedding", hits=len(texts) - misses, misses=misses)
+
+    pending = {}
+    for i, (text, vector) in enumerate(zip(texts, embeddings)):
+        if vector is None:
+            pending.setdefault(text, []).append(i)
+    if not pending:
+        return embeddings
+
+    unique_texts = list(pending)
+    fetched = _fetch_embeddings(unique_texts, model, batch_size, max_batch_tokens, max_concurrency)
+    if cache is not None:
+        cache.put_many(model, unique_texts, fetched)
+    for text, vector in zip(unique_texts, fetched):
+        for i in pending[text]:
+            embeddings[i] = vector
+    return embeddings
+
+
+def _fetch_embeddings(texts, model, batch_size, max_batch_tokens, max_concurrency):
+    batches = make_batches(texts, model, batch_size, max_batch_tokens)
+    embeddings = [None] * len(texts)
+    # Resolved here: the worker threads don't see this thread's request_priority or span.
+    priority = current_priority(BULK)
+    trace = current_trace()
+
+    def run(indices):
+        with continue_trace(trace):
+            return indices, embed_batch([texts[i] for i in indices], model, priority)
+
+    workers = max(1, min(max_concurrency, len(batches)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for indices, vectors in pool.map(run, batches):
+            for i, vector in zip(indices, vectors):
+                embeddings[i] = vector
+    return embeddings
@@ -0,0 +1,119 @@
+# services/hybrid_retrieval.py
+
+import chromadb
+
+from config.settings import LOCAL_EMBEDDING_MODEL
+from services.embedding_providers import SentenceTransformerProvider
+from services.timeseries_index import TimeSeriesIndex, extract_keys_and_dates
+
+DEFAULT_AGGREGATIONS = (("mean", "Close"), ("sum", "Volume"))
+
+
+class HybridRetriever:
+    """
+    Semantic retrieval over a Chroma collection of financial documents,
+    joined with numeric analysis of a price DataFrame, in one call.
+
+    The embedding model, the collection and the indexed DataFrame are
+    created once and stay resident. Documents carry their ticker and date in
+    metadata ({"ticker": "TSLA", "date": "2022-03-21"}), which is mapped to
+    a DataFrame row through the (Company, Date) index, so semantic hits and
+    numeric rows are joined without scanning.
+    """
+
+    def __init__(self, df=None, index=None, collection_name="financial_docs",
+                 model_name=LOCAL_EMBEDDING_MODEL, persist_path="./vector_db", embed_fn=None,
+                 key_column="Company", date_column="Date", provider=None):
+        """
+        Documents are embedded by `provider` (an EmbeddingProvider), by default
+        the sentence-transformers model `model_name`; `embed_fn(texts)` can be
+        given instead for a plain function.
+        """
+        if index is None:
+            index = TimeSeriesIndex(df, key_column, date_column)
+        self.index = index
+        self.provider = provider or SentenceTransformerProvider(model_name)
+        self.model_name = self.provider.model
+        self.client = chromadb.PersistentClient(path=persist_path)
+        self.collection = self.client.get_or_create_collection(name=collection_name)
+        self._embed_fn = embed_fn
+
+    def embed(self, texts):
+        if self._embed_fn is not None:
+            return self._embed_fn(texts)
+        return self.provider.embed(texts)
+
+    def warm_up(self):
+        """
+        Loads the model and touches the collection so the first real query is fast.
+        """
+        self.embed(["warm up"])
+        self.collection.count()
+
+    def add_documents(self, ids, documents, metadatas):
+        """
+        Stores documents with their {"ticker", "date"} metadata.
+        """
+        self.collection.upsert(
+            ids=ids,
+            embeddings=self.embed(documents),
+            documents=documents,
+            metadatas=metadatas
+        )
+
+    def query(self, text, tickers=None, start=None, end=None, n_results=10,
+              aggregations=DEFAULT_AGGREGATIONS):
+        """
+        Answers a mixed query. Tickers and dates default to the ones named in
+        `text` (known tickers, YYYY-MM-DD dates). Returns a dict with:
+          hits:       semantic matches, each with its matched DataFrame row (or None)
+          rows:       DataFrame rows for the matched (ticker, date) pairs
+          aggregates: {ticker: (row_count, {(agg, column): value})} over the date range
+        """
+        named_tickers, named_start, named_end = extract_keys_and_dates(text, self.index)
+        if tickers is None:
+            tickers = named_tickers
+        if start is None and end is None:
+            start, end = named_start, named_end
+
+        where = None
+        if len(tickers) == 1:
+            where = {"ticker": tickers[0]}
+        elif tickers:
+            where = {"ticker": {"$in": list(tickers)}}
+
+        hits, positions = [], []
+        n_results = min(n_results, self.collection.count())
+        results = {}
+        if n_results:
+            results = self.collection.query(
+                query_embeddings=self.embed([text]),
+                n_results=n_results,
+                where=where
+            )
+
+        ids = results["ids"][0] if results.get("ids") else []
+        for i, doc_id in enumerate(ids):
+            metadata = results["metadatas"][0][i] or {}
+            position = None
+            if "ticker" in metadata and "date" in metadata:
+                position = self.index.position(metadata["ticker"], metadata["date"])
+            if position is not None:
+                positions.append(position)
+            hits.append({
+                "id": doc_id,
+                "document": results["documents"][0][i],
+                "metadata": metadata,
+                "distance": results["distances"][0][i] if results.get("distances") else None,
+                "row": position,
+            })
+
+        aggregates = {
+            ticker: self.index.aggregate(ticker, list(aggregations), start, end)
+            for ticker in tickers
+        }
+        return {
+            "hits": hits,
+            "rows": self.index.take(sorted(set(positions))),
+            "aggregates": aggregates,
+        }
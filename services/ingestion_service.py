@@ -0,0 +1,157 @@
+# services/ingestion_service.py
+
+import hashlib
+import json
+import os
+import time
+
+from config.settings import INGEST_MANIFEST_DIR, INGEST_BATCH_SIZE, INGEST_BATCH_MAX_CHARS, INGEST_FLUSH_SECONDS
+from utils.chunker import iter_chunks
+
+
+def chunk_hash(chunk):
+    return hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+
+
+class IngestionService:
+    """
+    Idempotent, incremental document ingestion on top of a VectorService.
+
+    Chunk ids are derived from the chunk content, so re-ingesting a document
+    only embeds chunks that are not stored yet, moves unchanged chunks by
+    updating their metadata, and deletes chunks that disappeared. A manifest
+    per document remembers which chunk ids belong to it.
+
+    With a `lexical_index` (a LexicalIndex), every write is mirrored to it,
+    and chunks it is missing (e.g. ingested before it existed) are added
+    to it on the next ingest of their document, without re-embedding.
+    """
+
+    def __init__(self, vector_service, manifest_dir=INGEST_MANIFEST_DIR,
+                 batch_size=INGEST_BATCH_SIZE, chunker=iter_chunks, lexical_index=None,
+                 batch_max_chars=INGEST_BATCH_MAX_CHARS, flush_seconds=INGEST_FLUSH_SECONDS):
+        self.vector_service = vector_service
+        self.lexical_index = lexical_index
+        self.manifest_dir = manifest_dir
+        self.batch_size = batch_size
+        self.batch_max_chars = batch_max_chars
+        self.flush_seconds = flush_seconds
+        self.chunker = chunker
+        os.makedirs(manifest_dir, exist_ok=True)
+
+    def ingest(self, document_id, text, metadata=None):
+        """
+        Ingests `text` (a string or an iterable of pages) under `document_id`.
+        Chunks are embedded and written in batches while the input is still
+        being read; a batch is sent once it is full (batch_size chunks or
+        batch_max_chars characters) or, checked as each chunk arrives, once
+        its first chunk has waited flush_seconds.
+        Returns counts of added, moved, unchanged and removed chunks.
+        """
+        previous = self.load_manifest(document_id)
+        current = {}
+        stats = {"added": 0, "moved": 0, "unchanged": 0, "removed": 0}
+        batch = []
+        batch_chars = 0
+        batch_started = None
+
+        for chunk in self.chunker(text):
+            digest = chunk_hash(chunk)
+            chunk_id = f"{document_id}-{digest[:32]}"
+            if chunk_id in current:
+                continue  # identical chunk repeated within the document
+            index = len(current)
+            current[chunk_id] = {"hash": digest, "index": index}
+            if not batch:
+                batch_started = time.monotonic()
+            batch.append((chunk_id, chunk, index, digest))
+            batch_chars += len(chunk)
+            if (len(batch) >= self.batch_size or batch_chars >= self.batch_max_chars
+                    or time.monotonic() - batch_started >= self.flush_seconds):
+                self._write_batch(document_id, batch, previous, metadata, stats)
+                batch = []
+                batch_chars = 0
+        if batch:
+            self._write_batch(document_id, batch, previous, metadata, stats)
+
+        stale = [chunk_id for chunk_id in previous if chunk_id not in current]
+        if stale:
+            self._delete(stale)
+        stats["removed"] = len(stale)
+
+        self.save_manifest(document_id, current)
+        return stats
+
+    def remove(self, document_id):
+        """
+        Deletes every chunk recorded for `document_id` and its manifest.
+        """
+        previous = self.load_manifest(document_id)
+        if previous:
+            self._delete(list(previous))
+        path = self._manifest_path(document_id)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def load_manifest(self, document_id):
+        path = self._manifest_path(document_id)
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)["chunks"]
+
+    def save_manifest(self, document_id, chunks):
+        path = self._manifest_path(document_id)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"document_id": document_id, "chunks": chunks}, f)
+        os.replace(tmp_path, path)
+
+    # ------------------------------------------------------------------
+    def _write_batch(self, document_id, batch, previous, metadata, stats):
+        stored = self.vector_service.existing_ids([chunk_id for chunk_id, _, _, _ in batch])
+
+        new_ids, new_chunks, new_metas = [], [], []
+        moved_ids, moved_metas = [], []
+        metas = {}
+        for chunk_id, chunk, index, digest in batch:
+            chunk_meta = dict(metadata or {}, document_id=document_id, chunk_index=index, chunk_hash=digest)
+            metas[chunk_id] = chunk_meta
+            if chunk_id not in stored:
+                new_ids.append(chunk_id)
+                new_chunks.append(chunk)
+                new_metas.append(chunk_meta)
+            elif previous.get(chunk_id, {}).get("index") != index:
+                moved_ids.append(chunk_id)
+                moved_metas.append(chunk_meta)
+            else:
+                stats["unchanged"] += 1
+
+        if new_ids:
+            self.vector_service.upsert_chunks(new_ids, new_chunks, new_metas)
+            stats["added"] += len(new_ids)
+        if moved_ids:
+            self.vector_service.update_metadata(moved_ids, moved_metas)
+            stats["moved"] += len(moved_ids)
+
+        if self.lexical_index is not None:
+            indexed = self.lexical_index.existing_ids([chunk_id for chunk_id, _, _, _ in batch])
+            missing = [(chunk_id, chunk) for chunk_id, chunk, _, _ in batch if chunk_id not in indexed]
+            if missing:
+                self.lexical_index.upsert_chunks(
+                    [chunk_id for chunk_id, _ in missing],
+                    [chunk for _, chunk in missing],
+                    [metas[chunk_id] for chunk_id, _ in missing],
+                )
+            moved_indexed = [chunk_id for chunk_id in moved_ids if chunk_id in indexed]
+            if moved_indexed:
+                self.lexical_index.update_metadata(moved_indexed, [metas[chunk_id] for chunk_id in moved_indexed])
+
+    def _delete(self, chunk_ids):
+        self.vector_service.delete_chunks(chunk_ids)
+        if self.lexical_index is not None:
+            self.lexical_index.delete_chunks(chunk_ids)
+
+    def _manifest_path(self, document_id):
+        name = hashlib.sha1(str(document_id).encode("utf-8")).hexdigest()
+        return os.path.join(self.manifest_dir, f"{name}.json")
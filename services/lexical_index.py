@@ -0,0 +1,250 @@
+# services/lexical_index.py
+
+import json
+import math
+import os
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from config.settings import LEXICAL_INDEX_PATH
+from utils.text_ranking import tokenize_terms
+
+
+class LexicalIndex:
+    """
+    BM25 keyword search over document chunks, kept alongside the
+    VectorService holding the same chunks.
+
+    Terms come from tokenize_terms, so ticker symbols, ids and numbers
+    ("tsla", "inv-2023-004", "3.5%") are matched exactly, which embedding
+    search is poor at.
+
+    The inverted index lives in SQLite. Each upsert_chunks() call appends
+    one postings segment per term: two packed arrays of chunk row numbers
+    and term counts. A query reads only its own terms' segments and
+    scores them with NumPy against chunk lengths held in memory, so it
+    stays in the milliseconds even for terms found in most chunks.
+    Deleting a chunk only drops its row; its postings are skipped until
+    compact() rewrites them, which happens on its own once deleted rows
+    outnumber live ones.
+    """
+
+    def __init__(self, path=LEXICAL_INDEX_PATH, k1=1.5, b=0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            " row INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT NOT NULL UNIQUE,"
+            " document TEXT NOT NULL, metadata TEXT, length INTEGER NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS postings ("
+            " term TEXT NOT NULL, segment INTEGER NOT NULL, rows BLOB NOT NULL, tfs BLOB NOT NULL,"
+            " PRIMARY KEY (term, segment)) WITHOUT ROWID;"
+            "CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value INTEGER NOT NULL);"
+        )
+        self._conn.commit()
+        self._segment = self._conn.execute("SELECT COALESCE(MAX(segment), 0) FROM postings").fetchone()[0]
+
+        # Chunk lengths by row number (0 for deleted rows), loaded on first use.
+        self._lengths = None
+        # Deleted chunks whose postings are still stored.
+        row = self._conn.execute("SELECT value FROM state WHERE key = 'dead'").fetchone()
+        self._dead = row[0] if row else 0
+
+    def count(self):
+        with self._lock:
+            return int(np.count_nonzero(self._chunk_lengths()))
+
+    def existing_ids(self, ids):
+        """
+        Returns the subset of `ids` already indexed.
+        """
+        with self._lock:
+            return {row[0] for row in self._select("SELECT id FROM chunks WHERE id IN ({})", ids)}
+
+    def upsert_chunks(self, ids, chunks, metadatas=None):
+        """
+        Indexes `chunks`, replacing any chunks already stored under the same ids.
+        """
+        if not ids:
+            return
+        metadatas = metadatas if metadatas is not None else [None] * len(ids)
+        counts = [Counter(tokenize_terms(chunk)) for chunk in chunks]
+        with self._lock:
+            lengths = self._chunk_lengths()
+            with self._conn:
+                self._delete(ids)
+                rows = []
+                for chunk_id, chunk, meta, tf in zip(ids, chunks, metadatas, counts):
+                    cursor = self._conn.execute(
+                        "INSERT INTO chunks (id, document, metadata, length) VALUES (?, ?, ?, ?)",
+                        (chunk_id, chunk, _dumps(meta), max(1, sum(tf.values()))),
+                    )
+                    rows.append(cursor.lastrowid)
+
+                postings = defaultdict(lambda: ([], []))
+                for row, tf in zip(rows, counts):
+                    for term, n in tf.items():
+                        postings[term][0].append(row)
+                        postings[term][1].append(n)
+                self._segment += 1
+                self._conn.executemany(
+                    "INSERT INTO postings (term, segment, rows, tfs) VALUES (?, ?, ?, ?)",
+                    [(term, self._segment, np.array(term_rows, dtype=np.int64).tobytes(),
+                      np.array(term_tfs, dtype=np.int32).tobytes())
+                     for term, (term_rows, term_tfs) in postings.items()],
+                )
+
+            lengths = self._lengths = np.concatenate([lengths, np.zeros(max(rows) + 1 - len(lengths))])
+            lengths[rows] = [max(1, sum(tf.values())) for tf in counts]
+
+    def update_metadata(self, ids, metadatas):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE chunks SET metadata = ? WHERE id = ?",
+                [(_dumps(meta), chunk_id) for chunk_id, meta in zip(ids, metadatas)],
+            )
+
+    def delete_chunks(self, ids):
+        with self._lock:
+            self._chunk_lengths()
+            with self._conn:
+                self._delete(ids)
+            if self._dead > np.count_nonzero(self._lengths):
+                self._compact()
+
+    def compact(self):
+        """
+        Rewrites the postings as one segment per term, without deleted chunks.
+        """
+        with self._lock:
+            self._chunk_lengths()
+            self._compact()
+
+    def search(self, query, top_k=10):
+        """
+        The `top_k` chunks with the highest BM25 score for `query`, as
+        (chunk_id, chunk, metadata) triples, best first. Chunks sharing no
+        term with the query are never returned.
+        """
+        query_terms = sorted(set(tokenize_terms(query)))
+        if not query_terms or top_k <= 0:
+            return []
+        with self._lock:
+            lengths = self._chunk_lengths()
+            live = lengths > 0
+            n_chunks = int(np.count_nonzero(live))
+            if not n_chunks:
+                return []
+            avg_length = lengths[live].mean()
+
+            all_rows, all_scores = [], []
+            for term in query_terms:
+                rows, tfs = self._postings(term)
+                keep = live[rows]
+                rows, tfs = rows[keep], tfs[keep]
+                if not len(rows):
+                    continue
+                idf = math.log(1 + (n_chunks - len(rows) + 0.5) / (len(rows) + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * lengths[rows] / avg_length)
+                all_rows.append(rows)
+                all_scores.append(idf * tfs * (self.k1 + 1) / (tfs + norm))
+            if not all_rows:
+                return []
+
+            scores = np.bincount(np.concatenate(all_rows), weights=np.concatenate(all_scores),
+                                 minlength=len(lengths))
+            matched = np.flatnonzero(scores)
+            if len(matched) > top_k:
+                matched = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+            # Highest score first; ties keep insertion order.
+            best = [int(row) for row in matched[np.lexsort((matched, -scores[matched]))]]
+            found = {row[0]: row[1:] for row in self._select(
+                "SELECT row, id, document, metadata FROM chunks WHERE row IN ({})", best)}
+        return [(found[row][0], found[row][1], _loads(found[row][2])) for row in best if row in found]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    def _chunk_lengths(self):
+        # Caller holds self._lock.
+        if self._lengths is None:
+            rows = self._conn.execute("SELECT row, length FROM chunks").fetchall()
+            last = self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'chunks'")
+            lengths = np.zeros(max(last.fetchone()[0], 0) + 1)
+            if rows:
+                row_numbers, row_lengths = zip(*rows)
+                lengths[list(row_numbers)] = row_lengths
+            self._lengths = lengths
+        return self._lengths
+
+    def _postings(self, term):
+        segments = self._conn.execute("SELECT rows, tfs FROM postings WHERE term = ?", (term,)).fetchall()
+        if not segments:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32)
+        rows = np.concatenate([np.frombuffer(r, dtype=np.int64) for r, _ in segments])
+        tfs = np.concatenate([np.frombuffer(t, dtype=np.int32) for _, t in segments])
+        return rows, tfs
+
+    def _delete(self, ids):
+        # Caller holds self._lock and an open transaction.
+        removed = [row for (row,) in self._select("SELECT row FROM chunks WHERE id IN ({})", ids)]
+        if not removed:
+            return
+        self._conn.executemany("DELETE FROM chunks WHERE row = ?", [(row,) for row in removed])
+        self._lengths[removed] = 0
+        self._dead += len(removed)
+        self._save_dead()
+
+    def _compact(self):
+        # Caller holds self._lock.
+        live = self._lengths > 0
+        with self._conn:
+            terms = [term for (term,) in self._conn.execute("SELECT DISTINCT term FROM postings").fetchall()]
+            merged = []
+            for term in terms:
+                rows, tfs = self._postings(term)
+                keep = live[rows]
+                if keep.any():
+                    merged.append((term, 1, rows[keep].tobytes(), tfs[keep].tobytes()))
+            self._conn.execute("DELETE FROM postings")
+            self._conn.executemany("INSERT INTO postings (term, segment, rows, tfs) VALUES (?, ?, ?, ?)", merged)
+            self._dead = 0
+            self._save_dead()
+        self._segment = 1
+
+    def _save_dead(self):
+        self._conn.execute(
+            "INSERT INTO state (key, value) VALUES ('dead', ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (self._dead,)
+        )
+
+    def _select(self, sql, values):
+        # Runs `sql` with its "IN ({})" bound to `values`, in chunks that stay
+        # under SQLite's variable limit.
+        results = []
+        values = list(values)
+        for i in range(0, len(values), 900):
+            part = values[i:i + 900]
+            results.extend(self._conn.execute(sql.format(",".join("?" * len(part))), part).fetchall())
+        return results
+
+
+def _dumps(metadata):
+    return json.dumps(metadata) if metadata else None
+
+
+def _loads(metadata):
+    return json.loads(metadata) if metadata else None
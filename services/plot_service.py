@@ -0,0 +1,134 @@
+# services/plot_service.py
+
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from config.settings import PLOT_CACHE_ITEMS, PLOT_MAX_LINE_POINTS
+
+
+class PlotService:
+    """
+    Renders charts of DataFrame columns to PNG bytes without pyplot's global
+    state: figures are drawn on the Agg canvas and reused per thread and
+    size. Large columns are pre-binned (histograms) or decimated (lines)
+    before matplotlib sees them, and rendered images are cached by
+    (DataFrame fingerprint, column, chart type, size).
+
+    DataFrames are assumed not to be mutated in place after they are
+    plotted; their fingerprint is computed once and remembered.
+    """
+
+    KINDS = ("hist", "line")
+
+    def __init__(self, cache_items=PLOT_CACHE_ITEMS, max_line_points=PLOT_MAX_LINE_POINTS):
+        self.cache_items = cache_items
+        self.max_line_points = max_line_points
+        self.stats = {"hits": 0, "misses": 0}
+
+        self._cache = OrderedDict()
+        self._fingerprints = {}  # id(df) -> (weakref to df, fingerprint)
+        # Re-entrant: a weakref callback may fire (via GC) while the lock is held.
+        self._lock = threading.RLock()
+        self._local = threading.local()
+
+    def render(self, df, column, kind="hist", size=(6, 4), dpi=100, bins=20):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unsupported chart type '{kind}', expected one of {self.KINDS}")
+
+        key = (self.fingerprint(df), column, kind, tuple(size), dpi, bins)
+        with self._lock:
+            image = self._cache.get(key)
+            if image is not None:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+                return image
+            self.stats["misses"] += 1
+
+        values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        fig = self._figure(size, dpi)
+        ax = fig.add_subplot(111)
+        if kind == "hist":
+            finite = values[np.isfinite(values)]
+            counts, edges = np.histogram(finite, bins=bins)
+            ax.stairs(counts, edges, fill=True)
+            ax.set_title(f"Histogram of {column}")
+        else:
+            x, y = self._decimate(values)
+            ax.plot(x, y, linewidth=0.8)
+            ax.set_title(f"{column}")
+
+        buf = BytesIO()
+        fig.savefig(buf, format="png")
+        image = buf.getvalue()
+
+        with self._lock:
+            self._cache[key] = image
+            while len(self._cache) > self.cache_items:
+                self._cache.popitem(last=False)
+        return image
+
+    def fingerprint(self, df):
+        with self._lock:
+            entry = self._fingerprints.get(id(df))
+            if entry is not None and entry[0]() is df:
+                return entry[1]
+
+        h = hashlib.sha1()
+        h.update(repr((df.shape, list(df.columns), [str(t) for t in df.dtypes])).encode("utf-8"))
+        # Every row: it is hashed once per DataFrame, and a sample would let
+        # two frames differing in an unsampled row share cached charts.
+        h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+        fingerprint = h.hexdigest()
+
+        df_id = id(df)
+        with self._lock:
+            self._fingerprints[df_id] = (weakref.ref(df, lambda _: self._forget(df_id)), fingerprint)
+        return fingerprint
+
+    # ------------------------------------------------------------------
+    def _forget(self, df_id):
+        with self._lock:
+            self._fingerprints.pop(df_id, None)
+
+    def _figure(self, size, dpi):
+        """
+        Returns a cleared figure for this thread, reused across renders of the same size.
+        """
+        figures = getattr(self._local, "figures", None)
+        if figures is None:
+            figures = self._local.figures = {}
+        fig = figures.get((tuple(size), dpi))
+        if fig is None:
+            fig = Figure(figsize=size, dpi=dpi)
+            FigureCanvasAgg(fig)
+            figures[(tuple(size), dpi)] = fig
+        fig.clear()
+        return fig
+
+    def _decimate(self, values):
+        """
+        Keeps the min and max of each bucket, so spikes survive downsampling.
+        """
+        n = len(values)
+        if n <= self.max_line_points:
+            return np.arange(n), values
+
+        buckets = self.max_line_points // 2
+        usable = n - n % buckets
+        shaped = values[:usable].reshape(buckets, -1)
+        width = shaped.shape[1]
+        argmin = np.argmin(np.where(np.isnan(shaped), np.inf, shaped), axis=1)
+        argmax = np.argmax(np.where(np.isnan(shaped), -np.inf, shaped), axis=1)
+        offsets = np.arange(buckets) * width
+        # The few trailing points that don't fill a bucket are kept as they are.
+        idx = np.concatenate([np.sort(np.concatenate([offsets + argmin, offsets + argmax])),
+                              np.arange(usable, n)])
+        return idx, values[idx]
@@ -0,0 +1,164 @@
+# services/response_cache.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from config.settings import (
+    RESPONSE_CACHE_PATH,
+    RESPONSE_CACHE_TTL,
+    RESPONSE_CACHE_MAX_ITEMS,
+    RESPONSE_CACHE_MEMORY_ITEMS,
+)
+
+# Hits remembered before their last_used times are written out together.
+TOUCH_BATCH = 64
+
+
+def response_key(model, messages, **params):
+    """
+    sha256 of the request: model, the exact messages and every other
+    parameter that changes the completion (temperature, max_tokens...).
+    """
+    request = {"model": model, "messages": messages, **params}
+    canonical = json.dumps(request, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Exact-match cache of chat completions, keyed by response_key(). Entries
+    expire `ttl` seconds after they were written; recently used ones are
+    kept in an in-memory LRU and everything is persisted in SQLite,
+    evicting least recently used rows once the table grows past `max_items`.
+
+    A hit doesn't write to disk: last_used times are collected in memory
+    and saved in batches, before eviction and on close().
+    """
+
+    def __init__(self, path=RESPONSE_CACHE_PATH, ttl=RESPONSE_CACHE_TTL,
+                 max_items=RESPONSE_CACHE_MAX_ITEMS, memory_items=RESPONSE_CACHE_MEMORY_ITEMS):
+        self.path = path
+        self.ttl = ttl
+        self.max_items = max_items
+        self.memory_items = memory_items
+        self.stats = {"hits": 0, "misses": 0, "expired": 0}
+
+        self._memory = OrderedDict()  # key -> (response, expires_at)
+        self._touched = {}  # key -> last_used not yet written to disk
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " model TEXT NOT NULL,"
+            " response TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used)")
+        self._conn.commit()
+
+    def get(self, key):
+        """
+        Returns the cached response for `key`, or None if there is none or it expired.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                row = self._conn.execute(
+                    "SELECT response, expires_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                entry = tuple(row) if row else None
+
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            response, expires_at = entry
+            if expires_at <= now:
+                self._memory.pop(key, None)
+                self._touched.pop(key, None)
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+
+            self._remember(key, entry)
+            self._touched[key] = now
+            if len(self._touched) >= TOUCH_BATCH:
+                self._save_touched()
+                self._conn.commit()
+            self.stats["hits"] += 1
+            return response
+
+    def put(self, key, model, response):
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._remember(key, (response, expires_at))
+            self._touched.pop(key, None)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, expires_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, model, response, expires_at, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def hit_rate(self):
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._save_touched()
+            self._conn.commit()
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _save_touched(self):
+        # Caller holds self._lock and commits.
+        if self._touched:
+            self._conn.executemany("UPDATE responses SET last_used = ? WHERE key = ?",
+                                   [(used, key) for key, used in self._touched.items()])
+            self._touched.clear()
+
+    def _evict(self, now):
+        # Recent hits must count before picking the least recently used rows.
+        self._save_touched()
+        self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        if count <= self.max_items:
+            return
+        # Trim to 90% so we don't evict on every single insert once full.
+        excess = count - int(self.max_items * 0.9)
+        evicted = [key for (key,) in self._conn.execute(
+            "SELECT key FROM responses ORDER BY last_used LIMIT ?", (excess,)
+        ).fetchall()]
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", [(key,) for key in evicted])
+        for key in evicted:
+            self._memory.pop(key, None)
@@ -0,0 +1,204 @@
+# services/timeseries_index.py
+
+import re
+
+import numpy as np
+import pandas as pd
+
+AGGREGATIONS = {
+    "mean": np.nanmean,
+    "sum": np.nansum,
+    "min": np.nanmin,
+    "max": np.nanmax,
+    "count": lambda values: int(np.count_nonzero(~pd.isna(values))),
+    "first": lambda values: values[0],
+    "last": lambda values: values[-1],
+}
+
+# NumPy dtype kinds each aggregation can run on (numbers for mean/sum, anything
+# ordered, such as dates, for min/max); the others take any column.
+AGGREGATION_KINDS = {"mean": "biufc", "sum": "biufc", "min": "biufmM", "max": "biufmM"}
+
+# Words users type for each aggregation.
+AGGREGATION_WORDS = {
+    "mean": "mean", "average": "mean", "avg": "mean",
+    "total": "sum", "sum": "sum",
+    "min": "min", "minimum": "min", "lowest": "min",
+    "max": "max", "maximum": "max", "highest": "max",
+    "count": "count",
+    "first": "first", "opening": "first",
+    "last": "last", "closing": "last",
+}
+
+_DATE = re.compile(r"\b\d{4}-\d{2}-\d{2}\b")
+
+
+class TimeSeriesIndex:
+    """
+    Index over a long-format time series DataFrame (one row per key and date,
+    e.g. Company/Date). Rows are ordered once by (key, date) so every key is
+    a contiguous partition and date ranges inside it are found with
+    searchsorted; filters and aggregates only touch the matching slice.
+
+    The DataFrame itself isn't copied: the index keeps the sort permutation
+    and the sorted dates, and "row positions" below are positions in that
+    (key, date) order, turned back into rows with take(). Columns are
+    gathered into sorted arrays the first time they are aggregated.
+    """
+
+    def __init__(self, df, key_column="Company", date_column="Date"):
+        self.df = df
+        self.key_column = key_column
+        self.date_column = date_column
+
+        dates = pd.to_datetime(df[date_column]).to_numpy(dtype="datetime64[ns]").view("int64")
+        codes, keys = pd.factorize(df[key_column], sort=True)
+        self.order = np.lexsort((dates, codes))
+        self._dates = dates[self.order]
+
+        sorted_codes = codes[self.order]
+        bounds = np.flatnonzero(np.diff(sorted_codes)) + 1
+        starts = np.concatenate([[0], bounds])
+        stops = np.concatenate([bounds, [len(sorted_codes)]])
+        self.partitions = {
+            keys[sorted_codes[start]]: (int(start), int(stop))
+            for start, stop in zip(starts, stops) if stop > start
+        }
+        self._columns = {}
+
+    @property
+    def keys(self):
+        return list(self.partitions)
+
+    @property
+    def columns(self):
+        return self.df.columns
+
+    def span(self, key, start=None, end=None):
+        """
+        Returns the (lo, hi) row positions for `key` between `start` and
+        `end` (both inclusive; a date-only `end` covers the whole day).
+        """
+        if key not in self.partitions:
+            return 0, 0
+        lo, hi = self.partitions[key]
+        dates = self._dates[lo:hi]
+        if start is not None:
+            lo_offset = np.searchsorted(dates, _to_ns(start), side="left")
+        else:
+            lo_offset = 0
+        if end is not None:
+            hi_offset = np.searchsorted(dates, _to_ns(end, end_of_day=True), side="right")
+        else:
+            hi_offset = hi - lo
+        return lo + int(lo_offset), lo + int(max(lo_offset, hi_offset))
+
+    def rows(self, key, start=None, end=None):
+        lo, hi = self.span(key, start, end)
+        return self.take(np.arange(lo, hi))
+
+    def take(self, positions):
+        """
+        The DataFrame rows at `positions`, in that order, with the date
+        column parsed.
+        """
+        positions = np.asarray(positions, dtype="int64")
+        rows = self.df.iloc[self.order[positions]]
+        if rows[self.date_column].dtype.kind != "M":
+            rows = rows.assign(**{self.date_column: self._dates[positions].view("datetime64[ns]")})
+        return rows
+
+    def position(self, key, date):
+        """
+        Row position of the exact (key, date) entry, or None.
+        """
+        if key not in self.partitions:
+            return None
+        lo, hi = self.partitions[key]
+        target = _to_ns(date)
+        offset = np.searchsorted(self._dates[lo:hi], target, side="left")
+        if offset < hi - lo and self._dates[lo + offset] == target:
+            return lo + int(offset)
+        return None
+
+    def aggregate(self, key, aggregations, start=None, end=None):
+        """
+        `aggregations` is a list of (aggregation, column) pairs, e.g.
+        [("mean", "Close"), ("sum", "Volume")]. Returns (row_count, results)
+        where results maps each pair to its value (None when no rows match).
+        Raises ValueError for an aggregation the column's type doesn't
+        support (see supports()).
+        """
+        for agg, column in aggregations:
+            if not self.supports(agg, column):
+                raise ValueError(f"Can't {agg} column {column!r} of type {self.column(column).dtype}")
+        lo, hi = self.span(key, start, end)
+        results = {}
+        for agg, column in aggregations:
+            values = self.column(column)[lo:hi]
+            results[(agg, column)] = AGGREGATIONS[agg](values) if hi > lo else None
+        return hi - lo, results
+
+    def supports(self, agg, column):
+        """
+        Whether `agg` can run on `column`, e.g. not "mean" on a date column.
+        """
+        kinds = AGGREGATION_KINDS.get(agg)
+        return kinds is None or self.column(column).dtype.kind in kinds
+
+    def column(self, column):
+        """
+        `column` as an array in row-position order.
+        """
+        values = self._columns.get(column)
+        if values is None:
+            if column == self.date_column:
+                values = self._dates.view("datetime64[ns]")
+            else:
+                values = self.df[column].to_numpy()[self.order]
+            self._columns[column] = values
+        return values
+
+
+def _to_ns(value, end_of_day=False):
+    ts = pd.Timestamp(value)
+    if end_of_day and ts == ts.normalize() and not (isinstance(value, str) and ":" in value):
+        ts = ts + pd.Timedelta(days=1) - pd.Timedelta(1, unit="ns")
+    return ts.value
+
+
+def parse_query(user_msg, index):
+    """
+    Pulls a filter/aggregate request out of free text, e.g.
+    "mean Close and total Volume for TSLA between 2022-03-01 and 2022-04-30".
+    Returns {"keys", "start", "end", "aggregations"} or None if the message
+    names no aggregation over a known column.
+    """
+    columns = {str(c).lower(): c for c in index.columns}
+    words = re.findall(r"[A-Za-z][\w.]*", user_msg)
+
+    aggregations = []
+    for word, next_word in zip(words, words[1:]):
+        agg = AGGREGATION_WORDS.get(word.lower())
+        column = columns.get(next_word.lower())
+        if agg and column is not None and (agg, column) not in aggregations:
+            aggregations.append((agg, column))
+    if not aggregations:
+        return None
+
+    keys, start, end = extract_keys_and_dates(user_msg, index)
+    return {"keys": keys or index.keys, "start": start, "end": end, "aggregations": aggregations}
+
+
+def extract_keys_and_dates(text, index):
+    """
+    Returns (keys, start, end): index keys named in `text`, in order of
+    appearance, and the first two YYYY-MM-DD dates (a single date is used as
+    both start and end).
+    """
+    words = re.findall(r"[A-Za-z][\w.]*", text)
+    keys = [w for w in dict.fromkeys(words) if w in index.partitions]
+    dates = _DATE.findall(text)
+    start = dates[0] if dates else None
+    end = dates[1] if len(dates) > 1 else start
+    return keys, start, end
@@ -0,0 +1,399 @@
+# services/vector_index.py
+
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+# Rows scored per matrix multiply; bounds the (queries x rows) score buffer
+# and lets a memory-mapped matrix bigger than RAM be scanned page by page.
+BLOCK_ROWS = 65536
+# The vector file grows by doubling, starting at this many rows.
+MIN_CAPACITY = 1024
+# A filter matching more than 1/SCAN_FRACTION of the rows is applied as a
+# mask over a full scan instead of by gathering the matching vectors.
+SCAN_FRACTION = 8
+# `where` filters whose matching rows are remembered until the next write.
+FILTER_CACHE_ITEMS = 32
+
+_OPERATORS = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+
+class NumpyVectorIndex:
+    """
+    Brute-force cosine similarity index in a directory, for desktop-sized
+    corpora where a vector database's start-up and per-query overhead
+    outweigh the search itself.
+
+    Vectors are L2-normalized once at insert and kept in one contiguous
+    float32 matrix in a memory-mapped file (vectors.f32), with a byte per
+    row marking it live (live.u8). Ids, documents, metadata and the index
+    settings live in SQLite (index.sqlite3). Opening maps the files and
+    reads one settings row, so it costs the same at any size.
+
+    A search scores all live rows with one matrix product per BLOCK_ROWS
+    rows and keeps the best k with argpartition; several queries are
+    scored together. A `where` filter selects the candidate rows in SQLite
+    first (remembered until the next write) and only those vectors are scored.
+
+    The methods mirror the parts of a Chroma collection VectorService uses
+    (upsert, update, delete, get, query, count, metadata, modify), so the
+    two are interchangeable behind it. Deleted rows are only marked dead;
+    their space is not reused.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.RLock()
+
+        self._db = sqlite3.connect(os.path.join(path, "index.sqlite3"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS rows ("
+            " row INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE, document TEXT, metadata TEXT);"
+            "CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL);"
+        )
+        self._db.commit()
+
+        settings = dict(self._db.execute("SELECT key, value FROM settings").fetchall())
+        self.dimension = int(settings["dimension"]) if "dimension" in settings else None
+        self._rows = int(settings.get("rows", 0))
+        self.metadata = json.loads(settings["metadata"]) if "metadata" in settings else None
+
+        self._vectors = None
+        self._live = None
+        self._filters = {}  # where (as JSON) -> matching rows
+        if self.dimension is not None:
+            self._map(self._capacity_on_disk())
+
+    # ------------------------------------------------------------------
+    # Collection interface
+    # ------------------------------------------------------------------
+    def count(self):
+        with self._lock:
+            if self._live is None:
+                return 0
+            return int(np.count_nonzero(self._live[:self._rows]))
+
+    def modify(self, metadata=None):
+        with self._lock:
+            self.metadata = metadata
+            self._set_settings(metadata=json.dumps(metadata))
+            self._db.commit()
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        """
+        Inserts rows, or overwrites the vector, document and metadata of
+        ids already present.
+        """
+        if not ids:
+            return
+        vectors = _normalized(np.asarray(embeddings, dtype=np.float32))
+        if vectors.ndim != 2 or len(vectors) != len(ids):
+            raise ValueError("upsert needs one embedding per id.")
+        documents = documents if documents is not None else [None] * len(ids)
+        metadatas = metadatas if metadatas is not None else [None] * len(ids)
+
+        with self._lock:
+            if self.dimension is None:
+                self.dimension = vectors.shape[1]
+                self._set_settings(dimension=str(self.dimension))
+                self._map(0)
+            elif vectors.shape[1] != self.dimension:
+                raise ValueError(
+                    f"Embedding dimension {vectors.shape[1]} does not match the index ({self.dimension})."
+                )
+
+            existing = self._rows_for(ids)
+            rows = np.empty(len(ids), dtype=np.int64)
+            next_row = self._rows
+            for i, id_ in enumerate(ids):
+                if id_ in existing:
+                    rows[i] = existing[id_]
+                else:
+                    rows[i] = next_row
+                    existing[id_] = next_row  # a repeated id within the call reuses its row
+                    next_row += 1
+            self._reserve(next_row)
+
+            # Vectors first, then the rows that point at them, then the live
+            # flags: an interrupted write leaves rows invisible, never wrong.
+            self._vectors[rows] = vectors
+            self._vectors.flush()
+            with self._db:
+                self._db.executemany(
+                    "INSERT INTO rows (row, id, document, metadata) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET document = excluded.document, metadata = excluded.metadata",
+                    [(int(row), id_, doc, _dumps(meta)) for row, id_, doc, meta in zip(rows, ids, documents, metadatas)],
+                )
+                self._set_settings(rows=str(next_row))
+            self._rows = next_row
+            self._filters.clear()
+            self._live[rows] = 1
+            self._live.flush()
+
+    def update(self, ids, metadatas):
+        """
+        Merges `metadatas` into the stored metadata of each id (a None value
+        removes the key). Unknown ids are ignored.
+        """
+        with self._lock:
+            stored = {id_: json.loads(meta) if meta else {} for id_, meta in self._select(
+                "SELECT id, metadata FROM rows WHERE id IN ({})", ids)}
+            updates = []
+            for id_, meta in zip(ids, metadatas):
+                if id_ not in stored:
+                    continue
+                merged = stored[id_]
+                merged.update(meta or {})
+                merged = {k: v for k, v in merged.items() if v is not None}
+                updates.append((_dumps(merged), id_))
+            with self._db:
+                self._db.executemany("UPDATE rows SET metadata = ? WHERE id = ?", updates)
+            self._filters.clear()
+
+    def delete(self, ids):
+        with self._lock:
+            rows = list(self._rows_for(ids).values())
+            if not rows:
+                return
+            self._live[rows] = 0
+            self._live.flush()
+            with self._db:
+                self._db.executemany("DELETE FROM rows WHERE id = ?", [(id_,) for id_ in ids])
+            self._filters.clear()
+
+    def get(self, ids=None, where=None, include=("documents", "metadatas")):
+        """
+        Rows by id and/or `where` filter, as {"ids", "documents", "metadatas"}
+        (only the keys asked for in `include`, besides ids).
+        """
+        clause, params = _where_sql(where) if where else ("1", [])
+        sql = f"SELECT id, document, metadata FROM rows WHERE {clause}"
+        with self._lock:
+            if ids is not None:
+                found = self._select(sql + " AND id IN ({})", ids, params)
+            else:
+                found = self._db.execute(sql + " ORDER BY row", params).fetchall()
+        result = {"ids": [r[0] for r in found]}
+        if "documents" in include:
+            result["documents"] = [r[1] for r in found]
+        if "metadatas" in include:
+            result["metadatas"] = [_loads(r[2]) for r in found]
+        return result
+
+    def query(self, query_embeddings, n_results=10, where=None, include=None):
+        """
+        The `n_results` rows most similar to each query embedding, as
+        {"ids", "documents", "metadatas", "distances"}, each a list with one
+        list per query, best first. Distances are cosine distances (1 - cosine).
+        """
+        queries = _normalized(np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32)))
+        with self._lock:
+            if self.dimension is not None and queries.shape[1] != self.dimension:
+                raise ValueError(
+                    f"Query dimension {queries.shape[1]} does not match the index ({self.dimension})."
+                )
+            candidates = self._filter_rows(where) if where else None
+            if candidates is not None and len(candidates):
+                candidates = candidates[self._live[candidates] == 1]
+            best_rows, best_scores = self._top_k(queries, n_results, candidates)
+            wanted = np.unique(np.concatenate(best_rows)) if best_rows else []
+            details = {row: (id_, doc, _loads(meta)) for row, id_, doc, meta in self._select(
+                "SELECT row, id, document, metadata FROM rows WHERE row IN ({})", [int(r) for r in wanted])}
+
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for rows, scores in zip(best_rows, best_scores):
+            hits = [(details[int(row)], score) for row, score in zip(rows, scores) if int(row) in details]
+            result["ids"].append([d[0] for d, _ in hits])
+            result["documents"].append([d[1] for d, _ in hits])
+            result["metadatas"].append([d[2] for d, _ in hits])
+            result["distances"].append([float(1.0 - score) for _, score in hits])
+        return result
+
+    def close(self):
+        with self._lock:
+            self._vectors = self._live = None
+            self._db.close()
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+    def _top_k(self, queries, k, candidates=None):
+        """
+        Returns (rows, scores): per query, the best k row numbers and their
+        scores, best first. `candidates` restricts the search to those rows.
+        """
+        m = len(queries)
+        empty = [np.empty(0, dtype=np.int64)] * m, [np.empty(0, dtype=np.float32)] * m
+        if self._vectors is None or k <= 0:
+            return empty
+
+        n = self._rows
+        if candidates is not None:
+            if len(candidates) == 0:
+                return empty
+            if len(candidates) * SCAN_FRACTION < n:
+                # Few enough rows that gathering them beats scanning everything.
+                scores = queries @ self._vectors[candidates].T
+                return _best(scores, candidates, k)
+            searchable = np.zeros(n, dtype=bool)
+            searchable[candidates] = True
+        else:
+            searchable = self._live[:n].astype(bool)
+
+        best_rows = np.empty((m, 0), dtype=np.int64)
+        best_scores = np.empty((m, 0), dtype=np.float32)
+        for start in range(0, n, BLOCK_ROWS):
+            stop = min(start + BLOCK_ROWS, n)
+            live = searchable[start:stop]
+            if not live.any():
+                continue
+            scores = queries @ self._vectors[start:stop].T
+            if not live.all():
+                scores[:, ~live] = -np.inf
+            block_rows = np.broadcast_to(np.arange(start, stop), scores.shape)
+            # Keep only each block's best k before merging with the running best.
+            if scores.shape[1] > k:
+                keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                scores = np.take_along_axis(scores, keep, axis=1)
+                block_rows = np.take_along_axis(block_rows, keep, axis=1)
+            best_scores = np.concatenate([best_scores, scores], axis=1)
+            best_rows = np.concatenate([best_rows, block_rows], axis=1)
+            if best_scores.shape[1] > k:
+                keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_rows = np.take_along_axis(best_rows, order, axis=1)
+        found = np.isfinite(best_scores)
+        return [r[f] for r, f in zip(best_rows, found)], [s[f] for s, f in zip(best_scores, found)]
+
+    def _filter_rows(self, where):
+        key = json.dumps(where, sort_keys=True)
+        rows = self._filters.get(key)
+        if rows is None:
+            clause, params = _where_sql(where)
+            found = self._db.execute(f"SELECT row FROM rows WHERE {clause} ORDER BY row", params).fetchall()
+            rows = np.fromiter((r[0] for r in found), dtype=np.int64, count=len(found))
+            if len(self._filters) >= FILTER_CACHE_ITEMS:
+                self._filters.pop(next(iter(self._filters)))
+            self._filters[key] = rows
+        return rows
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+    def _capacity_on_disk(self):
+        size = os.path.getsize(self._vector_path) if os.path.exists(self._vector_path) else 0
+        return size // (4 * self.dimension)
+
+    @property
+    def _vector_path(self):
+        return os.path.join(self.path, "vectors.f32")
+
+    @property
+    def _live_path(self):
+        return os.path.join(self.path, "live.u8")
+
+    def _reserve(self, rows):
+        capacity = 0 if self._vectors is None else self._vectors.shape[0]
+        if rows > capacity:
+            self._map(max(MIN_CAPACITY, rows, capacity * 2))
+
+    def _map(self, capacity):
+        """
+        (Re)maps the vector and live-flag files with room for `capacity` rows,
+        extending them first if needed (new rows read as zeros / not live).
+        """
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._live.flush()
+        self._vectors = self._live = None
+        capacity = max(capacity, MIN_CAPACITY)
+        for path, row_bytes in ((self._vector_path, 4 * self.dimension), (self._live_path, 1)):
+            with open(path, "ab") as f:
+                if f.tell() < capacity * row_bytes:
+                    f.truncate(capacity * row_bytes)
+        self._vectors = np.memmap(self._vector_path, dtype=np.float32, mode="r+", shape=(capacity, self.dimension))
+        self._live = np.memmap(self._live_path, dtype=np.uint8, mode="r+", shape=(capacity,))
+
+    def _rows_for(self, ids):
+        return dict(self._select("SELECT id, row FROM rows WHERE id IN ({})", ids))
+
+    def _select(self, sql, values, params=()):
+        # Runs `sql` with its "IN ({})" bound to `values`, in chunks that stay
+        # under SQLite's variable limit.
+        results = []
+        values = list(values)
+        for i in range(0, len(values), 900):
+            part = values[i:i + 900]
+            results.extend(self._db.execute(sql.format(",".join("?" * len(part))), [*params, *part]).fetchall())
+        return results
+
+    def _set_settings(self, **values):
+        self._db.executemany(
+            "INSERT INTO settings (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            list(values.items()),
+        )
+
+
+def _best(scores, rows, k):
+    k = min(k, scores.shape[1])
+    keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top = np.take_along_axis(scores, keep, axis=1)
+    order = np.argsort(-top, axis=1, kind="stable")
+    keep = np.take_along_axis(keep, order, axis=1)
+    return [rows[i] for i in keep], list(np.take_along_axis(top, order, axis=1))
+
+
+def _normalized(vectors):
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _where_sql(where):
+    """
+    Translates a Chroma-style metadata filter ({"ticker": "TSLA"},
+    {"year": {"$gte": 2023}}, {"$and": [...]}, {"$or": [...]}, "$in",
+    "$nin") into an SQL condition on the JSON metadata column.
+    """
+    clauses, params = [], []
+    for key, condition in where.items():
+        if key in ("$and", "$or"):
+            parts = [_where_sql(part) for part in condition]
+            joiner = " AND " if key == "$and" else " OR "
+            clauses.append("(" + joiner.join(sql for sql, _ in parts) + ")")
+            params.extend(p for _, part_params in parts for p in part_params)
+            continue
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        field = "json_extract(metadata, ?)"
+        path = '$."' + key.replace('"', '""') + '"'
+        for op, value in condition.items():
+            if op in ("$in", "$nin"):
+                values = list(value)
+                negate = "NOT " if op == "$nin" else ""
+                clauses.append(f"{field} {negate}IN ({','.join('?' * len(values))})")
+                params.extend([path, *values])
+            elif op in _OPERATORS:
+                clauses.append(f"{field} {_OPERATORS[op]} ?")
+                params.extend([path, value])
+            else:
+                raise ValueError(f"Unsupported filter operator {op!r}")
+    return " AND ".join(clauses) or "1", params
+
+
+def _dumps(metadata):
+    return json.dumps(metadata) if metadata else None
+
+
+def _loads(metadata):
+    return json.loads(metadata) if metadata else None
@@ -1,32 +1,126 @@
 # services/vector_service.py
 
-import chromadb
-from chromadb.utils import embedding_functions
-from services.embedding_service import get_embedding
+import os
+
+from config.settings import EMBEDDING_MODEL, VECTOR_BACKEND
+from services.embedding_providers import get_provider
+from utils.tracing import get_tracer
+
+
+def default_collection_name(provider):
+    # Collections made before providers existed hold OpenAI EMBEDDING_MODEL vectors.
+    if provider.name == "openai" and provider.model == EMBEDDING_MODEL:
+        return "doc_embeddings"
+    return f"doc_embeddings_{provider.name}"
 
 
 class VectorService:
-    def __init__(self, collection_name="doc_embeddings"):
-        self.client = chromadb.PersistentClient(path="./vector_db")
-        self.collection_name = collection_name
-        self.collection = self.client.get_or_create_collection(name=self.collection_name)
+    """
+    Document chunks in a vector collection, embedded by an EmbeddingProvider
+    (EMBEDDING_PROVIDER by default). The provider, model and dimension are
+    recorded in the collection's metadata, and a collection is never
+    filled or searched with vectors from a different one.
+
+    `backend` picks the store (VECTOR_BACKEND by default): "chroma", a
+    Chroma persistent collection, or "numpy", a NumpyVectorIndex in
+    <persist_path>/<collection_name>.npindex that opens instantly and
+    searches by brute force. The two don't share data.
+    """
+
+    def __init__(self, collection_name=None, provider=None, persist_path="./vector_db", backend=None):
+        self.provider = provider or get_provider()
+        self.collection_name = collection_name or default_collection_name(self.provider)
+        self.backend = backend or VECTOR_BACKEND
+        if self.backend == "numpy":
+            from services.vector_index import NumpyVectorIndex
+            self.client = None
+            self.collection = NumpyVectorIndex(os.path.join(persist_path, f"{self.collection_name}.npindex"))
+        elif self.backend == "chroma":
+            import chromadb
+            self.client = chromadb.PersistentClient(path=persist_path)
+            self.collection = self.client.get_or_create_collection(name=self.collection_name)
+        else:
+            raise ValueError(f"Unknown vector backend {self.backend!r}; expected 'chroma' or 'numpy'")
+        self._check_metadata()
+
+    def _check_metadata(self):
+        expected = {k: v for k, v in self.provider.metadata().items() if v is not None}
+        stored = dict(self.collection.metadata or {})
+        if "embedding_provider" not in stored and self.collection.count():
+            stored.update(embedding_provider="openai", embedding_model=EMBEDDING_MODEL)
+        mismatched = {k: (stored[k], v) for k, v in expected.items() if k in stored and stored[k] != v}
+        if mismatched:
+            raise ValueError(
+                f"Collection {self.collection_name!r} holds embeddings from a different model "
+                f"(stored vs. requested: {mismatched}); use another collection name."
+            )
+        if any(k not in stored for k in expected):
+            self.collection.modify(metadata={**stored, **expected})
 
     def add_document(self, document_id, chunks, metadata=None):
-        embeddings = [get_embedding(chunk) for chunk in chunks]
-        self.collection.add(
+        self.upsert_chunks(
             ids=[f"{document_id}-{i}" for i in range(len(chunks))],
-            embeddings=embeddings,
-            documents=chunks,
+            chunks=chunks,
             metadatas=None if not metadata else [metadata] * len(chunks)
         )
 
-    def search(self, query, top_k=3):
-        query_embedding = get_embedding(query)
-        results = self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=top_k
+    def upsert_chunks(self, ids, chunks, metadatas=None):
+        """
+        Embeds `chunks` and inserts them, replacing any existing entries with the same ids.
+        """
+        embeddings = self.provider.embed(chunks)
+        if "embedding_dim" not in (self.collection.metadata or {}) and self.provider.dimension:
+            # Providers that only learn their dimension from the model record it now.
+            self._check_metadata()
+        self.collection.upsert(
+            ids=ids,
+            embeddings=embeddings,
+            documents=chunks,
+            metadatas=metadatas
         )
 
-        matched_chunks = results['documents'][0]
-        matched_metadata = results['metadatas'][0]
-        return list(zip(matched_chunks, matched_metadata))
+    def update_metadata(self, ids, metadatas):
+        self.collection.update(ids=ids, metadatas=metadatas)
+
+    def delete_chunks(self, ids):
+        self.collection.delete(ids=ids)
+
+    def existing_ids(self, ids):
+        """
+        Returns the subset of `ids` already stored in the collection.
+        """
+        if not ids:
+            return set()
+        results = self.collection.get(ids=ids, include=[])
+        return set(results["ids"])
+
+    def search(self, query, top_k=3, where=None, with_ids=False):
+        """
+        The `top_k` chunks closest to `query`, as (chunk, metadata) pairs, or
+        (chunk_id, chunk, metadata) triples with `with_ids`. `where`
+        restricts the search to chunks whose metadata matches, e.g.
+        {"document_id": "report.pdf"}.
+        """
+        return self.search_many([query], top_k, where, with_ids)[0]
+
+    def search_many(self, queries, top_k=3, where=None, with_ids=False):
+        """
+        search() for several queries at once: one embedding call and one
+        collection query. Returns a list of results per query.
+        """
+        if not queries:
+            return []
+        tracer = get_tracer()
+        with tracer.span("retrieval", backend=self.backend, queries=len(queries), top_k=top_k):
+            with tracer.span("retrieval.embed", provider=self.provider.name):
+                query_embeddings = self.provider.embed(list(queries))
+            with tracer.span("retrieval.search"):
+                results = self.collection.query(
+                    query_embeddings=query_embeddings,
+                    n_results=top_k,
+                    where=where or None,
+                )
+        columns = (results['ids'], results['documents'], results['metadatas'])
+        if not with_ids:
+            columns = columns[1:]
+        return [list(zip(*per_query)) for per_query in zip(*columns)]
@@ -0,0 +1,133 @@
+# services/web_fetcher.py
+
+import re
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.settings import (
+    WEB_CACHE_TTL,
+    WEB_CACHE_MAX_AGE,
+    WEB_CACHE_MAX_ENTRIES,
+    WEB_MAX_BYTES,
+    WEB_TIMEOUT,
+)
+from utils.text_ranking import STOPWORDS
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+# The commands that trigger a fetch ("fetch http://...", "scrape https://...")
+# say nothing about what to look for on the page, so they are dropped from the
+# question when ranking its passages. Only here: elsewhere they are real words.
+QUERY_STOPWORDS = STOPWORDS | {"fetch", "scrape"}
+
+
+class WebFetcher:
+    """
+    HTTP fetching for the WebAgent:
+      - one pooled requests.Session, so repeated hosts reuse keep-alive connections;
+      - bodies are streamed and cut off at `max_bytes`;
+      - pages are kept in `cache` (normally Blackboard.web_contents) and served
+        without a request while fresh (Cache-Control max-age, else `ttl`);
+        stale pages are revalidated with If-None-Match / If-Modified-Since,
+        so an unchanged page costs a 304;
+      - entries older than `max_age`, or beyond `max_entries`, are evicted.
+    """
+
+    def __init__(self, cache=None, ttl=WEB_CACHE_TTL, max_age=WEB_CACHE_MAX_AGE,
+                 max_entries=WEB_CACHE_MAX_ENTRIES, max_bytes=WEB_MAX_BYTES,
+                 timeout=WEB_TIMEOUT, pool_size=10):
+        self.cache = cache if cache is not None else {}
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.stats = {"fresh_hits": 0, "revalidated": 0, "downloads": 0}
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._lock = threading.Lock()
+
+    def fetch(self, url):
+        """
+        Returns a dict with url, status, text, truncated, etag, last_modified,
+        fetched_at and source ("cache", "revalidated" or "network").
+        """
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            entry = self.cache.get(url)
+            if entry is not None and now - entry["fetched_at"] < entry["fresh_for"]:
+                self.stats["fresh_hits"] += 1
+                return dict(entry, source="cache")
+
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as resp:
+            if resp.status_code == 304 and entry is not None:
+                with self._lock:
+                    entry["fetched_at"] = time.time()
+                    entry["fresh_for"] = self._freshness(resp, default=entry["fresh_for"])
+                    self.stats["revalidated"] += 1
+                return dict(entry, source="revalidated")
+
+            text, truncated = self._read_text(resp)
+            result = {
+                "url": url,
+                "status": resp.status_code,
+                "text": text,
+                "truncated": truncated,
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+                "fetched_at": time.time(),
+                "fresh_for": self._freshness(resp, default=self.ttl),
+            }
+
+        with self._lock:
+            self.stats["downloads"] += 1
+            cacheable = "no-store" not in resp.headers.get("Cache-Control", "")
+            if resp.status_code == 200 and cacheable:
+                self.cache[url] = result
+                self._evict(result["fetched_at"])
+        return dict(result, source="network")
+
+    def close(self):
+        self.session.close()
+
+    # ------------------------------------------------------------------
+    def _read_text(self, resp):
+        parts, size, truncated = [], 0, False
+        for chunk in resp.iter_content(chunk_size=16384):
+            if size + len(chunk) > self.max_bytes:
+                parts.append(chunk[: self.max_bytes - size])
+                truncated = True
+                break
+            parts.append(chunk)
+            size += len(chunk)
+        # Don't let requests sniff the encoding from the body; that needs it whole.
+        return b"".join(parts).decode(resp.encoding or "utf-8", errors="replace"), truncated
+
+    def _freshness(self, resp, default):
+        cache_control = resp.headers.get("Cache-Control", "")
+        if "no-cache" in cache_control:
+            return 0
+        match = _MAX_AGE.search(cache_control)
+        return int(match.group(1)) if match else default
+
+    def _evict(self, now):
+        for url in [u for u, e in self.cache.items() if now - e["fetched_at"] > self.max_age]:
+            del self.cache[url]
+        if len(self.cache) > self.max_entries:
+            oldest = sorted(self.cache, key=lambda u: self.cache[u]["fetched_at"])
+            for url in oldest[: len(self.cache) - self.max_entries]:
+                del self.cache[url]
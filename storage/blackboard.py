@@ -1,8 +1,9 @@
 # chatbot_desktop/storage/blackboard.py
 
 class Blackboard:
-    def __init__(self):
-        self.conversation_history = []
+    def __init__(self, conversation_history=None):
+        # A plain list, or a SessionHistory to keep the conversation on disk.
+        self.conversation_history = conversation_history if conversation_history is not None else []
         self.documents = {}
         self.dataframes = {}
         self.web_contents = {}
@@ -0,0 +1,420 @@
+# chatbot_desktop/storage/conversation_store.py
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+from config.settings import CONVERSATION_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    title TEXT,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    meta TEXT,
+    created_at REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS messages_by_session ON messages (session_id, channel, seq);
+CREATE INDEX IF NOT EXISTS messages_by_time ON messages (created_at);
+"""
+
+# The "display" channel repeats what is in "history", so it is left out of
+# the index; search() would otherwise return every message twice.
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    content, content='messages', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages
+WHEN new.channel != 'display' BEGIN
+    INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF content ON messages
+WHEN new.channel != 'display' BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+END;
+"""
+
+# Databases written before the index skipped "display" have both copies
+# indexed; drop the display rows from the index and recreate the triggers.
+_FTS_MIGRATE = """
+DROP TRIGGER IF EXISTS messages_fts_insert;
+DROP TRIGGER IF EXISTS messages_fts_update;
+INSERT INTO messages_fts (messages_fts, rowid, content)
+    SELECT 'delete', id, content FROM messages WHERE channel = 'display';
+"""
+
+# An append that lost to an update() of the same message (its insert failed
+# and was retried later) must not overwrite the newer row.
+_INSERT = (
+    "INSERT INTO messages (session_id, channel, seq, role, content, meta, created_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (session_id, channel, seq) DO NOTHING"
+)
+
+# Upsert, so an update still lands when the insert it follows failed.
+_UPDATE = (
+    "INSERT INTO messages (session_id, channel, seq, role, content, meta, created_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (session_id, channel, seq) DO UPDATE SET "
+    "role = excluded.role, content = excluded.content, meta = excluded.meta"
+)
+
+_STOP = object()
+
+# A batch that fails to commit is retried this many times (with doubling
+# delays, in seconds) before its writes are tried one at a time.
+WRITE_ATTEMPTS = 3
+WRITE_RETRY_DELAY = 0.2
+
+
+class ConversationStore:
+    """
+    Persistent chat history in SQLite (WAL mode).
+
+    Messages belong to a session and a channel (e.g. "history" for the turns
+    the model sees, "display" for what the chat view shows) and are numbered
+    0, 1, 2... within it. Writes are done by one background thread, so
+    append() returns immediately; until a row is committed it is served
+    from memory, so reads always see every appended message. A message is
+    only rewritten to fill in one appended as a placeholder (update()).
+    Writes SQLite keeps rejecting stay in memory, still readable, and are
+    retried by flush(), which raises if they fail again.
+    Readers get their own connection per thread and only load the rows they
+    ask for. Message text is indexed with FTS5 for search(), when the SQLite
+    build has it.
+    """
+
+    def __init__(self, path=CONVERSATION_DB_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._pending = {}  # (session_id, channel) -> {seq: message} not yet committed
+        self._counts = {}   # (session_id, channel) -> number of messages
+        self._failed = []   # writes that could not be committed, kept for retrying
+        self.last_error = None
+
+        conn = self._connection()
+        conn.executescript(_SCHEMA)
+        try:
+            trigger = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'messages_fts_insert'"
+            ).fetchone()
+            if trigger and "display" not in trigger[0]:
+                conn.executescript(_FTS_MIGRATE)
+            conn.executescript(_FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            logger.warning("SQLite has no FTS5; message search falls back to LIKE.")
+            self.has_fts = False
+        conn.commit()
+
+        self._writes = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="conversation-writer", daemon=True)
+        self._writer.start()
+
+    # ------------------------------------------------------------------
+    # Sessions
+    # ------------------------------------------------------------------
+    def new_session(self, title=None):
+        session_id = uuid.uuid4().hex
+        self._writes.put((
+            "INSERT INTO sessions (id, title, created_at) VALUES (?, ?, ?)",
+            (session_id, title, time.time()),
+            None,
+        ))
+        return session_id
+
+    def sessions(self, limit=50):
+        """
+        Most recent sessions first, as dicts with id, title and created_at.
+        """
+        self.flush()
+        rows = self._connection().execute(
+            "SELECT id, title, created_at FROM sessions ORDER BY created_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [{"id": r[0], "title": r[1], "created_at": r[2]} for r in rows]
+
+    def latest_session(self):
+        sessions = self.sessions(limit=1)
+        return sessions[0]["id"] if sessions else None
+
+    # ------------------------------------------------------------------
+    # Messages
+    # ------------------------------------------------------------------
+    def append(self, session_id, role, content, meta=None, channel="history"):
+        """
+        Queues a message for writing and returns its sequence number.
+        """
+        key = (session_id, channel)
+        created_at = time.time()
+        message = _message(role, content, meta)
+        with self._lock:
+            seq = self._count(key)
+            self._counts[key] = seq + 1
+            self._pending.setdefault(key, {})[seq] = message
+        self._writes.put((
+            _INSERT,
+            (session_id, channel, seq, role, content, json.dumps(meta) if meta else None, created_at),
+            (key, seq, message),
+        ))
+        return seq
+
+    def update(self, session_id, seq, role, content, meta=None, channel="history"):
+        """
+        Replaces message `seq`, e.g. a placeholder appended for an answer
+        that was still streaming in, keeping its place in the session.
+        """
+        key = (session_id, channel)
+        message = _message(role, content, meta)
+        with self._lock:
+            if not 0 <= seq < self._count(key):
+                raise IndexError(f"No message {seq} in session {session_id!r}")
+            self._pending.setdefault(key, {})[seq] = message
+        self._writes.put((
+            _UPDATE,
+            (session_id, channel, seq, role, content, json.dumps(meta) if meta else None, time.time()),
+            (key, seq, message),
+        ))
+
+    def count(self, session_id, channel="history"):
+        with self._lock:
+            return self._count((session_id, channel))
+
+    def get_range(self, session_id, start, stop, channel="history"):
+        """
+        Messages start..stop-1 of a session, as dicts with role, content and
+        any meta keys they were appended with.
+        """
+        key = (session_id, channel)
+        with self._lock:
+            pending = {seq: msg for seq, msg in self._pending.get(key, {}).items() if start <= seq < stop}
+        if len(pending) == stop - start:
+            return [pending[seq] for seq in range(start, stop)]
+
+        rows = self._connection().execute(
+            "SELECT seq, role, content, meta FROM messages "
+            "WHERE session_id = ? AND channel = ? AND seq >= ? AND seq < ? ORDER BY seq",
+            (session_id, channel, start, stop),
+        ).fetchall()
+        messages = {seq: _message(role, content, json.loads(meta) if meta else None)
+                    for seq, role, content, meta in rows}
+        # A row may have been committed (and dropped from pending) between the two reads.
+        messages.update(pending)
+        return [messages[seq] for seq in sorted(messages)]
+
+    def search(self, text, session_id=None, limit=20):
+        """
+        Full-text search over all messages except the "display" copies,
+        best matches first. Returns dicts with session_id, channel, seq,
+        role, content and created_at.
+        """
+        self.flush()
+        conn = self._connection()
+        scope = " AND m.session_id = ?" if session_id else ""
+        if self.has_fts:
+            # Quote every term, so user input can't be read as FTS5 syntax.
+            query = " ".join('"' + term.replace('"', '""') + '"' for term in text.split())
+            if not query:
+                return []
+            sql = ("SELECT m.session_id, m.channel, m.seq, m.role, m.content, m.created_at "
+                   "FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid "
+                   f"WHERE messages_fts MATCH ?{scope} ORDER BY bm25(messages_fts) LIMIT ?")
+            params = [query]
+        else:
+            sql = ("SELECT m.session_id, m.channel, m.seq, m.role, m.content, m.created_at "
+                   "FROM messages m WHERE m.content LIKE ? AND m.channel != 'display'"
+                   f"{scope} ORDER BY m.created_at DESC LIMIT ?")
+            params = [f"%{text}%"]
+        if session_id:
+            params.append(session_id)
+        params.append(limit)
+        columns = ("session_id", "channel", "seq", "role", "content", "created_at")
+        return [dict(zip(columns, row)) for row in conn.execute(sql, params).fetchall()]
+
+    def flush(self):
+        """
+        Blocks until every queued write is committed, retrying writes that
+        failed earlier. Raises sqlite3.Error if some still can't be saved;
+        they stay readable and are retried on the next flush().
+        """
+        with self._lock:
+            failed, self._failed = self._failed, []
+        for write in failed:
+            self._writes.put(write)
+        self._writes.join()
+        with self._lock:
+            if self._failed:
+                raise sqlite3.OperationalError(
+                    f"{len(self._failed)} conversation writes could not be saved: {self.last_error}"
+                )
+
+    def close(self):
+        if self._writer.is_alive():
+            self._writes.put(_STOP)
+            self._writer.join()
+        for conn in self._connections:
+            conn.close()
+        self._connections = []
+
+    # ------------------------------------------------------------------
+    def _count(self, key):
+        # Caller holds self._lock.
+        if key not in self._counts:
+            row = self._connection().execute(
+                "SELECT MAX(seq) FROM messages WHERE session_id = ? AND channel = ?", key
+            ).fetchone()
+            self._counts[key] = 0 if row[0] is None else row[0] + 1
+        return self._counts[key]
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._connections.append(conn)
+        return conn
+
+    def _write_loop(self):
+        conn = self._connection()
+        while True:
+            batch = [self._writes.get()]
+            # Commit whatever else is already queued in the same transaction.
+            while len(batch) < 500:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(item is _STOP for item in batch)
+            writes = [item for item in batch if item is not _STOP]
+            failed = self._commit(conn, writes) if writes else []
+            failed_ids = {id(write) for write in failed}
+            with self._lock:
+                # Failed messages stay pending, so reads still return them.
+                self._failed.extend(failed)
+                for write in writes:
+                    pending_key = write[2]
+                    if pending_key is not None and id(write) not in failed_ids:
+                        key, seq, message = pending_key
+                        # Unless a later update() replaced it, the row on disk is now current.
+                        # (A retried write may find its key already cleared.)
+                        pending = self._pending.get(key, {})
+                        if pending.get(seq) is message:
+                            del pending[seq]
+                        if not pending:
+                            self._pending.pop(key, None)
+            for _ in batch:
+                self._writes.task_done()
+            if stop:
+                return
+
+    def _commit(self, conn, writes):
+        """
+        Commits `writes` in one transaction, retrying on errors (e.g. the
+        database is locked); failing that, one at a time, so a single bad
+        write doesn't sink the rest. Returns the writes that failed.
+        """
+        for attempt in range(WRITE_ATTEMPTS):
+            try:
+                with conn:
+                    for sql, params, _ in writes:
+                        conn.execute(sql, params)
+                return []
+            except sqlite3.Error as exc:
+                logger.warning("Could not save %d conversation writes (%s); retrying", len(writes), exc)
+                time.sleep(WRITE_RETRY_DELAY * 2 ** attempt)
+
+        failed = []
+        for write in writes:
+            try:
+                with conn:
+                    conn.execute(write[0], write[1])
+            except sqlite3.Error as exc:
+                self.last_error = exc
+                failed.append(write)
+        if failed:
+            logger.error("Could not save %d conversation writes (%s); keeping them in memory",
+                         len(failed), self.last_error)
+        return failed
+
+
+def _message(role, content, meta):
+    message = {"role": role, "content": content}
+    if meta:
+        message.update(meta)
+    return message
+
+
+class SessionHistory:
+    """
+    List-like view of one session channel in a ConversationStore, so it can
+    stand in for the plain history lists (len, indexing, slicing, iteration,
+    append, and assigning to an index). Only the rows actually indexed are read from disk.
+
+    clear() starts a new session rather than deleting anything; earlier
+    sessions stay in the store and in search results.
+    """
+
+    PAGE_SIZE = 200
+
+    def __init__(self, store, session_id, channel="history"):
+        self.store = store
+        self.session_id = session_id
+        self.channel = channel
+
+    def __len__(self):
+        return self.store.count(self.session_id, self.channel)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("SessionHistory slices must be contiguous.")
+            if start >= stop:
+                return []
+            return self.store.get_range(self.session_id, start, stop, self.channel)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("SessionHistory index out of range")
+        return self.store.get_range(self.session_id, index, index + 1, self.channel)[0]
+
+    def __iter__(self):
+        # Stops at the length seen when iteration started.
+        total = len(self)
+        for start in range(0, total, self.PAGE_SIZE):
+            yield from self.store.get_range(self.session_id, start, min(start + self.PAGE_SIZE, total), self.channel)
+
+    def __setitem__(self, index, message):
+        if index < 0:
+            index += len(self)
+        meta = {k: v for k, v in message.items() if k not in ("role", "content")}
+        self.store.update(self.session_id, index, message["role"], message["content"], meta or None, self.channel)
+
+    def append(self, message):
+        meta = {k: v for k, v in message.items() if k not in ("role", "content")}
+        self.store.append(self.session_id, message["role"], message["content"], meta or None, self.channel)
+
+    def clear(self):
+        self.session_id = self.store.new_session()
@@ -2,9 +2,13 @@
 
 import os
 import csv
-import pandas as pd
-import pdfplumber
-from docx import Document
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from config.settings import PDF_EXTRACT_WORKERS, PDF_PAGES_PER_TASK
+
+# pdfplumber, python-docx and pandas (via storage.spreadsheet_loader) are
+# imported by the readers that need them, so importing this module is cheap.
 
 
 def read_file(file_path):
@@ -18,32 +22,87 @@ def read_file(file_path):
     elif ext == '.docx':
         return read_docx(file_path)
     elif ext in ['.csv', '.xlsx']:
-        # We only return a short preview text here; the actual DataFrame is loaded in flet_app.py
+        # We only return a short preview text here; load_spreadsheet(...).dataframe
+        # gives the DataFrame itself, from the same single read or its Parquet cache.
         return read_spreadsheet_preview(file_path, ext)
     else:
         return "Unsupported file type."
 
 
+def read_file_pages(file_path):
+    """
+    Like read_file, but returns an iterable of text pieces so callers can
+    start processing before the whole file is parsed. Only PDFs are
+    actually split (one piece per page); other formats yield one piece.
+    """
+    ext = os.path.splitext(file_path)[-1].lower()
+    if ext == '.pdf':
+        return iter_pdf_pages(file_path)
+    return iter([read_file(file_path)])
+
+
 def read_pdf_plumber(file_path):
-    text = []
+    return "\n".join(iter_pdf_pages(file_path))
+
+
+def _extract_page_range(file_path, start, stop):
+    # Runs in a worker process: each worker opens the file on its own. This
+    # module has no import-time side effects, so it is safe to load there.
+    import pdfplumber
     with pdfplumber.open(file_path) as pdf:
-        for page in pdf.pages:
-            page_text = page.extract_text() or ""
-            text.append(page_text)
-    return "\n".join(text)
+        return [pdf.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def iter_pdf_pages(file_path, workers=PDF_EXTRACT_WORKERS, pages_per_task=PDF_PAGES_PER_TASK):
+    """
+    Yields the text of each page, in page order. Page ranges are extracted
+    in parallel by a process pool, with a bounded number of ranges in
+    flight, so page 1 is available as soon as its range is done.
+
+    Workers are started with "spawn" on every platform: forking would copy
+    the app's running threads and open database handles. Spawned workers
+    import the main module, which therefore keeps its setup out of import
+    time (see app.flet_app.start_services).
+    """
+    import pdfplumber
+    with pdfplumber.open(file_path) as pdf:
+        page_count = len(pdf.pages)
+
+    ranges = [(start, min(start + pages_per_task, page_count))
+              for start in range(0, page_count, pages_per_task)]
+    if workers <= 1 or len(ranges) <= 1:
+        for start, stop in ranges:
+            yield from _extract_page_range(file_path, start, stop)
+        return
+
+    spawn = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges)), mp_context=spawn) as pool:
+        pending = []
+        next_range = 0
+        max_in_flight = workers * 2
+        try:
+            while next_range < len(ranges) or pending:
+                while next_range < len(ranges) and len(pending) < max_in_flight:
+                    start, stop = ranges[next_range]
+                    pending.append(pool.submit(_extract_page_range, file_path, start, stop))
+                    next_range += 1
+                yield from pending.pop(0).result()
+        finally:
+            # If the consumer stops early, don't parse pages nobody will read.
+            for future in pending:
+                future.cancel()
 
 
 def read_docx(file_path):
+    from docx import Document
     doc = Document(file_path)
     paragraphs = [p.text for p in doc.paragraphs if p.text.strip()]
     return "\n".join(paragraphs)
 
 
 def read_spreadsheet_preview(file_path, ext):
+    from storage.spreadsheet_loader import load_spreadsheet
     try:
-        df = pd.read_csv(file_path) if ext == '.csv' else pd.read_excel(file_path)
-        preview = df.head(5).to_string(index=False)
-        desc = df.describe(include='all').to_string()
-        return f"Preview:\n{preview}\n\nStats:\n{desc}"
+        return load_spreadsheet(file_path).summary_text()
     except Exception as e:
         return f"Could not read spreadsheet: {e}"
@@ -0,0 +1,145 @@
+# chatbot_desktop/storage/pdf_export.py
+
+import json
+import os
+import textwrap
+
+# reportlab and pypdf are imported when an export runs, not with the app.
+
+MAX_WIDTH_CHARS = 100
+FONT = "Helvetica"
+FONT_SIZE = 12
+LINE_HEIGHT = 14
+MARGIN = 50
+# Messages read from the history at a time.
+READ_BATCH = 200
+
+
+def iter_messages(history, start=0, stop=None):
+    """
+    Yields history[start:stop] a batch at a time, so a SessionHistory is
+    read from disk in pages rather than all at once.
+    """
+    stop = len(history) if stop is None else stop
+    for batch_start in range(start, stop, READ_BATCH):
+        yield from history[batch_start:min(batch_start + READ_BATCH, stop)]
+
+
+def write_conversation_pdf(messages, pdf_path, total=None, progress=None, cancelled=None):
+    """
+    Writes `messages` (an iterable of {"role", "content"} dicts) to pdf_path,
+    wrapping long lines and starting a new page whenever one is full.
+    `progress(done, total)` is called as messages are written; if the
+    `cancelled` event gets set, the file is left untouched and None is
+    returned. Returns the number of messages written.
+    """
+    from reportlab.lib.pagesizes import LETTER
+    from reportlab.pdfgen import canvas
+
+    width, height = LETTER
+    tmp_path = pdf_path + ".tmp"
+    c = canvas.Canvas(tmp_path, pagesize=LETTER)
+
+    def new_page():
+        text = c.beginText(MARGIN, height - MARGIN)
+        text.setFont(FONT, FONT_SIZE)
+        text.setLeading(LINE_HEIGHT)
+        return text
+
+    text_obj = new_page()
+    lines_per_page = int((height - 2 * MARGIN) // LINE_HEIGHT)
+    lines_on_page = 0
+    done = 0
+
+    for entry in messages:
+        if cancelled is not None and cancelled.is_set():
+            return None  # nothing is written to disk before c.save()
+
+        line_str = f"{entry['role'].upper()}: {entry['content']}"
+        wrapped_lines = []
+        for paragraph in line_str.splitlines() or [""]:
+            wrapped_lines.extend(textwrap.wrap(paragraph, width=MAX_WIDTH_CHARS) or [""])
+        wrapped_lines.append("")
+
+        for wl in wrapped_lines:
+            if lines_on_page == lines_per_page:
+                c.drawText(text_obj)
+                c.showPage()
+                text_obj = new_page()
+                lines_on_page = 0
+            text_obj.textLine(wl)
+            lines_on_page += 1
+
+        done += 1
+        if progress is not None and done % 50 == 0:
+            progress(done, total)
+
+    c.drawText(text_obj)
+    c.showPage()
+    c.save()
+    os.replace(tmp_path, pdf_path)
+    if progress is not None:
+        progress(done, total)
+    return done
+
+
+def export_history(history, pdf_path, progress=None, cancelled=None, append=True):
+    """
+    Exports a conversation history (a SessionHistory or a list) to pdf_path.
+
+    A small "<pdf_path>.json" file records which session was exported and
+    how many messages; with `append`, a later export of the same session
+    renders only the new messages and appends their pages to the existing
+    file (needs pypdf, otherwise everything is rewritten). Returns a dict
+    with path, added and appended, or None if cancelled.
+    """
+    try:
+        from pypdf import PdfWriter
+    except ImportError:  # appending to an earlier export is optional
+        PdfWriter = None
+
+    state_path = pdf_path + ".json"
+    session_id = getattr(history, "session_id", None)
+    total = len(history)
+
+    start = 0
+    if append and PdfWriter is not None and session_id is not None and os.path.exists(pdf_path):
+        state = _load_state(state_path)
+        if state.get("session_id") == session_id and state.get("exported", 0) <= total:
+            start = state["exported"]
+
+    if start and start == total:
+        return {"path": pdf_path, "added": 0, "appended": True}
+
+    def report(done, _):
+        if progress is not None:
+            progress(start + done, total)
+
+    messages = iter_messages(history, start, total)
+    if start:
+        part_path = pdf_path + ".part.pdf"
+        written = write_conversation_pdf(messages, part_path, total, report, cancelled)
+        if written is None:
+            return None
+        writer = PdfWriter(clone_from=pdf_path)
+        writer.append(part_path)
+        with open(pdf_path + ".tmp", "wb") as f:
+            writer.write(f)
+        os.replace(pdf_path + ".tmp", pdf_path)
+        os.remove(part_path)
+    else:
+        written = write_conversation_pdf(messages, pdf_path, total, report, cancelled)
+        if written is None:
+            return None
+
+    with open(state_path, "w", encoding="utf-8") as f:
+        json.dump({"session_id": session_id, "exported": total}, f)
+    return {"path": pdf_path, "added": written, "appended": bool(start)}
+
+
+def _load_state(state_path):
+    try:
+        with open(state_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
@@ -0,0 +1,227 @@
+# chatbot_desktop/storage/spreadsheet_loader.py
+
+import hashlib
+import json
+import logging
+import math
+import os
+from collections import Counter
+
+import pandas as pd
+
+from config.settings import SPREADSHEET_CACHE_DIR, SPREADSHEET_CHUNKED_BYTES, SPREADSHEET_CHUNK_ROWS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # the Parquet cache is optional
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_ROWS = 5
+# Beyond this many distinct values we stop tracking a text column's frequencies.
+MAX_TRACKED_VALUES = 10000
+
+
+class SpreadsheetLoad:
+    """
+    Result of load_spreadsheet: preview and summary text, plus the DataFrame,
+    which is read from the Parquet cache on first access when the file was
+    loaded in chunks or served from the cache.
+    """
+
+    def __init__(self, file_path, preview, stats, cache_path=None, dataframe=None, from_cache=False):
+        self.file_path = file_path
+        self.preview = preview
+        self.stats = stats
+        self.cache_path = cache_path
+        self.from_cache = from_cache
+        self._dataframe = dataframe
+
+    @property
+    def dataframe(self):
+        if self._dataframe is None:
+            if self.cache_path and os.path.exists(self.cache_path):
+                self._dataframe = pd.read_parquet(self.cache_path)
+            else:
+                self._dataframe = _read_whole(self.file_path)
+        return self._dataframe
+
+    def summary_text(self):
+        return f"Preview:\n{self.preview}\n\nStats:\n{self.stats}"
+
+
+def load_spreadsheet(file_path, chunksize=None, cache_dir=SPREADSHEET_CACHE_DIR):
+    """
+    Reads a CSV/XLSX file once, producing a preview, summary statistics and a
+    Parquet cache keyed by path, mtime and size, so loading the same file
+    again only reads the cached summary. CSVs larger than
+    SPREADSHEET_CHUNKED_BYTES (or any CSV when `chunksize` is given) are
+    streamed in row chunks and never held in memory as a whole.
+    """
+    cache_path = summary_path = None
+    if pq is not None and cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        key = _cache_key(file_path)
+        cache_path = os.path.join(cache_dir, f"{key}.parquet")
+        summary_path = os.path.join(cache_dir, f"{key}.summary.json")
+        if os.path.exists(cache_path) and os.path.exists(summary_path):
+            with open(summary_path, "r", encoding="utf-8") as f:
+                summary = json.load(f)
+            return SpreadsheetLoad(file_path, summary["preview"], summary["stats"], cache_path, from_cache=True)
+
+    ext = os.path.splitext(file_path)[-1].lower()
+    chunked = ext == ".csv" and (chunksize or os.path.getsize(file_path) > SPREADSHEET_CHUNKED_BYTES)
+
+    if chunked:
+        preview, stats = _load_csv_chunked(file_path, chunksize or SPREADSHEET_CHUNK_ROWS, cache_path)
+        df = None
+    else:
+        df = _read_whole(file_path)
+        preview = df.head(PREVIEW_ROWS).to_string(index=False)
+        stats = df.describe(include="all").to_string()
+        if cache_path:
+            _write_parquet(df, cache_path)
+
+    if summary_path and os.path.exists(cache_path):
+        with open(summary_path, "w", encoding="utf-8") as f:
+            json.dump({"preview": preview, "stats": stats}, f)
+    return SpreadsheetLoad(file_path, preview, stats, cache_path, dataframe=df)
+
+
+def _cache_key(file_path):
+    st = os.stat(file_path)
+    raw = f"{os.path.abspath(file_path)}|{st.st_mtime_ns}|{st.st_size}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _read_whole(file_path):
+    ext = os.path.splitext(file_path)[-1].lower()
+    return pd.read_csv(file_path) if ext == ".csv" else pd.read_excel(file_path)
+
+
+def _write_parquet(df, cache_path):
+    tmp_path = f"{cache_path}.tmp"
+    try:
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        logger.warning("Could not cache %s as Parquet: %s", cache_path, e)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _load_csv_chunked(file_path, chunksize, cache_path):
+    stats = RunningStats()
+    preview = None
+    writer = None
+    tmp_path = f"{cache_path}.tmp" if cache_path else None
+
+    try:
+        for chunk in pd.read_csv(file_path, chunksize=chunksize):
+            if preview is None:
+                preview = chunk.head(PREVIEW_ROWS).to_string(index=False)
+            stats.update(chunk)
+
+            if tmp_path:
+                try:
+                    if writer is None:
+                        table = pa.Table.from_pandas(chunk, preserve_index=False)
+                        writer = pq.ParquetWriter(tmp_path, table.schema)
+                    else:
+                        table = pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+                    writer.write_table(table)
+                except (pa.ArrowException, ValueError, TypeError) as e:
+                    # Column types drifted between chunks; keep the stats, drop the cache.
+                    logger.warning("Disabling Parquet cache for %s: %s", file_path, e)
+                    if writer is not None:
+                        writer.close()
+                        writer = None
+                    # Nothing was written yet if the very first chunk failed.
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    tmp_path = None
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if tmp_path and os.path.exists(tmp_path):
+        os.replace(tmp_path, cache_path)
+    return preview or "", stats.to_frame().to_string()
+
+
+class RunningStats:
+    """
+    describe(include='all')-style statistics accumulated one chunk at a time.
+    Numeric columns track count, mean, std, min and max (merging per-chunk
+    mean and sum of squared deviations); other columns track count, unique,
+    top and freq. Quartiles need the full column and are left out.
+    """
+
+    def __init__(self):
+        self.columns = []
+        self.numeric = {}
+        self.categorical = {}
+
+    def update(self, chunk):
+        for col in chunk.columns:
+            if col not in self.numeric and col not in self.categorical:
+                self.columns.append(col)
+                if pd.api.types.is_numeric_dtype(chunk[col]):
+                    self.numeric[col] = {"count": 0, "mean": 0.0, "m2": 0.0, "min": math.inf, "max": -math.inf}
+                else:
+                    self.categorical[col] = {"count": 0, "values": Counter(), "overflow": False}
+
+            if col in self.numeric:
+                self._update_numeric(self.numeric[col], pd.to_numeric(chunk[col], errors="coerce").dropna())
+            else:
+                self._update_categorical(self.categorical[col], chunk[col].dropna())
+
+    @staticmethod
+    def _update_numeric(acc, values):
+        n_b = len(values)
+        if not n_b:
+            return
+        mean_b = float(values.mean())
+        m2_b = float(((values - mean_b) ** 2).sum())
+        n_a = acc["count"]
+        n = n_a + n_b
+        delta = mean_b - acc["mean"]
+        acc["mean"] += delta * n_b / n
+        acc["m2"] += m2_b + delta * delta * n_a * n_b / n
+        acc["count"] = n
+        acc["min"] = min(acc["min"], float(values.min()))
+        acc["max"] = max(acc["max"], float(values.max()))
+
+    @staticmethod
+    def _update_categorical(acc, values):
+        acc["count"] += len(values)
+        if acc["overflow"]:
+            return
+        acc["values"].update(values.astype(str))
+        if len(acc["values"]) > MAX_TRACKED_VALUES:
+            acc["overflow"] = True
+            acc["values"] = Counter()
+
+    def to_frame(self):
+        rows = ["count", "unique", "top", "freq", "mean", "std", "min", "max"]
+        data = {}
+        for col in self.columns:
+            if col in self.numeric:
+                acc = self.numeric[col]
+                n = acc["count"]
+                std = math.sqrt(acc["m2"] / (n - 1)) if n > 1 else math.nan
+                data[col] = [n, None, None, None,
+                             acc["mean"] if n else math.nan, std,
+                             acc["min"] if n else math.nan, acc["max"] if n else math.nan]
+            else:
+                acc = self.categorical[col]
+                if acc["overflow"] or not acc["values"]:
+                    unique = f">{MAX_TRACKED_VALUES}" if acc["overflow"] else 0
+                    top = freq = None
+                else:
+                    unique = len(acc["values"])
+                    top, freq = acc["values"].most_common(1)[0]
+                data[col] = [acc["count"], unique, top, freq, None, None, None, None]
+        return pd.DataFrame(data, index=rows)
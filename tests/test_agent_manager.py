@@ -0,0 +1,120 @@
+# chatbot_desktop/tests/test_agent_manager.py
+
+import asyncio
+import os
+import threading
+
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from core.agent_manager import AgentManager  # noqa: E402
+
+
+class FakeAgent:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.started = threading.Event()
+        self.cancelled = False
+
+    async def handle_query_async(self, user_msg):
+        self.started.set()
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return f"echo: {user_msg}"
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # the vector store persists under ./vector_db
+    return AgentManager()
+
+
+def test_sync_wrapper_records_the_exchange(manager):
+    manager.general_agent = FakeAgent()
+    assert manager.route_query("hi") == "echo: hi"
+    assert manager.blackboard.conversation_history == [
+        {"role": "user", "content": "hi"},
+        {"role": "assistant", "content": "echo: hi"},
+    ]
+
+
+def test_slow_agents_time_out(manager):
+    agent = manager.general_agent = FakeAgent(delay=10)
+    response = asyncio.run(manager.route_query_async("hi", timeout=0.05))
+    assert response.startswith("[ERROR]")
+    assert agent.cancelled
+
+
+def test_new_request_cancels_the_one_in_flight(manager):
+    async def scenario():
+        slow = manager.general_agent = FakeAgent(delay=10)
+        first = asyncio.create_task(manager.route_query_async("first"))
+        await asyncio.to_thread(slow.started.wait, 1)
+        manager.general_agent = FakeAgent()
+        second = await manager.route_query_async("second")
+        return await first, second, slow.cancelled
+
+    first, second, cancelled = asyncio.run(scenario())
+    assert first is None and cancelled
+    assert second == "echo: second"
+    assert manager.blackboard.conversation_history[-1] == {"role": "assistant", "content": "echo: second"}
+
+
+def test_reset_cancels_from_another_thread(manager):
+    slow = manager.active_agent = FakeAgent(delay=10)
+    result = []
+    worker = threading.Thread(target=lambda: result.append(manager.route_query("hi")))
+    worker.start()
+    assert slow.started.wait(1)
+    manager.reset_all()
+    worker.join(1)
+    assert result == [None] and slow.cancelled
+
+
+class FakeStreamAgent:
+    def __init__(self, pieces):
+        self.pieces = pieces
+        self.closed = False
+
+    def handle_query_stream(self, user_msg):
+        try:
+            yield from self.pieces
+        finally:
+            self.closed = True
+
+
+def test_streams_deltas_in_order_and_records_the_answer(manager):
+    manager.general_agent = FakeStreamAgent(["Hel", "lo", " there "])
+    assert list(manager.route_query_stream("hi")) == ["Hel", "lo", " there "]
+    assert manager.blackboard.conversation_history == [
+        {"role": "user", "content": "hi"},
+        {"role": "assistant", "content": "Hello there"},
+    ]
+
+
+def test_a_stream_closed_early_records_no_answer(manager):
+    agent = FakeStreamAgent(["one", "two", "three"])
+    stream = manager.route_query_stream("hi", agent=agent)
+    assert next(stream) == "one"
+    stream.close()
+    assert agent.closed
+    assert manager.blackboard.conversation_history == [{"role": "user", "content": "hi"}]
+
+
+def test_general_agent_sees_the_user_turn_once(manager, monkeypatch):
+    import core.agents.general_agent as general_agent
+    prompts = []
+
+    def fake_stream(prompt):
+        prompts.append(prompt)
+        yield "Hi!"
+    monkeypatch.setattr(general_agent, "ask_chatgpt_stream", fake_stream)
+
+    manager.blackboard.conversation_history.append({"role": "system", "content": "Document context:\nabc"})
+    assert list(manager.route_query_stream("hello", agent=manager.general_agent)) == ["Hi!"]
+    assert prompts == ["[System message]: Document context:\nabc\nUser: hello\nAssistant:"]
+    assert manager.blackboard.conversation_history[-1] == {"role": "assistant", "content": "Hi!"}
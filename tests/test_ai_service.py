@@ -0,0 +1,62 @@
+# chatbot_desktop/tests/test_ai_service.py
+
+import os
+from types import SimpleNamespace
+
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import services.ai_service as ai_service  # noqa: E402
+from services.response_cache import ResponseCache  # noqa: E402
+
+
+def chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+class FakeCompletions:
+    def __init__(self, pieces):
+        self.pieces = pieces
+
+    def create(self, model, messages, temperature, stream=False):
+        def chunks():
+            for piece in self.pieces:
+                if isinstance(piece, Exception):
+                    raise piece
+                yield piece
+        return chunks()
+
+
+@pytest.fixture
+def stream_with(tmp_path, monkeypatch):
+    cache = ResponseCache(path=str(tmp_path / "responses.sqlite3"))
+    monkeypatch.setattr(ai_service, "_response_cache", cache)
+    monkeypatch.setattr(ai_service, "RESPONSE_CACHE_ENABLED", True)
+
+    def stream_with(*pieces):
+        client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions(pieces)))
+        monkeypatch.setattr(ai_service, "get_client", lambda: client)
+        return ai_service.ask_chatgpt_stream("Describe the dataset.", temperature=0)
+
+    yield stream_with
+    cache.close()
+
+
+def test_deltas_arrive_in_order_and_the_full_text_is_cached(stream_with):
+    # Chunks without choices or content (role headers, the final chunk) are skipped.
+    pieces = [SimpleNamespace(choices=[]), chunk(None), chunk("The "), chunk("data"), chunk("set. ")]
+    assert list(stream_with(*pieces)) == ["The ", "data", "set. "]
+    assert list(stream_with(chunk("something else"))) == ["The dataset."]
+
+
+def test_a_stream_closed_early_is_not_cached(stream_with):
+    stream = stream_with(chunk("The "), chunk("dataset."))
+    assert next(stream) == "The "
+    stream.close()
+    assert list(stream_with(chunk("Fresh answer"))) == ["Fresh answer"]
+
+
+def test_errors_end_the_stream_and_are_not_cached(stream_with):
+    assert list(stream_with(chunk("The "), ValueError("connection reset"))) == ["The ", "[ERROR] connection reset"]
+    assert list(stream_with(chunk("Fresh answer"))) == ["Fresh answer"]
@@ -0,0 +1,167 @@
+# chatbot_desktop/tests/test_api_scheduler.py
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from services.api_scheduler import BULK, INTERACTIVE, ApiScheduler, TokenBucket, request_priority
+
+
+class APIStatusError(Exception):
+    def __init__(self, status_code, headers=None, code=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.code = code
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+class APITimeoutError(Exception):
+    pass
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def failing(errors, result="ok"):
+    errors = list(errors)
+
+    def fn():
+        if errors:
+            raise errors.pop(0)
+        return result
+    return fn
+
+
+def scheduler(clock, **kwargs):
+    kwargs.setdefault("limits", {"chat": (0, 0)})
+    return ApiScheduler(clock=clock, sleep=clock.sleep, base_delay=1, max_delay=30, **kwargs)
+
+
+def test_rate_limits_are_retried_honoring_retry_after():
+    clock = FakeClock()
+    s = scheduler(clock)
+    fn = failing([APIStatusError(429, {"retry-after": "7"}), APIStatusError(503)])
+    assert s.call(fn) == "ok"
+    assert 7 <= clock.sleeps[0] <= 8  # Retry-After plus jitter
+    assert 1 <= clock.sleeps[1] <= 2  # second attempt: backoff 2s with jitter
+    assert s.stats["retries"] == 2 and s.stats["calls"] == 3
+
+
+def test_errors_that_wont_clear_are_raised_at_once():
+    clock = FakeClock()
+    s = scheduler(clock, max_retries=3)
+    with pytest.raises(APIStatusError):
+        s.call(failing([APIStatusError(400)]))
+    with pytest.raises(APIStatusError):
+        s.call(failing([APIStatusError(429, code="insufficient_quota")]))
+    with pytest.raises(APITimeoutError):
+        s.call(failing([APITimeoutError()] * 4))
+    assert len(clock.sleeps) == 3
+    assert s.stats["failures"] == 3
+
+
+def test_token_bucket_refills_over_time():
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock)  # one per second, bursts of 60
+    bucket.take(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0)
+    clock.now += 10
+    assert bucket.wait_time(10) == 0
+    assert bucket.wait_time(1000) == pytest.approx(50.0)  # capped at a full bucket
+
+
+def test_calls_wait_for_the_token_budget():
+    clock = FakeClock()
+    s = ApiScheduler(limits={"chat": (0, 600)}, clock=clock, sleep=clock.sleep)  # 10 tokens/s
+    s.call(lambda: None, tokens=600)
+
+    waited = []
+    original_wait = s._cond.wait
+
+    def wait(timeout=None):
+        waited.append(timeout)
+        clock.now += timeout
+        return original_wait(0)
+    s._cond.wait = wait
+
+    s.call(lambda: None, tokens=100)
+    assert sum(waited) == pytest.approx(10.0)
+
+
+def test_interactive_calls_go_ahead_of_bulk_ones():
+    s = ApiScheduler(limits={"chat": (0, 0)}, max_in_flight=1)
+    started = []
+    release = threading.Event()
+
+    def hold():
+        release.wait(5)
+
+    blocker = threading.Thread(target=s.call, args=(hold,))
+    blocker.start()
+    while s._in_flight == 0:
+        time.sleep(0.001)
+
+    def queue(name, priority):
+        thread = threading.Thread(target=s.call, args=(started.append, name), kwargs={"priority": priority})
+        thread.start()
+        while len(s._waiting) < queued + 1:
+            time.sleep(0.001)
+        return thread
+
+    threads = []
+    for queued, (name, priority) in enumerate([("bulk", BULK), ("bulk 2", BULK), ("chat", INTERACTIVE)]):
+        threads.append(queue(name, priority))
+    release.set()
+    for thread in [blocker, *threads]:
+        thread.join(5)
+    assert started == ["chat", "bulk", "bulk 2"]
+
+
+def test_request_priority_applies_to_calls_in_the_block():
+    s = ApiScheduler(limits={"chat": (0, 0)})
+    seen = []
+    enqueue = s._enqueue
+
+    def recording_enqueue(priority):
+        ticket = enqueue(priority)
+        seen.append(ticket[0])
+        return ticket
+    s._enqueue = recording_enqueue
+    with request_priority(BULK):
+        s.call(lambda: None)
+    s.call(lambda: None)
+    assert seen == [BULK, INTERACTIVE]
+
+
+def test_async_calls_and_streams_retry_too(monkeypatch):
+    clock = FakeClock()
+    s = scheduler(clock)
+    errors = [APITimeoutError()]
+
+    async def create():
+        if errors:
+            raise errors.pop()
+        return "done"
+
+    async def no_sleep(_):
+        pass
+
+    monkeypatch.setattr(asyncio, "sleep", no_sleep)
+    assert asyncio.run(s.call_async(create)) == "done"
+
+    opened = failing([APIStatusError(502)], result=iter(["a", "b"]))
+    assert list(s.iterate(opened)) == ["a", "b"]
+    assert s.stats["retries"] == 2 and s._in_flight == 0
@@ -0,0 +1,80 @@
+# chatbot_desktop/tests/test_chat_view.py
+
+from types import SimpleNamespace
+
+import flet as ft
+
+from app.chat_view import ChatView
+
+
+def render(item):
+    return ft.Text(item["content"])
+
+
+def texts(view):
+    # ListView order is newest first; return oldest first.
+    return [c.value for c in reversed(view.list_view.controls)]
+
+
+def scroll_end(view, pixels, max_extent=10000):
+    view._on_scroll(SimpleNamespace(event_type="end", pixels=pixels, max_scroll_extent=max_extent))
+
+
+def test_only_the_newest_messages_stay_mounted():
+    view = ChatView(render, max_mounted=5, page_size=3)
+    for i in range(1000):
+        view.add_message({"role": "user", "content": str(i)})
+    assert len(view.source) == 1000
+    assert texts(view) == [str(i) for i in range(995, 1000)]
+
+
+def test_scrolling_up_pages_in_older_messages_and_back_down_trims(monkeypatch):
+    view = ChatView(render, max_mounted=5, page_size=3)
+    monkeypatch.setattr(view, "update", lambda: None)
+    for i in range(20):
+        view.add_message({"role": "user", "content": str(i)})
+
+    scroll_end(view, pixels=9950)  # near the top of a reversed list
+    assert texts(view) == [str(i) for i in range(12, 20)]
+    view.add_message({"role": "user", "content": "20"})  # not trimmed while scrolled up
+    assert view.mounted_messages == 9
+
+    scroll_end(view, pixels=0)
+    assert texts(view) == [str(i) for i in range(16, 21)]
+
+
+def test_transient_controls_are_not_history():
+    view = ChatView(render, max_mounted=5)
+    typing = ft.Text("typing")
+    view.add_control(typing)
+    view.remove_control(typing)
+    streamed = ft.Text("partial")
+    view.add_control(streamed)
+    view.add_message({"role": "assistant", "content": "done"}, streamed)
+    assert view.list_view.controls == [streamed]
+    assert view.source == [{"role": "assistant", "content": "done"}]
+    assert view.mounted_messages == 1
+
+
+def test_streamed_messages_keep_their_place_in_the_source():
+    view = ChatView(render, max_mounted=5)
+    view.add_message({"role": "user", "content": "user 1"})
+    streamed = ft.Text("partial")
+    view.reserve_message({"role": "assistant", "content": ""}, streamed)
+    view.add_message({"role": "user", "content": "user 2"})  # sent while streaming
+    view.finish_message(streamed, {"role": "assistant", "content": "assistant 1"})
+    assert [item["content"] for item in view.source] == ["user 1", "assistant 1", "user 2"]
+    assert texts(view) == ["user 1", "partial", "user 2"]
+
+    # After a reset the placeholder belongs to the old session and is left alone.
+    pending = ft.Text("partial")
+    view.reserve_message({"role": "assistant", "content": ""}, pending)
+    view.detach()
+    view.finish_message(pending, {"role": "assistant", "content": "late"})
+    assert view.source[-1]["content"] == ""
+
+
+def test_show_latest_mounts_one_page_of_a_saved_history():
+    view = ChatView(render, source=[{"role": "user", "content": str(i)} for i in range(50)], page_size=10)
+    view.show_latest()
+    assert texts(view) == [str(i) for i in range(40, 50)]
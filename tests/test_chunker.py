@@ -0,0 +1,67 @@
+# chatbot_desktop/tests/test_chunker.py
+
+import pytest
+
+from utils.chunker import chunk_text, iter_chunks
+
+
+class WordTokenizer:
+    """
+    One token per whitespace-separated word; enough to exercise the chunker offline.
+    """
+
+    def encode(self, text):
+        return text.split()
+
+    def decode(self, tokens):
+        return " ".join(tokens)
+
+
+def test_window_chunks_step_by_max_minus_overlap():
+    text = " ".join(f"w{i}" for i in range(25))
+    chunks = chunk_text(text, max_tokens=10, overlap=2, tokenizer=WordTokenizer())
+    assert chunks[0].split() == [f"w{i}" for i in range(10)]
+    assert chunks[1].split()[0] == "w8"
+    assert chunks[-1].split()[-1] == "w24"
+
+
+def test_structured_chunks_keep_paragraphs_whole():
+    paragraphs = [" ".join(f"p{p}w{i}" for i in range(4)) for p in range(6)]
+    text = "\n\n".join(paragraphs)
+    chunks = list(iter_chunks(text, max_tokens=9, overlap=0, tokenizer=WordTokenizer()))
+    assert "\n\n".join(chunks) == text
+    assert all(len(chunk.split()) <= 9 and set(chunk.split("\n\n")) <= set(paragraphs) for chunk in chunks)
+
+
+def test_editing_a_paragraph_keeps_the_other_boundaries():
+    paragraphs = [" ".join(f"p{p}w{i}" for i in range((p * 7) % 30 + 5)) for p in range(120)]
+    before = list(iter_chunks("\n\n".join(paragraphs), max_tokens=100, overlap=0, tokenizer=WordTokenizer()))
+    paragraphs[60] += " and a few more words"
+    after = list(iter_chunks("\n\n".join(paragraphs), max_tokens=100, overlap=0, tokenizer=WordTokenizer()))
+    changed = [chunk for chunk in after if chunk not in before]
+    assert any("p60w0" in chunk for chunk in changed)
+    assert len(changed) <= 2 and len(after) - len(changed) >= len(before) - 2
+
+
+def test_structured_chunks_stream_across_pieces():
+    # A paragraph split over two "pages" is reassembled before chunking.
+    pages = ["alpha beta", " gamma\n\ndelta", " epsilon"]
+    chunks = list(iter_chunks(iter(pages), max_tokens=3, overlap=0, tokenizer=WordTokenizer()))
+    assert chunks == ["alpha beta gamma", "delta epsilon"]
+
+
+def test_long_paragraph_falls_back_to_sentences_with_overlap():
+    text = "One two three. Four five six. Seven eight nine."
+    chunks = list(iter_chunks(text, max_tokens=6, overlap=3, tokenizer=WordTokenizer()))
+    assert chunks == ["One two three. Four five six.", "Four five six. Seven eight nine."]
+    assert all(len(chunk.split()) <= 6 for chunk in chunks)
+
+
+def test_windows_that_cannot_advance_are_rejected():
+    for overlap in (10, 12, -1):
+        with pytest.raises(ValueError):
+            chunk_text("a b c", max_tokens=10, overlap=overlap, tokenizer=WordTokenizer())
+    with pytest.raises(ValueError):
+        iter_chunks(iter(["a b c"]), max_tokens=0, tokenizer=WordTokenizer())
+    # Structured chunks only carry whole units over, so a large overlap is fine there.
+    assert list(iter_chunks("a b c", max_tokens=10, overlap=10, tokenizer=WordTokenizer())) == ["a b c"]
@@ -0,0 +1,58 @@
+# chatbot_desktop/tests/test_context_builder.py
+
+from services.context_builder import ContextBuilder
+
+
+def word_count(text):
+    return len(text.split())
+
+
+def make_builder(calls, max_tokens=20):
+    def summarize(previous, transcript, max_tokens):
+        calls.append(transcript)
+        return (previous + " | " if previous else "") + f"{transcript.count(':')} turns"
+
+    return ContextBuilder(max_tokens=max_tokens, summarize=summarize, token_counter=word_count)
+
+
+def test_short_history_is_kept_verbatim():
+    builder = make_builder([])
+    history = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}]
+    assert builder.build(history) == "User: hi\nAssistant: hello\n"
+
+
+def test_old_turns_are_folded_into_summary():
+    calls = []
+    builder = make_builder(calls)
+    history = []
+    for i in range(10):
+        history.append({"role": "user", "content": f"question number {i}"})
+        prefix = builder.build(history)
+
+    assert calls, "overflowing the budget should trigger a summary"
+    assert prefix.startswith("[Summary of earlier conversation]:")
+    assert "question number 9" in prefix
+    assert "question number 0" not in prefix
+    assert builder._window_tokens <= 20
+
+
+def test_only_new_turns_are_counted():
+    counted = []
+
+    def counter(text):
+        counted.append(text)
+        return 1
+
+    builder = ContextBuilder(max_tokens=100, token_counter=counter)
+    history = [{"role": "user", "content": "a"}]
+    builder.build(history)
+    history.append({"role": "assistant", "content": "b"})
+    builder.build(history)
+    assert counted == ["User: a\n", "Assistant: b\n"]
+
+
+def test_shrinking_history_resets_state():
+    builder = make_builder([])
+    history = [{"role": "user", "content": "one"}, {"role": "user", "content": "two"}]
+    builder.build(history)
+    assert builder.build([{"role": "user", "content": "fresh"}]) == "User: fresh\n"
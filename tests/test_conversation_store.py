@@ -0,0 +1,185 @@
+# chatbot_desktop/tests/test_conversation_store.py
+
+import sqlite3
+
+import pytest
+
+import storage.conversation_store as conversation_store
+from services.context_builder import ContextBuilder
+from storage.conversation_store import ConversationStore, SessionHistory
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ConversationStore(str(tmp_path / "conversations.sqlite3"))
+    yield store
+    store.close()
+
+
+def test_appends_are_readable_before_and_after_commit(store):
+    session = store.new_session()
+    for i in range(10):
+        store.append(session, "user", f"message {i}", meta={"time": "12:00"})
+    assert store.count(session) == 10
+    assert store.get_range(session, 3, 5) == [
+        {"role": "user", "content": "message 3", "time": "12:00"},
+        {"role": "user", "content": "message 4", "time": "12:00"},
+    ]
+    store.flush()
+    assert store._pending == {}
+    assert [m["content"] for m in store.get_range(session, 8, 10)] == ["message 8", "message 9"]
+
+
+def test_failed_writes_are_kept_and_retried(store, monkeypatch):
+    monkeypatch.setattr(conversation_store, "WRITE_RETRY_DELAY", 0)
+    conn = sqlite3.connect(store.path)
+    conn.execute("CREATE TRIGGER reject BEFORE INSERT ON messages WHEN new.content = 'bad' "
+                 "BEGIN SELECT RAISE(ABORT, 'rejected'); END")
+    conn.commit()
+
+    history = SessionHistory(store, store.new_session())
+    for content in ["good 1", "bad", "good 2"]:
+        history.append({"role": "user", "content": content})
+    with pytest.raises(sqlite3.Error, match="1 conversation writes"):
+        store.flush()
+    # The rejected message is still served from memory, in its place.
+    assert [m["content"] for m in history[0:3]] == ["good 1", "bad", "good 2"]
+    assert history[1]["content"] == "bad"
+
+    conn.execute("DROP TRIGGER reject")
+    conn.commit()
+    conn.close()
+    store.flush()
+    assert store._pending == {} and store._failed == []
+    assert [m["content"] for m in history[0:3]] == ["good 1", "bad", "good 2"]
+
+
+def test_update_lands_when_the_placeholder_insert_failed(store, monkeypatch):
+    monkeypatch.setattr(conversation_store, "WRITE_RETRY_DELAY", 0)
+    conn = sqlite3.connect(store.path)
+    conn.execute("CREATE TRIGGER reject BEFORE INSERT ON messages WHEN new.content = '' "
+                 "BEGIN SELECT RAISE(ABORT, 'rejected'); END")
+    conn.commit()
+
+    history = SessionHistory(store, store.new_session())
+    history.append({"role": "assistant", "content": ""})
+    with pytest.raises(sqlite3.Error):
+        store.flush()
+    history[0] = {"role": "assistant", "content": "final answer"}
+    conn.execute("DROP TRIGGER reject")
+    conn.commit()
+    conn.close()
+
+    # The retried placeholder insert must not clobber the answer written since.
+    store.flush()
+    assert store._pending == {} and store._failed == []
+    reopened = ConversationStore(store.path)
+    assert reopened.get_range(history.session_id, 0, 1) == [{"role": "assistant", "content": "final answer"}]
+    reopened.close()
+
+
+def test_history_survives_a_restart(tmp_path):
+    path = str(tmp_path / "conversations.sqlite3")
+    store = ConversationStore(path)
+    session = store.new_session()
+    store.append(session, "user", "hello")
+    store.append(session, "assistant", "hi there", channel="display")
+    store.close()
+
+    reopened = ConversationStore(path)
+    assert reopened.latest_session() == session
+    assert reopened.count(session) == 1
+    assert reopened.get_range(session, 0, 1, channel="display") == [{"role": "assistant", "content": "hi there"}]
+    reopened.append(session, "assistant", "welcome back")
+    assert reopened.get_range(session, 0, 2)[1]["content"] == "welcome back"
+    reopened.close()
+
+
+def test_search_finds_messages_across_sessions(store):
+    first, second = store.new_session(), store.new_session()
+    store.append(first, "user", "What were Tesla deliveries in 2023?")
+    store.append(second, "user", "Plot the GM closing price")
+    store.append(second, "assistant", 'Tesla "deliveries" grew')
+
+    hits = store.search("tesla deliveries")
+    assert {hit["session_id"] for hit in hits} == {first, second}
+    assert [hit["content"] for hit in store.search("tesla", session_id=second)] == ['Tesla "deliveries" grew']
+    assert store.search('"unbalanced') == []
+
+
+def test_search_skips_the_display_copies(store):
+    session = store.new_session()
+    for channel in ("history", "display"):
+        store.append(session, "user", "Tesla deliveries", channel=channel)
+        store.append(session, "assistant", "", channel=channel)
+        store.update(session, 1, "assistant", "Deliveries grew", channel=channel)
+    assert [(hit["channel"], hit["seq"]) for hit in store.search("deliveries")] in (
+        [("history", 0), ("history", 1)], [("history", 1), ("history", 0)])
+
+
+def test_old_databases_drop_display_rows_from_the_index(tmp_path):
+    path = str(tmp_path / "conversations.sqlite3")
+    store = ConversationStore(path)
+    if not store.has_fts:
+        store.close()
+        pytest.skip("SQLite has no FTS5")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        DROP TRIGGER messages_fts_insert;
+        CREATE TRIGGER messages_fts_insert AFTER INSERT ON messages BEGIN
+            INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+        END;
+    """)
+    conn.close()
+    session = store.new_session()
+    store.append(session, "user", "Tesla deliveries")
+    store.append(session, "user", "Tesla deliveries", channel="display")
+    store.close()
+
+    reopened = ConversationStore(path)
+    assert [hit["channel"] for hit in reopened.search("tesla")] == ["history"]
+    reopened.append(session, "user", "more Tesla", channel="display")
+    assert [hit["channel"] for hit in reopened.search("tesla")] == ["history"]
+    reopened.close()
+
+
+def test_session_history_behaves_like_a_list(store):
+    history = SessionHistory(store, store.new_session())
+    for i in range(450):
+        history.append({"role": "user", "content": str(i)})
+    assert len(history) == 450
+    assert history[-1]["content"] == "449"
+    assert [m["content"] for m in history[447:]] == ["447", "448", "449"]
+    assert sum(1 for _ in history) == 450
+
+    old_session = history.session_id
+    history.clear()
+    assert len(history) == 0 and history.session_id != old_session
+    assert store.count(old_session) == 450
+
+
+def test_placeholders_keep_their_place_when_filled_in(store):
+    history = SessionHistory(store, store.new_session())
+    history.append({"role": "user", "content": "first"})
+    history.append({"role": "assistant", "content": ""})  # still streaming
+    history.append({"role": "user", "content": "second"})
+    history[1] = {"role": "assistant", "content": "streamed answer", "time": "12:00"}
+    assert history[1] == {"role": "assistant", "content": "streamed answer", "time": "12:00"}
+
+    store.flush()
+    assert store._pending == {}
+    assert [m["content"] for m in history[0:3]] == ["first", "streamed answer", "second"]
+    if store.has_fts:
+        assert [hit["seq"] for hit in store.search("streamed")] == [1]
+    with pytest.raises(IndexError):
+        history[3] = {"role": "user", "content": "nothing there yet"}
+
+
+def test_context_builder_resumes_from_the_tail(store):
+    history = SessionHistory(store, store.new_session())
+    for i in range(100):
+        history.append({"role": "user", "content": f"turn {i}"})
+    builder = ContextBuilder(max_tokens=10000, token_counter=len,
+                             summarize=lambda *args: pytest.fail("should not summarize"))
+    builder.resume(history, turns=3)
+    assert builder.build(history) == "User: turn 97\nUser: turn 98\nUser: turn 99\n"
@@ -0,0 +1,71 @@
+# chatbot_desktop/tests/test_embedding_cache.py
+
+from array import array
+
+import pytest
+
+import services.embedding_cache as embedding_cache
+from services.embedding_cache import EmbeddingCache, cache_key
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = EmbeddingCache(path=str(tmp_path / "cache.sqlite3"), memory_items=2, max_items=10)
+    yield cache
+    cache.close()
+
+
+def test_round_trip_and_counters(cache):
+    assert cache.get("m", "hello") is None
+    cache.put("m", "hello", [0.5, 1.0, -2.0])
+    assert cache.get("m", "hello") == [0.5, 1.0, -2.0]
+    # Same text under another model is a different key.
+    assert cache.get("other", "hello") is None
+    assert cache.stats == {"memory_hits": 1, "disk_hits": 0, "misses": 2}
+
+
+def test_disk_tier_survives_reopen(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    first = EmbeddingCache(path=path)
+    first.put_many("m", ["a", "b"], [[1.0], [2.0]])
+    first.close()
+
+    second = EmbeddingCache(path=path)
+    assert second.get_many("m", ["b", "a", "c"]) == [[2.0], [1.0], None]
+    assert second.stats["disk_hits"] == 2
+    second.close()
+
+
+def test_eviction_drops_least_recently_used(cache):
+    cache.put_many("m", [f"t{i}" for i in range(12)], [[float(i)] for i in range(12)])
+    (count,) = cache._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+    assert count <= 10
+    assert len(cache._memory) == 2
+    assert cache.get("m", "t11") == [11.0]
+
+
+def test_memory_tier_holds_float32_arrays(cache):
+    cache.put("m", "hello", [0.5, 1.0])
+    (vector,) = cache._memory.values()
+    assert isinstance(vector, array) and vector.typecode == "f"
+    assert cache.get("m", "hello") == [0.5, 1.0]
+
+
+def test_disk_hits_update_last_used_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(embedding_cache, "TOUCH_BATCH", 2)
+    path = str(tmp_path / "cache.sqlite3")
+    first = EmbeddingCache(path=path)
+    first.put_many("m", ["a", "b"], [[1.0], [2.0]])
+    first.close()
+
+    def last_used(cache, text):
+        return cache._conn.execute("SELECT last_used FROM embeddings WHERE key = ?",
+                                   (cache_key("m", text),)).fetchone()[0]
+
+    second = EmbeddingCache(path=path, memory_items=0)
+    before = last_used(second, "a")
+    second.get("m", "a")
+    assert last_used(second, "a") == before  # not written yet
+    second.get("m", "b")
+    assert last_used(second, "a") > before
+    second.close()
@@ -0,0 +1,68 @@
+# chatbot_desktop/tests/test_embedding_providers.py
+
+import numpy as np
+import pytest
+
+from services.embedding_providers import HashingEmbeddingProvider, SentenceTransformerProvider, get_provider
+from services.vector_service import VectorService
+
+
+def test_hashing_embeddings_are_deterministic_and_normalized():
+    texts = ["Tesla deliveries rose 12% in Q3", "TSLA stock price", ""]
+    first = HashingEmbeddingProvider(dimension=256).embed_array(texts)
+    second = get_provider("hashing", dimension=256).embed_array(texts)
+    assert first.shape == (3, 256) and first.dtype == np.float32
+    np.testing.assert_array_equal(first, second)
+    np.testing.assert_allclose(np.linalg.norm(first[:2], axis=1), 1.0, rtol=1e-5)
+    assert not first[2].any()
+
+
+def test_similar_wording_scores_higher():
+    provider = HashingEmbeddingProvider()
+    query, close, far = provider.embed_array([
+        "quarterly revenue growth",
+        "revenue grew this quarter",
+        "the cat sat on the mat",
+    ])
+    assert query @ close > query @ far
+
+
+def test_threaded_batches_match_a_single_batch():
+    texts = [f"document number {i} about topic {i % 7}" for i in range(500)]
+    single = HashingEmbeddingProvider(batch_size=1000, workers=1).embed_array(texts)
+    threaded = HashingEmbeddingProvider(batch_size=32, workers=4).embed_array(texts)
+    np.testing.assert_array_equal(single, threaded)
+
+
+def test_collections_record_and_enforce_their_embedding_model(tmp_path):
+    service = VectorService(provider=HashingEmbeddingProvider(dimension=128), persist_path=str(tmp_path))
+    assert service.collection_name == "doc_embeddings_hashing"
+    assert service.collection.metadata["embedding_dim"] == 128
+
+    service.add_document("doc", ["Ford F-150 recall notice", "GM quarterly dividend announced"])
+    (chunk, _), = service.search("dividend from GM", top_k=1)
+    assert chunk == "GM quarterly dividend announced"
+
+    with pytest.raises(ValueError, match="different model"):
+        VectorService(provider=HashingEmbeddingProvider(dimension=64), persist_path=str(tmp_path))
+
+
+def test_building_a_service_does_not_load_the_local_model(tmp_path):
+    provider = SentenceTransformerProvider()  # all-MiniLM-L6-v2
+    service = VectorService(provider=provider, persist_path=str(tmp_path), backend="numpy")
+    assert provider._model is None
+    assert service.collection.metadata["embedding_dim"] == 384
+
+    unknown = SentenceTransformerProvider(model="my-org/custom-model")
+    VectorService(provider=unknown, persist_path=str(tmp_path / "other"), backend="numpy")
+    assert unknown._model is None and unknown.dimension is None
+
+
+def test_dimensions_learned_on_first_embed_are_recorded(tmp_path):
+    provider = HashingEmbeddingProvider(dimension=64)
+    provider.dimension = None  # as for a model whose size isn't known up front
+    service = VectorService(provider=provider, persist_path=str(tmp_path), backend="numpy")
+    assert "embedding_dim" not in service.collection.metadata
+    provider.dimension = 64
+    service.add_document("doc", ["GM quarterly dividend announced"])
+    assert service.collection.metadata["embedding_dim"] == 64
@@ -0,0 +1,80 @@
+# chatbot_desktop/tests/test_embedding_service.py
+
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import services.embedding_service as embedding_service  # noqa: E402
+from services.embedding_cache import EmbeddingCache  # noqa: E402
+
+
+def count_words(text, model=None):
+    return len(text.split())
+
+
+class FakeEmbeddings:
+    """
+    Embeds each text as [its number]; later batches answer sooner and items
+    come back in reverse, so order has to be restored by the caller.
+    """
+
+    def __init__(self):
+        self.inputs = []
+        self._lock = threading.Lock()
+
+    def create(self, input, model):
+        with self._lock:
+            self.inputs.append(list(input))
+            delay = 0.05 / len(self.inputs)
+        time.sleep(delay)
+        data = [SimpleNamespace(index=i, embedding=[float(text.split()[-1])]) for i, text in enumerate(input)]
+        return SimpleNamespace(data=data[::-1], usage=None)
+
+
+@pytest.fixture
+def embeddings(tmp_path, monkeypatch):
+    embeddings = FakeEmbeddings()
+    monkeypatch.setattr(embedding_service, "get_client", lambda: SimpleNamespace(embeddings=embeddings))
+    monkeypatch.setattr(embedding_service, "count_tokens", count_words)
+    cache = EmbeddingCache(path=str(tmp_path / "embeddings.sqlite3"))
+    monkeypatch.setattr(embedding_service, "_cache", cache)
+    monkeypatch.setattr(embedding_service, "EMBEDDING_CACHE_ENABLED", True)
+    yield embeddings
+    cache.close()
+
+
+def test_batches_close_at_the_count_limit():
+    texts = [f"t {i}" for i in range(7)]
+    batches = embedding_service.make_batches(texts, batch_size=3, max_batch_tokens=1000)
+    assert batches == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_batches_close_at_the_token_limit(monkeypatch):
+    monkeypatch.setattr(embedding_service, "count_tokens", count_words)
+    texts = ["a b", "c d", "e f g", "h", "i j k l m n", "o"]
+    batches = embedding_service.make_batches(texts, batch_size=100, max_batch_tokens=5)
+    assert batches == [[0, 1], [2, 3], [4], [5]]  # the 6-token text gets a batch of its own
+    assert embedding_service.make_batches([], batch_size=3, max_batch_tokens=5) == []
+
+
+def test_concurrent_batches_keep_input_order(embeddings):
+    texts = [f"text {i}" for i in range(10)]
+    result = embedding_service.get_embeddings(texts, batch_size=3, max_batch_tokens=1000, max_concurrency=4)
+    assert result == [[float(i)] for i in range(10)]
+    assert len(embeddings.inputs) == 4
+
+
+def test_duplicates_and_cached_texts_are_embedded_once(embeddings):
+    texts = ["text 1", "text 2", "text 1", "text 3", "text 2"]
+    result = embedding_service.get_embeddings(texts, batch_size=2, max_batch_tokens=1000)
+    assert result == [[1.0], [2.0], [1.0], [3.0], [2.0]]
+    assert sorted(sum(embeddings.inputs, [])) == ["text 1", "text 2", "text 3"]
+
+    embeddings.inputs.clear()
+    assert embedding_service.get_embeddings(["text 3", "text 4", "text 3"]) == [[3.0], [4.0], [3.0]]
+    assert embeddings.inputs == [["text 4"]]
@@ -0,0 +1,44 @@
+# chatbot_desktop/tests/test_file_handler.py
+
+import pytest
+
+from storage.file_handler import iter_pdf_pages, read_file, read_file_pages
+
+pytest.importorskip("pdfplumber")
+canvas = pytest.importorskip("reportlab.pdfgen.canvas")
+
+
+def write_pdf(path, page_count):
+    pdf = canvas.Canvas(str(path))
+    for i in range(page_count):
+        pdf.drawString(72, 720, f"page {i + 1}")
+        pdf.showPage()
+    pdf.save()
+    return str(path)
+
+
+def test_parallel_extraction_keeps_page_order(tmp_path):
+    path = write_pdf(tmp_path / "long.pdf", 11)
+    expected = [f"page {i}" for i in range(1, 12)]
+    assert [text.strip() for text in iter_pdf_pages(path, workers=3, pages_per_task=2)] == expected
+    assert [text.strip() for text in iter_pdf_pages(path, workers=1, pages_per_task=4)] == expected
+    assert read_file(path).split("\n") == expected
+
+
+def test_stopping_early_returns_the_first_pages(tmp_path):
+    path = write_pdf(tmp_path / "long.pdf", 9)
+    pages = iter_pdf_pages(path, workers=2, pages_per_task=1)
+    assert next(pages).strip() == "page 1"
+    pages.close()
+
+
+def test_single_page_and_empty_pdfs(tmp_path):
+    single = write_pdf(tmp_path / "single.pdf", 1)
+    assert [text.strip() for text in read_file_pages(single)] == ["page 1"]
+
+    pypdf = pytest.importorskip("pypdf")
+    empty = str(tmp_path / "empty.pdf")
+    with open(empty, "wb") as f:
+        pypdf.PdfWriter().write(f)
+    assert list(iter_pdf_pages(empty, workers=4)) == []
+    assert read_file(empty) == ""
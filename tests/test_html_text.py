@@ -0,0 +1,60 @@
+# chatbot_desktop/tests/test_html_text.py
+
+from utils.html_text import html_to_text, looks_like_html
+from utils.text_ranking import select_passages, tokenize_terms
+
+PAGE = """<!doctype html>
+<html><head><title>Quarterly report</title>
+<style>body { color: red }</style><script>var x = "<p>not text</p>";</script></head>
+<body>
+<nav><ul><li>Home<li>About</ul></nav>
+<article>
+  <h1>Results</h1>
+  <p>Revenue grew&nbsp;12% to $4.2bn.</p>
+  <p>Margins were <b>flat</b>.<br>Guidance unchanged.</p>
+</article>
+<footer>Copyright</footer>
+</body></html>"""
+
+
+def word_count(text):
+    return len(text.split())
+
+
+def test_html_to_text_keeps_readable_blocks_only():
+    assert looks_like_html(PAGE)
+    text = html_to_text(PAGE)
+    assert text.split("\n\n") == [
+        "Quarterly report",
+        "Results",
+        "Revenue grew 12% to $4.2bn.",
+        "Margins were flat.",
+        "Guidance unchanged.",
+    ]
+
+
+def test_tokenize_terms_keeps_numbers_and_drops_stopwords():
+    assert tokenize_terms("What was the TSLA margin in Q3, 12.5%?") == ["tsla", "margin", "q3", "12.5%"]
+
+
+def test_fetch_commands_are_only_stopwords_for_web_questions():
+    from services.web_fetcher import QUERY_STOPWORDS
+    # Searching documents for "scrape" must still find pages about scraping.
+    assert tokenize_terms("how to scrape and fetch data") == ["scrape", "fetch", "data"]
+    assert tokenize_terms("fetch the scrape page", QUERY_STOPWORDS) == ["page"]
+
+
+def test_select_passages_ranks_by_relevance_and_keeps_order():
+    passages = [
+        "Company history and founders.",
+        "Revenue grew 12% on strong demand.",
+        "Office locations around the world.",
+        "Revenue guidance for next year is unchanged.",
+    ]
+    selected = select_passages("how did revenue change?", passages, budget_tokens=14, token_counter=word_count)
+    assert selected == [passages[1], passages[3]]
+
+
+def test_select_passages_without_query_terms_takes_the_start():
+    passages = ["one two", "three four", "five six"]
+    assert select_passages("what is this", passages, budget_tokens=4, token_counter=word_count) == passages[:2]
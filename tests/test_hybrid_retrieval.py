@@ -0,0 +1,54 @@
+# chatbot_desktop/tests/test_hybrid_retrieval.py
+
+import pandas as pd
+import pytest
+
+from services.embedding_providers import HashingEmbeddingProvider
+from services.hybrid_retrieval import HybridRetriever
+
+PRICES = pd.DataFrame({
+    "Company": ["TSLA", "GM", "TSLA", "GM", "TSLA", "GM"],
+    "Date": pd.to_datetime(["2022-03-01", "2022-03-01", "2022-03-02", "2022-03-02", "2022-03-03", "2022-03-03"]),
+    "Close": [870.0, 45.0, 880.0, 46.0, 840.0, 44.0],
+    "Volume": [100, 40, 120, 42, 150, 38],
+})
+
+DOCUMENTS = {
+    "t1": ("Tesla recall of Model 3 vehicles announced", {"ticker": "TSLA", "date": "2022-03-02"}),
+    "t2": ("Tesla opens a new factory in Berlin", {"ticker": "TSLA", "date": "2022-03-03"}),
+    "g1": ("GM recall of Bolt vehicles announced", {"ticker": "GM", "date": "2022-03-02"}),
+    "g2": ("GM quarterly dividend raised", {"ticker": "GM", "date": "2022-03-01"}),
+}
+
+
+@pytest.fixture
+def retriever(tmp_path):
+    retriever = HybridRetriever(PRICES, provider=HashingEmbeddingProvider(dimension=256),
+                                persist_path=str(tmp_path), collection_name="test_docs")
+    ids = list(DOCUMENTS)
+    retriever.add_documents(ids, [DOCUMENTS[i][0] for i in ids], [DOCUMENTS[i][1] for i in ids])
+    return retriever
+
+
+def test_semantic_hits_are_joined_with_their_price_rows(retriever):
+    result = retriever.query("TSLA recall announced between 2022-03-01 and 2022-03-02")
+
+    # Only TSLA documents, closest wording first.
+    assert [hit["id"] for hit in result["hits"]] == ["t1", "t2"]
+    assert result["hits"][0]["distance"] < result["hits"][1]["distance"]
+    joined = [row for _, row in retriever.index.take([hit["row"] for hit in result["hits"]]).iterrows()]
+    assert [(row["Company"], row["Close"]) for row in joined] == [("TSLA", 880.0), ("TSLA", 840.0)]
+    assert list(result["rows"]["Close"]) == [880.0, 840.0]
+
+    # Numbers cover the named date range, not just the matched documents.
+    row_count, aggregates = result["aggregates"]["TSLA"]
+    assert row_count == 2
+    assert aggregates[("mean", "Close")] == pytest.approx(875.0)
+    assert aggregates[("sum", "Volume")] == 220
+
+
+def test_explicit_tickers_override_the_text(retriever):
+    result = retriever.query("vehicle recall", tickers=["GM", "TSLA"], n_results=3)
+    assert [hit["id"] for hit in result["hits"]][:2] in (["g1", "t1"], ["t1", "g1"])
+    assert set(result["aggregates"]) == {"GM", "TSLA"}
+    assert result["aggregates"]["GM"][0] == 3  # no dates given: every row
@@ -0,0 +1,133 @@
+# chatbot_desktop/tests/test_ingestion_service.py
+
+import pytest
+
+import services.ingestion_service as ingestion_service
+from services.ingestion_service import IngestionService
+from utils.chunker import iter_chunks
+
+
+class FakeVectorService:
+    def __init__(self):
+        self.rows = {}
+        self.embedded = []
+
+    def existing_ids(self, ids):
+        return {i for i in ids if i in self.rows}
+
+    def upsert_chunks(self, ids, chunks, metadatas=None):
+        self.embedded.extend(chunks)
+        for chunk_id, chunk, meta in zip(ids, chunks, metadatas):
+            self.rows[chunk_id] = (chunk, meta)
+
+    def update_metadata(self, ids, metadatas):
+        for chunk_id, meta in zip(ids, metadatas):
+            self.rows[chunk_id] = (self.rows[chunk_id][0], meta)
+
+    def delete_chunks(self, ids):
+        for chunk_id in ids:
+            del self.rows[chunk_id]
+
+
+def paragraphs(text):
+    return [p for p in text.split("\n\n") if p]
+
+
+@pytest.fixture
+def service(tmp_path):
+    return IngestionService(FakeVectorService(), manifest_dir=str(tmp_path), batch_size=2, chunker=paragraphs)
+
+
+def test_reingesting_unchanged_document_embeds_nothing(service):
+    text = "a\n\nb\n\nc"
+    assert service.ingest("doc", text)["added"] == 3
+    service.vector_service.embedded.clear()
+
+    stats = service.ingest("doc", text)
+    assert stats == {"added": 0, "moved": 0, "unchanged": 3, "removed": 0}
+    assert service.vector_service.embedded == []
+
+
+def test_edit_only_reembeds_changed_chunks(service):
+    service.ingest("doc", "a\n\nb\n\nc\n\nd")
+    service.vector_service.embedded.clear()
+
+    stats = service.ingest("doc", "a\n\nB\n\nc\n\nd")
+    assert service.vector_service.embedded == ["B"]
+    assert stats["removed"] == 1
+    assert sorted(chunk for chunk, _ in service.vector_service.rows.values()) == ["B", "a", "c", "d"]
+
+
+def test_shifted_chunks_only_get_metadata_updates(service):
+    service.ingest("doc", "a\n\nb")
+    service.vector_service.embedded.clear()
+
+    stats = service.ingest("doc", "new\n\na\n\nb")
+    assert service.vector_service.embedded == ["new"]
+    assert stats["moved"] == 2
+    indexes = {chunk: meta["chunk_index"] for chunk, meta in service.vector_service.rows.values()}
+    assert indexes == {"new": 0, "a": 1, "b": 2}
+
+
+class WordTokenizer:
+    def encode(self, text):
+        return text.split()
+
+    def decode(self, tokens):
+        return " ".join(tokens)
+
+
+def test_editing_one_paragraph_reembeds_only_its_chunks(tmp_path):
+    def chunker(text):
+        return iter_chunks(text, max_tokens=100, overlap=0, tokenizer=WordTokenizer())
+    service = IngestionService(FakeVectorService(), manifest_dir=str(tmp_path), chunker=chunker)
+    paragraphs = [" ".join(f"p{p}w{i}" for i in range((p * 11) % 35 + 5)) for p in range(200)]
+    total = service.ingest("doc", "\n\n".join(paragraphs))["added"]
+    service.vector_service.embedded.clear()
+
+    paragraphs[100] = paragraphs[100] + " with an extra sentence in the middle of it"
+    stats = service.ingest("doc", "\n\n".join(paragraphs))
+    assert any("p100w0" in chunk for chunk in service.vector_service.embedded)
+    assert 1 <= stats["added"] <= 2 < total
+    assert stats["removed"] == stats["added"]
+
+
+def test_batches_are_flushed_by_size_and_age(tmp_path, monkeypatch):
+    writes = []
+    service = IngestionService(FakeVectorService(), manifest_dir=str(tmp_path), batch_size=100,
+                               chunker=paragraphs, batch_max_chars=10, flush_seconds=60)
+    monkeypatch.setattr(service, "_write_batch", lambda document_id, batch, *args: writes.append(len(batch)))
+    service.ingest("doc", "aaaa\n\nbbbb\n\ncccc\n\ndddd")
+    assert writes == [3, 1]  # 12 characters fill a batch
+
+    clock = iter([0.0, 0.5, 5.0, 61.0, 61.5])
+    monkeypatch.setattr(ingestion_service.time, "monotonic", lambda: next(clock))
+    service.batch_max_chars = 1000
+    writes.clear()
+    service.ingest("other", "a\n\nb\n\nc")
+    assert writes == [3]  # the first chunk waited 61 seconds by the time "c" arrived
+
+
+def test_duplicate_chunks_are_stored_once(service):
+    stats = service.ingest("doc", "same\n\nsame\n\nother")
+    assert stats["added"] == 2
+
+
+def test_lexical_index_mirrors_writes_and_catches_up(tmp_path):
+    from services.lexical_index import LexicalIndex
+
+    vectors = FakeVectorService()
+    plain = IngestionService(vectors, manifest_dir=str(tmp_path), batch_size=2, chunker=paragraphs)
+    plain.ingest("doc", "alpha\n\nbeta")
+
+    lexical = LexicalIndex(str(tmp_path / "lexical.sqlite3"))
+    service = IngestionService(vectors, manifest_dir=str(tmp_path), batch_size=2, chunker=paragraphs,
+                               lexical_index=lexical)
+    vectors.embedded.clear()
+    service.ingest("doc", "gamma\n\nalpha")
+    assert vectors.embedded == ["gamma"]  # "alpha" was only added to the keyword index
+    assert lexical.count() == 2
+    assert lexical.search("alpha")[0][2]["chunk_index"] == 1
+
+    service.remove("doc")
+    assert lexical.count() == 0
@@ -0,0 +1,68 @@
+# chatbot_desktop/tests/test_lexical_index.py
+
+from core.agents.doc_agent import DocAgent
+from services.lexical_index import LexicalIndex
+from utils.text_ranking import reciprocal_rank_fusion
+
+CHUNKS = {
+    "a": "Tesla (TSLA) deliveries rose 12% in Q3.",
+    "b": "Invoice INV-2023-004 was paid late.",
+    "c": "Electric vehicle makers reported strong quarterly deliveries.",
+    "d": "GM and Ford announced dividends.",
+}
+
+
+def build(path):
+    index = LexicalIndex(str(path / "lexical.sqlite3"))
+    index.upsert_chunks(list(CHUNKS), list(CHUNKS.values()), [{"n": i} for i in range(len(CHUNKS))])
+    return index
+
+
+def test_exact_ids_and_tickers_rank_first(tmp_path):
+    index = build(tmp_path)
+    assert [hit[0] for hit in index.search("what happened to inv-2023-004?")] == ["b"]
+    assert index.search("tsla deliveries")[0] == ("a", CHUNKS["a"], {"n": 0})
+    assert [hit[0] for hit in index.search("deliveries")] == ["a", "c"]
+    assert index.search("the of and") == []
+
+
+def test_updates_deletes_and_reopen(tmp_path):
+    index = build(tmp_path)
+    index.upsert_chunks(["d"], ["Ford F-150 recall notice"])
+    index.delete_chunks(["a", "missing"])
+    index.update_metadata(["b"], [{"n": 9}])
+    index.close()
+
+    reopened = LexicalIndex(str(tmp_path / "lexical.sqlite3"))
+    assert reopened.count() == 3
+    assert reopened.existing_ids(["a", "b", "d"]) == {"b", "d"}
+    assert reopened.search("tsla") == []
+    assert [hit[0] for hit in reopened.search("dividends")] == []
+    assert reopened.search("f-150 recall")[0][0] == "d"
+    assert reopened.search("inv-2023-004")[0][2] == {"n": 9}
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["x", "y", "z"], ["y", "w"]], k=60)
+    assert [item for item, _ in fused] == ["y", "x", "w", "z"]
+
+
+class FakeVectorService:
+    def __init__(self):
+        self.calls = []
+
+    def search(self, query, top_k=3, with_ids=False):
+        self.calls.append(top_k)
+        return [("c", CHUNKS["c"], None), ("d", CHUNKS["d"], None)][:top_k]
+
+
+def test_doc_agent_fuses_keyword_and_vector_hits(tmp_path):
+    agent = DocAgent.__new__(DocAgent)
+    agent.lexical_index = build(tmp_path)
+    agent.vector_service = FakeVectorService()
+
+    context = agent.query_document("TSLA deliveries", top_k=2, vector_k=2, lexical_k=5)
+    assert context.split("\n---\n") == [CHUNKS["c"], CHUNKS["a"]]  # "c" is on both lists
+
+    agent.query_document("TSLA deliveries", vector_k=0)
+    assert agent.vector_service.calls == [2]
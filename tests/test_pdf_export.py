@@ -0,0 +1,68 @@
+# chatbot_desktop/tests/test_pdf_export.py
+
+import threading
+
+import pytest
+
+from storage.conversation_store import ConversationStore, SessionHistory
+from storage.pdf_export import export_history, write_conversation_pdf
+
+pypdf = pytest.importorskip("pypdf")
+
+
+def page_count(path):
+    return len(pypdf.PdfReader(path).pages)
+
+
+def page_text(path, index):
+    return pypdf.PdfReader(path).pages[index].extract_text()
+
+
+@pytest.fixture
+def history(tmp_path):
+    store = ConversationStore(str(tmp_path / "conversations.sqlite3"))
+    history = SessionHistory(store, store.new_session())
+    yield history
+    store.close()
+
+
+def test_long_conversations_are_paginated(tmp_path):
+    messages = [{"role": "user", "content": f"message {i} " + "word " * 60} for i in range(200)]
+    seen = []
+    path = str(tmp_path / "chat.pdf")
+    assert write_conversation_pdf(messages, path, total=200, progress=lambda d, t: seen.append(d)) == 200
+    assert page_count(path) > 20
+    assert "message 199" in page_text(path, -1)
+    assert seen[-1] == 200
+
+
+def test_cancelled_export_leaves_no_file(tmp_path):
+    cancelled = threading.Event()
+    cancelled.set()
+    path = tmp_path / "chat.pdf"
+    assert write_conversation_pdf([{"role": "user", "content": "hi"}], str(path), cancelled=cancelled) is None
+    assert not path.exists()
+
+
+def test_reexport_appends_only_new_turns(tmp_path, history):
+    path = str(tmp_path / "chat.pdf")
+    for i in range(100):
+        history.append({"role": "user", "content": f"first batch {i}"})
+    first = export_history(history, path)
+    assert first["added"] == 100 and not first["appended"]
+    pages_before = page_count(path)
+
+    for i in range(5):
+        history.append({"role": "assistant", "content": f"second batch {i}"})
+    second = export_history(history, path)
+    assert second["added"] == 5 and second["appended"]
+    assert page_count(path) == pages_before + 1
+    assert "second batch 4" in page_text(path, -1)
+    assert "first batch 0" in page_text(path, 0)
+
+    assert export_history(history, path)["added"] == 0
+
+    history.clear()  # a new session is exported from scratch
+    history.append({"role": "user", "content": "new session"})
+    third = export_history(history, path)
+    assert not third["appended"] and page_count(path) == 1
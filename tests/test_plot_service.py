@@ -0,0 +1,70 @@
+# chatbot_desktop/tests/test_plot_service.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.agents.data_agent import DataAgent
+from services.plot_service import PlotService
+from storage.blackboard import Blackboard
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "Close": rng.normal(100, 5, 10_000),
+        "Volume": rng.integers(1, 1000, 10_000),
+        "Company": ["TSLA"] * 10_000,
+    })
+
+
+def test_fingerprint_covers_every_row(frame):
+    service = PlotService()
+    changed = frame.copy()
+    changed.loc[1, "Close"] += 1
+    assert service.fingerprint(frame) != service.fingerprint(changed)
+    assert service.fingerprint(frame) == service.fingerprint(frame.copy())
+
+
+def test_renders_are_cached_per_frame_and_chart(frame):
+    service = PlotService()
+    image = service.render(frame, "Close")
+    assert image.startswith(PNG_SIGNATURE)
+    assert service.render(frame, "Close") is image
+    assert service.render(frame, "Close", kind="line") != image
+    assert service.stats == {"hits": 1, "misses": 2}
+
+    changed = frame.copy()
+    changed.loc[1, "Close"] += 1
+    service.render(changed, "Close")
+    assert service.stats["misses"] == 3
+    with pytest.raises(ValueError):
+        service.render(frame, "Close", kind="pie")
+
+
+def test_line_decimation_keeps_spikes():
+    service = PlotService(max_line_points=100)
+    values = np.zeros(10_001)
+    values[4321] = 50.0
+    x, y = service._decimate(values)
+    assert len(x) <= 101
+    assert 4321 in x and y.max() == 50.0
+    assert (np.diff(x) >= 0).all()  # still in x order
+
+
+def test_data_agent_plots_the_column_it_was_asked_for(frame):
+    blackboard = Blackboard()
+    blackboard.dataframes["prices"] = frame
+    agent = DataAgent(blackboard)
+    agent.set_active_df("prices")
+
+    assert agent.handle_query("plot a line of volume") == "Here is a line chart of 'Volume':"
+    assert blackboard.intermediate.pop("image").startswith(PNG_SIGNATURE)
+    assert agent.handle_query("plot it") == "Here is a histogram of 'Close':"
+
+    blackboard.dataframes["names"] = pd.DataFrame({"Company": ["TSLA", "GM"]})
+    agent.set_active_df("names")
+    assert agent.handle_query("plot") == "No numeric columns to plot."
@@ -0,0 +1,90 @@
+# chatbot_desktop/tests/test_request_queue.py
+
+import threading
+import time
+
+import pytest
+
+from app.request_queue import QueueFull, RequestQueue
+
+
+@pytest.fixture
+def make_queue():
+    queues = []
+
+    def make(**kwargs):
+        queue = RequestQueue(**kwargs)
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        queue.shutdown()
+
+
+def test_jobs_for_one_key_run_in_order(make_queue):
+    queue = make_queue(workers=4, max_pending=50)
+    done, order = threading.Event(), []
+
+    def job(i, cancelled):
+        time.sleep(0.001 * (5 - i % 5))  # later jobs would finish first if run in parallel
+        order.append(i)
+        if i == 19:
+            done.set()
+
+    for i in range(20):
+        queue.submit("conversation", job, i)
+    assert done.wait(2)
+    assert order == list(range(20))
+
+
+def test_different_keys_run_in_parallel(make_queue):
+    queue = make_queue(workers=2)
+    barrier = threading.Barrier(2, timeout=2)
+    results = []
+
+    def job(key, cancelled):
+        barrier.wait()  # only passes if both jobs run at the same time
+        results.append(key)
+
+    queue.submit("a", job, "a")
+    queue.submit("b", job, "b")
+    deadline = time.time() + 2
+    while len(results) < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    assert sorted(results) == ["a", "b"]
+
+
+def test_queue_is_bounded(make_queue):
+    queue = make_queue(workers=1, max_pending=2)
+    release = threading.Event()
+    queue.submit("a", lambda cancelled: release.wait(2))
+    time.sleep(0.05)  # let the worker pick up the first job
+    queue.submit("a", lambda cancelled: None)
+    queue.submit("a", lambda cancelled: None)
+    with pytest.raises(QueueFull):
+        queue.submit("a", lambda cancelled: None)
+    release.set()
+
+
+def test_cancel_drops_waiting_jobs_and_signals_the_running_one(make_queue):
+    depths = []
+    queue = make_queue(workers=1, on_depth_change=depths.append)
+    started, ran = threading.Event(), []
+
+    def running(cancelled):
+        started.set()
+        assert cancelled.wait(2)
+        ran.append("running stopped")
+
+    queue.submit("a", running)
+    waiting = queue.submit("a", lambda cancelled: ran.append("waiting"))
+    assert started.wait(2)
+    queue.cancel("a")
+    assert waiting.is_set()
+
+    deadline = time.time() + 2
+    while queue.depth and time.time() < deadline:
+        time.sleep(0.01)
+    assert ran == ["running stopped"]
+    assert max(depths) == 2 and depths[-1] == 0
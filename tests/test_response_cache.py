@@ -0,0 +1,106 @@
+# chatbot_desktop/tests/test_response_cache.py
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import services.ai_service as ai_service
+import services.response_cache as response_cache
+from services.response_cache import ResponseCache, response_key
+
+MESSAGES = [{"role": "user", "content": "Describe the dataset."}]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(path=str(tmp_path / "responses.sqlite3"), ttl=60, max_items=10, memory_items=2)
+    yield cache
+    cache.close()
+
+
+def test_keys_cover_every_parameter():
+    key = response_key("gpt", MESSAGES, temperature=0)
+    assert key == response_key("gpt", [dict(MESSAGES[0])], temperature=0)
+    assert key != response_key("gpt", MESSAGES, temperature=0.5)
+    assert key != response_key("other", MESSAGES, temperature=0)
+    assert key != response_key("gpt", MESSAGES + MESSAGES, temperature=0)
+
+
+def test_round_trip_persists_and_expires(cache, monkeypatch):
+    cache.put("k", "gpt", "answer")
+    assert cache.get("k") == "answer"
+    assert cache.get("missing") is None
+
+    reopened = ResponseCache(path=cache.path, ttl=60)
+    assert reopened.get("k") == "answer"  # from disk
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert cache.get("k") is None
+    assert cache.stats == {"hits": 1, "misses": 2, "expired": 1}
+
+
+def test_least_recently_used_rows_are_evicted(cache):
+    for i in range(11):
+        cache.put(f"k{i}", "gpt", str(i))
+        cache.get("k0")  # keeps k0 recent
+    assert cache.get("k0") == "0"
+    assert cache.get("k1") is None
+    assert cache.get("k10") == "10"
+
+
+def test_hits_only_write_last_used_in_batches(cache, monkeypatch):
+    monkeypatch.setattr(response_cache, "TOUCH_BATCH", 2)
+    cache.put("k", "gpt", "answer")
+    cache.put("other", "gpt", "answer")
+    written = cache._conn.execute("SELECT last_used FROM responses WHERE key = 'k'").fetchone()[0]
+    statements = []
+    cache._conn.set_trace_callback(statements.append)
+
+    assert cache.get("k") == "answer"  # served from memory: nothing written
+    assert cache.get("k") == "answer"
+    assert not any(s.startswith("UPDATE") for s in statements)
+    assert cache.get("other") == "answer"  # a second key fills the batch
+    assert sum(s.startswith("UPDATE") for s in statements) == 2
+    assert cache._conn.execute("SELECT last_used FROM responses WHERE key = 'k'").fetchone()[0] > written
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, model, messages, temperature, stream=False):
+        self.calls += 1
+        text = f"reply {self.calls}"
+        if stream:
+            return iter([SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+
+@pytest.fixture
+def completions(cache, monkeypatch):
+    completions = FakeCompletions()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(ai_service, "get_client", lambda: client)
+    monkeypatch.setattr(ai_service, "_response_cache", cache)
+    monkeypatch.setattr(ai_service, "RESPONSE_CACHE_ENABLED", True)
+    return completions
+
+
+def test_deterministic_requests_are_served_from_the_cache(completions):
+    assert ai_service.ask_chatgpt("Describe the dataset.", temperature=0) == "reply 1"
+    assert ai_service.ask_chatgpt("Describe the dataset.", temperature=0) == "reply 1"
+    assert list(ai_service.ask_chatgpt_stream("Describe the dataset.", temperature=0)) == ["reply 1"]
+    assert completions.calls == 1
+
+
+def test_sampled_requests_bypass_the_cache_unless_allowed(completions):
+    ai_service.ask_chatgpt("hi", temperature=0.8)
+    ai_service.ask_chatgpt("hi", temperature=0.8)
+    assert completions.calls == 2
+
+    first = ai_service.ask_chatgpt("hi", temperature=0.8, cache=True)
+    assert ai_service.ask_chatgpt("hi", temperature=0.8, cache=True) == first
+    assert ai_service.ask_chatgpt("hi", temperature=0, cache=False) != first
+    assert completions.calls == 4
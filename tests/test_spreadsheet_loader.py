@@ -0,0 +1,60 @@
+# chatbot_desktop/tests/test_spreadsheet_loader.py
+
+import pandas as pd
+import pytest
+from storage.spreadsheet_loader import RunningStats, load_spreadsheet
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    df = pd.DataFrame({
+        "Company": ["TSLA", "AAPL", "TSLA", "MSFT", "TSLA", "AAPL", "MSFT"],
+        "Close": [300.0, 150.5, 310.25, 280.0, None, 149.0, 281.5],
+        "Volume": [10, 20, 30, 40, 50, 60, 70],
+    })
+    path = tmp_path / "prices.csv"
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def test_running_stats_match_describe(csv_path):
+    stats = RunningStats()
+    for chunk in pd.read_csv(csv_path, chunksize=3):
+        stats.update(chunk)
+    result = stats.to_frame()
+    expected = pd.read_csv(csv_path).describe(include="all")
+
+    for col in ["Close", "Volume"]:
+        for row in ["count", "mean", "std", "min", "max"]:
+            assert result.loc[row, col] == pytest.approx(expected.loc[row, col])
+    assert result.loc["top", "Company"] == "TSLA"
+    assert result.loc["freq", "Company"] == 3
+    assert result.loc["unique", "Company"] == 3
+
+
+def test_second_load_is_served_from_cache(csv_path, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    first = load_spreadsheet(csv_path, chunksize=2, cache_dir=cache_dir)
+    assert not first.from_cache
+    assert "TSLA" in first.preview
+
+    second = load_spreadsheet(csv_path, cache_dir=cache_dir)
+    assert second.from_cache
+    assert second.stats == first.stats
+    pd.testing.assert_frame_equal(second.dataframe, pd.read_csv(csv_path))
+
+
+def test_unconvertible_first_chunk_disables_the_cache(csv_path, tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    read_csv = pd.read_csv
+
+    def mixed_chunks(*args, **kwargs):
+        for chunk in read_csv(*args, **kwargs):
+            chunk["Company"] = [1, "x", b"y"][:len(chunk)]  # ints, text and bytes: Arrow can't type it
+            yield chunk
+    monkeypatch.setattr(pd, "read_csv", mixed_chunks)
+
+    cache_dir = tmp_path / "cache"
+    loaded = load_spreadsheet(csv_path, chunksize=3, cache_dir=str(cache_dir))
+    assert "Close" in loaded.stats and not loaded.from_cache
+    assert list(cache_dir.iterdir()) == []
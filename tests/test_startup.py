@@ -0,0 +1,62 @@
+# chatbot_desktop/tests/test_startup.py
+
+import os
+import subprocess
+import sys
+import textwrap
+
+from utils.startup_timing import StartupReport
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_creating_the_agent_manager_imports_no_heavy_dependencies(tmp_path):
+    script = textwrap.dedent(f"""
+        import sys
+        sys.path.insert(0, {ROOT!r})
+        from core.agent_manager import AgentManager
+        manager = AgentManager()
+        manager.reset_all()
+        heavy = [m for m in ("openai", "chromadb", "pandas", "matplotlib", "pdfplumber", "docx", "tiktoken")
+                 if m in sys.modules]
+        print(heavy)
+    """)
+    env = dict(os.environ, OPENAI_API_KEY="test-key")
+    out = subprocess.run([sys.executable, "-c", script], cwd=tmp_path, env=env,
+                         capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+    assert not (tmp_path / "vector_db").exists()
+
+
+def test_report_times_nested_imports(tmp_path, monkeypatch):
+    (tmp_path / "startup_outer.py").write_text("import time\nimport startup_inner\ntime.sleep(0.02)\n")
+    (tmp_path / "startup_inner.py").write_text("import time\ntime.sleep(0.05)\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    report = StartupReport()
+    report.start()
+    with report.phase("import"):
+        import startup_outer  # noqa: F401
+    report.finish()
+
+    outer_total, outer_own = report.imports["startup_outer"]
+    inner_total, inner_own = report.imports["startup_inner"]
+    assert inner_total >= 0.05 and outer_total >= inner_total + 0.02
+    assert 0.02 <= outer_own < 0.05
+    assert report.phases[0][0] == "import" and report.total >= outer_total
+    assert "startup_outer" in report.format()
+
+
+def test_importing_the_app_has_no_side_effects(tmp_path):
+    # Spawned worker processes (PDF extraction) re-import the main module.
+    script = textwrap.dedent(f"""
+        import sys, threading
+        sys.path.insert(0, {ROOT!r})
+        import app.flet_app as app
+        print(app.conversation_store is None, threading.active_count())
+    """)
+    env = dict(os.environ, OPENAI_API_KEY="test-key")
+    out = subprocess.run([sys.executable, "-c", script], cwd=tmp_path, env=env,
+                         capture_output=True, text=True, check=True)
+    assert out.stdout.strip().splitlines()[-1] == "True 1"
+    assert not (tmp_path / "data").exists()
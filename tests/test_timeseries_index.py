@@ -0,0 +1,84 @@
+# chatbot_desktop/tests/test_timeseries_index.py
+
+import os
+
+import pandas as pd
+import pytest
+from core.agents.data_agent import DataAgent
+from services.timeseries_index import TimeSeriesIndex, parse_query
+
+CSV_PATH = os.path.join(os.path.dirname(__file__), "..", "daily_stock_prices_5y_cleaned.csv")
+
+
+@pytest.fixture(scope="module")
+def prices():
+    return pd.read_csv(CSV_PATH, parse_dates=["Date"])
+
+
+@pytest.fixture(scope="module")
+def index(prices):
+    return TimeSeriesIndex(prices)
+
+
+def test_range_aggregates_match_boolean_mask(prices, index):
+    mask = (prices["Company"] == "TSLA") & (prices["Date"] >= "2022-03-01") & (prices["Date"] <= "2022-04-30")
+    expected = prices[mask]
+
+    rows, results = index.aggregate("TSLA", [("mean", "Close"), ("sum", "Volume")], "2022-03-01", "2022-04-30")
+    assert rows == len(expected)
+    assert results[("mean", "Close")] == pytest.approx(expected["Close"].mean())
+    assert results[("sum", "Volume")] == expected["Volume"].sum()
+
+
+def test_rows_are_date_sorted_within_partition(index):
+    tsla = index.rows("TSLA")
+    assert (tsla["Company"] == "TSLA").all()
+    assert tsla["Date"].is_monotonic_increasing
+
+
+def test_position_finds_exact_entry(index):
+    pos = index.position("TSLA", "2022-03-21")
+    assert index.take([pos]).iloc[0]["Date"] == pd.Timestamp("2022-03-21")
+    assert index.position("TSLA", "2022-03-19") is None
+    assert index.position("NOPE", "2022-03-21") is None
+
+
+def test_parse_query(index):
+    query = parse_query("mean Close and total Volume for TSLA between 2022-03-01 and 2022-04-30", index)
+    assert query == {
+        "keys": ["TSLA"],
+        "start": "2022-03-01",
+        "end": "2022-04-30",
+        "aggregations": [("mean", "Close"), ("sum", "Volume")],
+    }
+    assert parse_query("hello there", index) is None
+
+
+def test_non_numeric_columns_are_refused(index):
+    assert not index.supports("mean", "Date") and not index.supports("sum", "Company")
+    assert index.supports("max", "Date") and index.supports("count", "Company")
+    with pytest.raises(ValueError):
+        index.aggregate("TSLA", [("mean", "Date")])
+    _, results = index.aggregate("TSLA", [("max", "Date")])
+    assert results[("max", "Date")] == index.rows("TSLA")["Date"].max()
+
+
+def test_data_agent_explains_unsupported_aggregations(index):
+    agent = DataAgent.__new__(DataAgent)
+    reply = agent.answer_query(index, parse_query("average Date for TSLA", index))
+    assert reply == "Can't average column 'Date': it holds date values."
+
+
+def test_index_shares_the_frame_and_parses_text_dates():
+    df = pd.DataFrame({
+        "Company": ["GM", "TSLA", "GM", "TSLA"],
+        "Date": ["2022-03-02", "2022-03-01", "2022-03-01", "2022-03-02"],
+        "Close": [46.0, 870.0, 45.0, 880.0],
+    })
+    index = TimeSeriesIndex(df)
+    assert index.df is df  # sorted by position, not copied
+    gm = index.rows("GM")
+    assert list(gm["Close"]) == [45.0, 46.0]
+    assert gm["Date"].iloc[0] == pd.Timestamp("2022-03-01")
+    assert index.aggregate("TSLA", [("first", "Close"), ("max", "Date")]) == (
+        2, {("first", "Close"): 870.0, ("max", "Date"): pd.Timestamp("2022-03-02").to_datetime64()})
@@ -0,0 +1,124 @@
+# chatbot_desktop/tests/test_tracing.py
+
+import asyncio
+import json
+import os
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import services.ai_service as ai_service  # noqa: E402
+import utils.tracing as tracing  # noqa: E402
+from core.agent_manager import AgentManager  # noqa: E402
+from utils.tracing import Histogram, Tracer  # noqa: E402
+
+
+@pytest.fixture
+def tracer(monkeypatch):
+    tracer = Tracer(enabled=True, path="", recent=100)
+    monkeypatch.setattr(tracing, "_tracer", tracer)
+    return tracer
+
+
+def test_histogram_quantiles_come_from_the_buckets():
+    hist = Histogram()
+    for ms in [0.5, 3, 3, 4, 40, 40, 40, 40, 40, 900]:
+        hist.observe(ms)
+    assert hist.quantile(0.5) == 50  # bucket (20, 50]
+    assert hist.quantile(0.95) == 900  # capped at the largest value seen
+    assert hist.to_dict()["count"] == 10
+    assert hist.to_dict()["buckets"] == {"1": 1, "5": 3, "50": 5, "1000": 1}
+
+
+def test_nested_spans_share_a_trace_and_are_exported(tracer, tmp_path):
+    with tracer.span("turn") as turn:
+        with tracer.span("retrieval", top_k=3) as retrieval:
+            retrieval.set(hits=2)
+        with pytest.raises(ValueError):
+            with tracer.span("completion"):
+                raise ValueError("boom")
+    with tracer.span("turn") as other:
+        pass
+    tracer.record_tokens("gpt", prompt=10, completion=4)
+    tracer.record_cache("response", hits=1, misses=3)
+
+    spans = {span["name"]: span for span in tracer.recent_spans()[:3]}
+    assert spans["retrieval"]["parent_id"] == turn.span_id
+    assert spans["retrieval"]["trace_id"] == turn.trace_id == spans["completion"]["trace_id"]
+    assert spans["retrieval"]["attrs"] == {"top_k": 3, "hits": 2}
+    assert spans["completion"]["error"] == "ValueError: boom"
+    assert other.trace_id != turn.trace_id
+
+    records = [json.loads(line) for line in open(tracer.export(str(tmp_path / "trace.jsonl")))]
+    assert [r["type"] for r in records] == ["span"] * 4 + ["metrics"]
+    metrics = records[-1]
+    assert metrics["stages"]["turn"]["count"] == 2
+    assert metrics["tokens"] == {"gpt": {"prompt": 10, "completion": 4}}
+    assert metrics["caches"]["response"]["hit_rate"] == 0.25
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer(enabled=False)
+    with tracer.span("turn") as span:
+        span.set(x=1)
+    tracer.record_tokens("gpt", 1, 1)
+    assert tracer.recent_spans() == [] and tracer.snapshot()["stages"] == {}
+
+
+class FakeCompletions:
+    def create(self, model, messages, temperature, stream=False):
+        if stream:
+            return iter([SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+                         for text in ["Hello", " there"]])
+        usage = SimpleNamespace(prompt_tokens=12, completion_tokens=3)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="Hi"))], usage=usage)
+
+
+def test_completions_record_tokens_and_cache_hits(tracer, tmp_path, monkeypatch):
+    from services.response_cache import ResponseCache
+    client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+    monkeypatch.setattr(ai_service, "get_client", lambda: client)
+    monkeypatch.setattr(ai_service, "_response_cache", ResponseCache(path=str(tmp_path / "r.sqlite3")))
+
+    ai_service.ask_chatgpt("hi", temperature=0, cache=True)
+    ai_service.ask_chatgpt("hi", temperature=0, cache=True)
+    stream = ai_service.ask_chatgpt_stream("hello", temperature=0)
+    assert next(stream) == "Hello"
+    stream.close()  # the reader stopped early; the span still ends
+
+    completions = [span for span in tracer.recent_spans() if span["name"] == "completion"]
+    assert completions[0]["attrs"]["prompt_tokens"] == 12
+    assert completions[1]["attrs"]["cache_hit"] is True
+    assert "first_token_ms" in completions[2]["attrs"]
+    snapshot = tracer.snapshot()
+    assert snapshot["stages"]["completion"]["count"] == 3
+    assert snapshot["tokens"][ai_service.CHAT_MODEL] == {"prompt": 12, "completion": 3}
+    assert snapshot["caches"]["response"] == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+class FakeAgent:
+    async def handle_query_async(self, user_msg):
+        with tracing.get_tracer().span("retrieval"):
+            await asyncio.sleep(0)
+        return f"echo: {user_msg}"
+
+
+def test_route_query_joins_the_callers_trace(tracer, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manager = AgentManager()
+    manager.general_agent = FakeAgent()
+
+    def answer():
+        with tracer.span("turn"):
+            manager.route_query("hi")
+    worker = threading.Thread(target=answer)
+    worker.start()
+    worker.join(5)
+
+    retrieval, route, turn = tracer.recent_spans()
+    assert route["attrs"] == {"agent": "FakeAgent"}
+    assert retrieval["parent_id"] == route["span_id"] and route["parent_id"] == turn["span_id"]
+    assert {retrieval["trace_id"], route["trace_id"]} == {turn["trace_id"]}
@@ -0,0 +1,84 @@
+# chatbot_desktop/tests/test_vector_index.py
+
+import numpy as np
+import pytest
+
+import services.vector_index as vector_index
+from services.embedding_providers import HashingEmbeddingProvider
+from services.vector_index import NumpyVectorIndex
+from services.vector_service import VectorService
+
+
+def random_vectors(n, dim=16, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+def test_query_matches_exact_cosine_ranking(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_index, "BLOCK_ROWS", 64)  # several blocks
+    vectors = random_vectors(500)
+    index = NumpyVectorIndex(str(tmp_path))
+    index.upsert([f"id-{i}" for i in range(500)], vectors, documents=[f"doc {i}" for i in range(500)])
+
+    queries = random_vectors(3, seed=1)
+    result = index.query(queries, n_results=5)
+
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    for q, ids, distances in zip(queries, result["ids"], result["distances"]):
+        scores = normalized @ (q / np.linalg.norm(q))
+        expected = np.argsort(-scores)[:5]
+        assert ids == [f"id-{i}" for i in expected]
+        np.testing.assert_allclose(distances, 1 - scores[expected], rtol=1e-5, atol=1e-6)
+
+
+def test_upsert_delete_and_reopen(tmp_path):
+    vectors = random_vectors(3)
+    index = NumpyVectorIndex(str(tmp_path))
+    index.upsert(["a", "b", "c"], vectors, documents=["A", "B", "C"], metadatas=[{"n": 1}, {"n": 2}, None])
+    index.upsert(["b"], -vectors[:1], documents=["B2"])  # replaced in place
+    index.delete(["c"])
+    index.modify(metadata={"embedding_dim": 16})
+    index.close()
+
+    reopened = NumpyVectorIndex(str(tmp_path))
+    assert reopened.count() == 2
+    assert reopened.metadata == {"embedding_dim": 16}
+    assert reopened.get(["a", "b", "c"])["documents"] == ["A", "B2"]
+    top = reopened.query(vectors[:1], n_results=10)
+    assert top["ids"] == [["a", "b"]]  # "c" is gone, "b" now points away from "a"
+
+
+@pytest.mark.parametrize("scan_fraction", [1, 1000])  # gather matching rows / mask a full scan
+def test_where_filters_candidates_before_scoring(tmp_path, monkeypatch, scan_fraction):
+    monkeypatch.setattr(vector_index, "SCAN_FRACTION", scan_fraction)
+    vectors = random_vectors(100)
+    index = NumpyVectorIndex(str(tmp_path))
+    index.upsert(
+        [str(i) for i in range(100)], vectors,
+        metadatas=[{"ticker": ["TSLA", "GM", "F"][i % 3], "year": 2020 + i % 5} for i in range(100)],
+    )
+    result = index.query(vectors[:2], n_results=50, where={"$and": [{"ticker": "GM"}, {"year": {"$gte": 2023}}]})
+    for metadatas in result["metadatas"]:
+        assert metadatas and all(m["ticker"] == "GM" and m["year"] >= 2023 for m in metadatas)
+    assert index.query(vectors[:1], where={"ticker": {"$in": ["none"]}})["ids"] == [[]]
+
+    index.update(["1"], [{"ticker": "TSLA", "year": None}])
+    assert index.get(["1"])["metadatas"] == [{"ticker": "TSLA"}]
+
+
+def test_vector_service_on_the_numpy_backend(tmp_path):
+    service = VectorService(provider=HashingEmbeddingProvider(dimension=128),
+                            persist_path=str(tmp_path), backend="numpy")
+    service.add_document("cars", ["Ford F-150 recall notice", "GM quarterly dividend announced"],
+                         metadata={"source": "news"})
+    service.add_document("pets", ["The cat sat on the mat"], metadata={"source": "blog"})
+    assert service.existing_ids(["cars-0", "pets-0", "nope"]) == {"cars-0", "pets-0"}
+
+    (chunk, meta), = service.search("dividend from GM", top_k=1)
+    assert chunk == "GM quarterly dividend announced" and meta == {"source": "news"}
+    filtered = service.search("cat", top_k=5, where={"source": "news"})
+    assert len(filtered) == 2 and all(meta["source"] == "news" for _, meta in filtered)
+    assert len(service.search_many(["recall", "cat", "dividend"], top_k=2)) == 3
+
+    with pytest.raises(ValueError, match="different model"):
+        VectorService(provider=HashingEmbeddingProvider(dimension=64),
+                      persist_path=str(tmp_path), backend="numpy")
@@ -0,0 +1,73 @@
+# chatbot_desktop/tests/test_web_fetcher.py
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from services.web_fetcher import WebFetcher
+
+BODY = b"<html><body>" + b"x" * 5000 + b"</body></html>"
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    requests_seen = []
+
+    def do_GET(self):
+        PageHandler.requests_seen.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.send_header("ETag", '"v1"')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.send_header("ETag", '"v1"')
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def url():
+    PageHandler.requests_seen = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/page"
+    server.shutdown()
+
+
+def test_fresh_entries_skip_the_network(url):
+    cache = {}
+    fetcher = WebFetcher(cache=cache, ttl=60)
+    first = fetcher.fetch(url)
+    second = fetcher.fetch(url)
+    assert first["source"] == "network" and second["source"] == "cache"
+    assert second["text"] == BODY.decode()
+    assert url in cache
+    assert len(PageHandler.requests_seen) == 1
+
+
+def test_stale_entries_are_revalidated_with_etag(url):
+    fetcher = WebFetcher(ttl=0)
+    fetcher.fetch(url)
+    again = fetcher.fetch(url)
+    assert again["source"] == "revalidated"
+    assert again["text"] == BODY.decode()
+    assert PageHandler.requests_seen[-1].get("If-None-Match") == '"v1"'
+
+
+def test_body_is_capped(url):
+    page = WebFetcher(max_bytes=100).fetch(url)
+    assert page["truncated"]
+    assert len(page["text"]) == 100
+
+
+def test_entries_past_max_age_are_evicted(url):
+    cache = {}
+    fetcher = WebFetcher(cache=cache, ttl=0, max_age=0)
+    fetcher.fetch(url)
+    fetcher._evict(now=cache[url]["fetched_at"] + 1)
+    assert cache == {}
@@ -1,15 +1,180 @@
 # chatbot_desktop/utils/chunker.py
 
-import tiktoken
+import re
+import zlib
 
+from utils.tokens import get_tokenizer
 
-def chunk_text(text, max_tokens=500, overlap=50):
-    tokenizer = tiktoken.encoding_for_model("text-embedding-ada-002")
-    tokens = tokenizer.encode(text)
-    chunks = []
+EMBEDDING_TOKENIZER_MODEL = "text-embedding-ada-002"
 
-    for start_idx in range(0, len(tokens), max_tokens - overlap):
-        chunk = tokens[start_idx: start_idx + max_tokens]
-        chunks.append(tokenizer.decode(chunk))
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
 
-    return chunks
+
+def _require_tokenizer(tokenizer):
+    tokenizer = tokenizer or get_tokenizer(EMBEDDING_TOKENIZER_MODEL)
+    if tokenizer is None:
+        raise RuntimeError("No tokenizer available for chunking (tiktoken could not load its encoding).")
+    return tokenizer
+
+
+def chunk_text(text, max_tokens=500, overlap=50, prefer_boundaries=False, tokenizer=None):
+    return list(iter_chunks([text], max_tokens, overlap, prefer_boundaries, tokenizer))
+
+
+def iter_chunks(texts, max_tokens=500, overlap=50, prefer_boundaries=True, tokenizer=None):
+    """
+    Lazily yields chunks of at most ~max_tokens tokens from `texts`, an
+    iterable of text pieces (pages, paragraphs, file lines...) or a single
+    string. Only the current chunk and a partial paragraph are held in
+    memory, so arbitrarily large inputs can be streamed through.
+
+    With prefer_boundaries, chunks end on paragraph breaks where possible,
+    falling back to sentence ends and finally to raw token windows for
+    oversized sentences; the overlap is made of whole trailing units.
+    Unless a chunk fills up first, where it ends is decided by the content
+    of the unit it ends on (see _is_cut_point) rather than by where it
+    started, so editing one paragraph only changes the chunks around it
+    instead of shifting every later boundary.
+    Without it, chunks are fixed token windows stepping max_tokens - overlap,
+    so overlap must be smaller than max_tokens (ValueError otherwise).
+    """
+    # Checked here, not on first next(): a window that doesn't advance would loop forever.
+    if max_tokens < 1:
+        raise ValueError(f"max_tokens must be positive, got {max_tokens}")
+    if not prefer_boundaries and not 0 <= overlap < max_tokens:
+        raise ValueError(f"overlap must be in [0, max_tokens), got overlap={overlap}, max_tokens={max_tokens}")
+    if isinstance(texts, str):
+        texts = [texts]
+    tokenizer = _require_tokenizer(tokenizer)
+
+    if prefer_boundaries:
+        return _iter_structured_chunks(texts, max_tokens, overlap, tokenizer)
+    return _iter_window_chunks(texts, max_tokens, overlap, tokenizer)
+
+
+def _iter_window_chunks(texts, max_tokens, overlap, tokenizer):
+    step = max_tokens - overlap
+    buffer = []
+    pending = 0  # tokens at the end of `buffer` not yet included in any chunk
+
+    for text in texts:
+        tokens = tokenizer.encode(text)
+        buffer.extend(tokens)
+        pending += len(tokens)
+        while len(buffer) >= max_tokens:
+            yield tokenizer.decode(buffer[:max_tokens])
+            pending = max(0, len(buffer) - max_tokens)
+            buffer = buffer[step:]
+
+    if pending:
+        yield tokenizer.decode(buffer)
+
+
+def _iter_paragraphs(texts, max_chars):
+    """
+    Re-splits a stream of text pieces into paragraphs, carrying incomplete
+    paragraphs across piece boundaries. A paragraph longer than `max_chars`
+    is released early so memory stays bounded.
+    """
+    carry = ""
+    for text in texts:
+        carry += text
+        parts = _PARAGRAPH_BREAK.split(carry)
+        carry = parts.pop()
+        for part in parts:
+            if part.strip():
+                yield part
+        if len(carry) > max_chars:
+            yield carry
+            carry = ""
+    if carry.strip():
+        yield carry
+
+
+def _split_units(paragraph, max_tokens, tokenizer):
+    """
+    Yields (text, n_tokens, separator) pieces of a paragraph, each within
+    max_tokens. `separator` is what goes between the piece and the one
+    before it when both end up in the same chunk.
+    """
+    tokens = tokenizer.encode(paragraph)
+    if len(tokens) <= max_tokens:
+        yield paragraph, len(tokens), "\n\n"
+        return
+
+    separator = "\n\n"
+    for sentence in _SENTENCE_END.split(paragraph):
+        if not sentence.strip():
+            continue
+        sentence_tokens = tokenizer.encode(sentence)
+        if len(sentence_tokens) <= max_tokens:
+            yield sentence, len(sentence_tokens), separator
+            separator = " "
+            continue
+        for start in range(0, len(sentence_tokens), max_tokens):
+            window = sentence_tokens[start: start + max_tokens]
+            yield tokenizer.decode(window), len(window), separator
+            separator = ""
+        separator = " "
+
+
+def _is_cut_point(unit, total, max_tokens):
+    """
+    Whether a chunk holding `total` tokens may end after `unit`. Decided by
+    a hash of the unit's text, with a chance proportional to its size (a
+    unit of 3/4 max_tokens always qualifies), once the chunk is a quarter
+    full. Chunks come out somewhat smaller than with greedy packing, but a
+    boundary only moves when the text near it changes.
+    """
+    text, n_tokens, _ = unit
+    if total <= max_tokens // 4:
+        return False
+    return zlib.crc32(text.encode("utf-8")) < n_tokens / max(1, max_tokens * 3 // 4) * 2 ** 32
+
+
+def _iter_structured_chunks(texts, max_tokens, overlap, tokenizer):
+    units = []  # (text, n_tokens, separator) making up the current chunk
+    total = 0
+    pending = False  # whether `units` holds more than the overlap of the last chunk
+
+    # Roughly 16 chars per token is far above real text density, so only
+    # pathological input without paragraph breaks hits this limit.
+    for paragraph in _iter_paragraphs(texts, max_chars=max_tokens * 16):
+        for unit in _split_units(paragraph.strip(), max_tokens, tokenizer):
+            n_tokens = unit[1]
+            if units and total + n_tokens > max_tokens:
+                # The chunk filled up before reaching a cut point.
+                yield _join_units(units)
+                units, total = _overlap_tail(units, overlap)
+                # Drop the overlap too if the new unit still doesn't fit next to it.
+                while units and total + n_tokens > max_tokens:
+                    total -= units.pop(0)[1]
+            units.append(unit)
+            total += n_tokens
+            pending = True
+            if _is_cut_point(unit, total, max_tokens):
+                yield _join_units(units)
+                units, total = _overlap_tail(units, overlap)
+                pending = False
+
+    if pending:
+        yield _join_units(units)
+
+
+def _join_units(units):
+    parts = [units[0][0]]
+    for text, _, separator in units[1:]:
+        parts.append(separator)
+        parts.append(text)
+    return "".join(parts)
+
+
+def _overlap_tail(units, overlap):
+    tail, total = [], 0
+    for unit in reversed(units):
+        if total + unit[1] > overlap:
+            break
+        tail.insert(0, unit)
+        total += unit[1]
+    return tail, total
@@ -0,0 +1,80 @@
+# chatbot_desktop/utils/html_text.py
+
+import re
+from html.parser import HTMLParser
+
+# Elements whose content is never readable page text.
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "canvas", "iframe",
+             "nav", "footer", "header", "aside", "form", "button", "select"}
+# Elements that end a block of text.
+BLOCK_TAGS = {"p", "div", "section", "article", "main", "li", "ul", "ol", "dl", "dt", "dd",
+              "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote", "table", "tr",
+              "figcaption", "br", "hr", "title"}
+# Void elements never get an end tag, so they can't open a skipped region.
+VOID_TAGS = {"br", "hr", "img", "input", "meta", "link", "area", "base", "col", "embed",
+             "source", "track", "wbr"}
+
+_SPACES = re.compile(r"[ \t\r\f\v ]+")
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks = []
+        self._current = []
+        # While inside a skipped element, only tags with its name are counted,
+        # so unclosed <p>/<li> inside e.g. <nav> can't leave us stuck skipping.
+        self._skip_tag = None
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+            return
+        if tag in SKIP_TAGS and tag not in VOID_TAGS:
+            self._end_block()
+            self._skip_tag, self._skip_depth = tag, 1
+        elif tag in BLOCK_TAGS:
+            self._end_block()
+
+    def handle_endtag(self, tag):
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+                if not self._skip_depth:
+                    self._skip_tag = None
+            return
+        if tag in BLOCK_TAGS:
+            self._end_block()
+
+    def handle_data(self, data):
+        if self._skip_tag is None:
+            self._current.append(data)
+
+    def _end_block(self):
+        text = _SPACES.sub(" ", "".join(self._current)).strip()
+        if text:
+            self.blocks.append(text)
+        self._current = []
+
+    def close(self):
+        super().close()
+        self._end_block()
+
+
+def looks_like_html(text):
+    head = text[:2048].lower()
+    return "<html" in head or "<!doctype html" in head or "<body" in head or "<div" in head or "<p" in head
+
+
+def html_to_text(html):
+    """
+    Returns the readable text of an HTML page: scripts, styles, navigation,
+    headers/footers and forms are dropped, and each block-level element
+    becomes its own paragraph (separated by blank lines).
+    """
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    return "\n\n".join(parser.blocks)
@@ -0,0 +1,123 @@
+# chatbot_desktop/utils/startup_timing.py
+
+import importlib.abc
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+class _TimedLoader(importlib.abc.Loader):
+    def __init__(self, loader, report):
+        self._loader = loader
+        self._report = report
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        with self._report.importing(module.__name__):
+            self._loader.exec_module(module)
+
+    def __getattr__(self, name):
+        # get_resource_reader, is_package, get_source... come from the real loader.
+        return getattr(self._loader, name)
+
+
+class _TimingFinder(importlib.abc.MetaPathFinder):
+    def __init__(self, report):
+        self._report = report
+
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, self._report)
+                return spec
+        return None
+
+
+class StartupReport:
+    """
+    Startup timings: how long each module took to import (including and
+    excluding the modules it imported in turn), and named phases such as
+    service construction, timed with `phase(label)`.
+
+    Import timing hooks into sys.meta_path while active, between start()
+    and finish(); it is meant for diagnostics and is off unless enabled.
+    """
+
+    def __init__(self):
+        self.imports = {}  # module -> (total seconds, own seconds)
+        self.phases = []   # (label, seconds)
+        self.started_at = None
+        self.total = None
+        self._finder = None
+        self._local = threading.local()
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        if self._finder is None:
+            self._finder = _TimingFinder(self)
+            sys.meta_path.insert(0, self._finder)
+
+    def finish(self):
+        """
+        Stops import timing and records the time since start().
+        """
+        if self._finder is not None:
+            sys.meta_path.remove(self._finder)
+            self._finder = None
+        if self.started_at is not None:
+            self.total = time.perf_counter() - self.started_at
+
+    @contextmanager
+    def phase(self, label):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((label, time.perf_counter() - start))
+
+    @contextmanager
+    def importing(self, name):
+        # Children's time is subtracted from the parent's own time.
+        stack = self._local.__dict__.setdefault("stack", [])
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            self.imports[name] = (elapsed, elapsed - children)
+
+    def format(self, top=15):
+        lines = []
+        if self.total is not None:
+            lines.append(f"startup: {self.total * 1000:.0f} ms")
+        for label, seconds in self.phases:
+            lines.append(f"  {label:<48} {seconds * 1000:8.1f} ms")
+        slowest = sorted(self.imports.items(), key=lambda item: -item[1][1])[:top]
+        if slowest:
+            lines.append(f"slowest imports (own time / with dependencies), {len(self.imports)} modules:")
+            for name, (total, own) in slowest:
+                lines.append(f"  {name:<48} {own * 1000:8.1f} ms {total * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {
+            "total": self.total,
+            "phases": [{"label": label, "seconds": seconds} for label, seconds in self.phases],
+            "imports": {name: {"total": total, "own": own} for name, (total, own) in self.imports.items()},
+        }
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
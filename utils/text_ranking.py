@@ -0,0 +1,83 @@
+# chatbot_desktop/utils/text_ranking.py
+
+import math
+import re
+from collections import Counter
+
+_TERM = re.compile(r"[A-Za-z0-9][A-Za-z0-9.$%_-]*[A-Za-z0-9%]|[A-Za-z0-9]")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have how i in is it its me my of on or
+please so tell that the their them there this to was what when where which who why
+will with you your about can do does did
+""".split())
+
+
+def tokenize_terms(text, stopwords=STOPWORDS):
+    """
+    Lowercased word/number terms without stopwords. Keeps tokens such as
+    ticker symbols, ids, decimals and percentages ("tsla", "v1.2", "3.5%") intact.
+    """
+    return [t for t in (m.group(0).lower() for m in _TERM.finditer(text)) if t not in stopwords]
+
+
+def bm25_scores(query_terms, documents_terms, k1=1.5, b=0.75):
+    """
+    Okapi BM25 score of each document (a list of terms) for `query_terms`.
+    """
+    n_docs = len(documents_terms)
+    if not n_docs:
+        return []
+    avg_len = sum(len(terms) for terms in documents_terms) / n_docs or 1.0
+    frequencies = [Counter(terms) for terms in documents_terms]
+
+    query = set(query_terms)
+    doc_freq = {term: sum(1 for tf in frequencies if term in tf) for term in query}
+    idf = {term: math.log(1 + (n_docs - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+
+    scores = []
+    for terms, tf in zip(documents_terms, frequencies):
+        norm = k1 * (1 - b + b * len(terms) / avg_len)
+        scores.append(sum(
+            idf[term] * tf[term] * (k1 + 1) / (tf[term] + norm)
+            for term in query if tf[term]
+        ))
+    return scores
+
+
+def select_passages(query, passages, budget_tokens, token_counter, stopwords=STOPWORDS):
+    """
+    Picks the passages most relevant to `query` (BM25) until `budget_tokens`
+    is filled, and returns them in their original order. Without any query
+    terms, passages are taken from the start.
+    """
+    query_terms = tokenize_terms(query, stopwords)
+    if query_terms:
+        scores = bm25_scores(query_terms, [tokenize_terms(p, stopwords) for p in passages])
+        # Highest score first; ties keep page order.
+        ranked = sorted(range(len(passages)), key=lambda i: (-scores[i], i))
+    else:
+        ranked = list(range(len(passages)))
+
+    chosen, used = [], 0
+    for i in ranked:
+        n_tokens = token_counter(passages[i])
+        if used + n_tokens > budget_tokens:
+            continue
+        chosen.append(i)
+        used += n_tokens
+    return [passages[i] for i in sorted(chosen)]
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """
+    Merges several rankings (lists of ids, best first) into one: each id
+    scores sum(1 / (k + rank)) over the rankings it appears in, so items
+    ranked well by either side rise without comparing their raw scores.
+    Returns (id, score) pairs, best first; ties keep first-seen order.
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: -item[1])
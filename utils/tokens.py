@@ -0,0 +1,30 @@
+# chatbot_desktop/utils/tokens.py
+
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Rough chars-per-token ratio used when no tokenizer can be loaded.
+_CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(model="text-embedding-ada-002"):
+    """
+    Returns the tiktoken encoding for `model`, built once per process.
+    Returns None if the encoding cannot be loaded (e.g. offline, first run).
+    """
+    try:
+        import tiktoken  # imported on first use; it is slow to load
+        return tiktoken.encoding_for_model(model)
+    except Exception as e:
+        logger.warning("Could not load tokenizer for %s, estimating counts: %s", model, e)
+        return None
+
+
+def count_tokens(text, model="text-embedding-ada-002"):
+    tokenizer = get_tokenizer(model)
+    if tokenizer is None:
+        return max(1, len(text) // _CHARS_PER_TOKEN)
+    return len(tokenizer.encode(text))
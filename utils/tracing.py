@@ -0,0 +1,293 @@
+# chatbot_desktop/utils/tracing.py
+
+import bisect
+import contextvars
+import itertools
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+from config.settings import TRACE_ENABLED, TRACE_PATH, TRACE_RECENT_SPANS
+
+# Upper bounds (ms) of the latency histogram buckets; the last one catches the rest.
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, math.inf)
+
+# (trace_id, span_id) of the span the current thread or task is inside.
+_current = contextvars.ContextVar("trace_span", default=None)
+
+
+class Histogram:
+    """
+    Latency distribution over LATENCY_BUCKETS_MS. Quantiles are read off the
+    buckets, so they are upper bounds accurate to a bucket's width.
+    """
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS_MS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, ms):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        for bound, seen in zip(LATENCY_BUCKETS_MS, itertools.accumulate(self.counts)):
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count if self.count else 0.0,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "max_ms": self.max,
+            "buckets": {str(bound): n for bound, n in zip(LATENCY_BUCKETS_MS, self.counts) if n},
+        }
+
+
+class Span:
+    """
+    One timed stage of a request. Attributes (token counts, hit/miss,
+    sizes...) can be added with set() until the span ends.
+    """
+
+    def __init__(self, tracer, name, attrs, parent):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = dict(attrs)
+        self.trace_id, self.parent_id = parent if parent else (uuid.uuid4().hex[:16], None)
+        self.span_id = uuid.uuid4().hex[:16]
+        self.start = time.time()
+        self.duration_ms = None
+        self.error = None
+        self._started = time.perf_counter()
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self._started) * 1000
+
+    def end(self, error=None):
+        if self.duration_ms is None:
+            self.duration_ms = self.elapsed_ms()
+            self.error = error
+            self.tracer._finish(self)
+
+    def to_dict(self):
+        return {
+            "type": "span",
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": self.duration_ms,
+            "attrs": self.attrs,
+            "error": self.error,
+        }
+
+
+class _NullSpan:
+    # Stands in for Span while tracing is off.
+    def set(self, **attrs):
+        pass
+
+    def elapsed_ms(self):
+        return 0.0
+
+    def end(self, error=None):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """
+    Spans per request stage (routing, retrieval, embedding, completion,
+    rendering), with a latency histogram per span name, prompt/completion
+    token counts per model and hit/miss counts per cache.
+
+    Spans opened inside another span (in the same thread or asyncio task)
+    share its trace_id, so one chat turn can be followed end to end. The
+    last `recent` spans are kept in memory; with `path` set every finished
+    span is also appended there as a JSON line.
+    """
+
+    def __init__(self, enabled=TRACE_ENABLED, path=TRACE_PATH, recent=TRACE_RECENT_SPANS):
+        self.enabled = enabled
+        self.path = path
+        self.recent = deque(maxlen=recent)
+        self.histograms = {}  # span name -> Histogram
+        self.tokens = {}      # model -> {"prompt": n, "completion": n}
+        self.caches = {}      # cache name -> {"hits": n, "misses": n}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """
+        Times the block as span `name`; yields the Span, so attributes
+        found inside the block can be added with span.set(...).
+        """
+        if not self.enabled:
+            yield _NULL_SPAN
+            return
+        span = Span(self, name, attrs, _current.get())
+        token = _current.set((span.trace_id, span.span_id))
+        try:
+            yield span
+        except BaseException as exc:
+            span.end(error=f"{type(exc).__name__}: {exc}")
+            raise
+        finally:
+            _current.reset(token)
+            span.end()
+
+    def start_span(self, name, **attrs):
+        """
+        Starts a span the caller ends with span.end(), for work that doesn't
+        fit in a block (e.g. a stream read by someone else). It is a child of
+        the current span but does not become the current span itself.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, attrs, _current.get())
+
+    def record_tokens(self, model, prompt=0, completion=0):
+        if not self.enabled:
+            return
+        with self._lock:
+            counts = self.tokens.setdefault(model, {"prompt": 0, "completion": 0})
+            counts["prompt"] += prompt
+            counts["completion"] += completion
+
+    def record_cache(self, name, hits=0, misses=0):
+        if not self.enabled:
+            return
+        with self._lock:
+            counts = self.caches.setdefault(name, {"hits": 0, "misses": 0})
+            counts["hits"] += hits
+            counts["misses"] += misses
+
+    def snapshot(self):
+        """
+        The metrics so far: latency per stage, tokens per model and cache hit rates.
+        """
+        with self._lock:
+            return {
+                "type": "metrics",
+                "time": time.time(),
+                "stages": {name: hist.to_dict() for name, hist in sorted(self.histograms.items())},
+                "tokens": {model: dict(counts) for model, counts in self.tokens.items()},
+                "caches": {
+                    name: {**counts, "hit_rate": _rate(counts["hits"], counts["misses"])}
+                    for name, counts in self.caches.items()
+                },
+            }
+
+    def format(self):
+        snapshot = self.snapshot()
+        lines = [f"{'stage':<20} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}"]
+        for name, stage in snapshot["stages"].items():
+            lines.append(f"{name:<20} {stage['count']:>6} {stage['p50_ms']:>9.1f} "
+                         f"{stage['p95_ms']:>9.1f} {stage['max_ms']:>9.1f}")
+        if snapshot["tokens"]:
+            lines.append("tokens (prompt / completion):")
+            for model, counts in snapshot["tokens"].items():
+                lines.append(f"  {model:<30} {counts['prompt']:>9} {counts['completion']:>9}")
+        if snapshot["caches"]:
+            lines.append("cache hit rates:")
+            for name, counts in snapshot["caches"].items():
+                lines.append(f"  {name:<18} {counts['hit_rate']:>6.0%} "
+                             f"({counts['hits']} hits, {counts['misses']} misses)")
+        return "\n".join(lines)
+
+    def recent_spans(self):
+        with self._lock:
+            return [span.to_dict() for span in self.recent]
+
+    def export(self, path):
+        """
+        Writes the recent spans, then a snapshot(), to `path` as JSON lines.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for record in self.recent_spans() + [self.snapshot()]:
+                f.write(json.dumps(record, default=str) + "\n")
+        return path
+
+    def reset(self):
+        with self._lock:
+            self.recent.clear()
+            self.histograms.clear()
+            self.tokens.clear()
+            self.caches.clear()
+
+    # ------------------------------------------------------------------
+    def _finish(self, span):
+        with self._lock:
+            self.histograms.setdefault(span.name, Histogram()).observe(span.duration_ms)
+            self.recent.append(span)
+            if self.path:
+                self._append(span)
+
+    def _append(self, span):
+        # Caller holds self._lock.
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+
+def _rate(hits, misses):
+    return hits / (hits + misses) if hits + misses else 0.0
+
+
+def current_trace():
+    """
+    The (trace_id, span_id) the caller is inside, or None; hand it to
+    continue_trace() to link work done on another thread or event loop.
+    """
+    return _current.get()
+
+
+@contextmanager
+def continue_trace(trace):
+    token = _current.set(trace)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    """
+    Returns the process-wide Tracer.
+    """
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer()
+    return _tracer